@@ -3,34 +3,90 @@ Gerador de Dataset de Screenshots de Redes Sociais
 Cria screenshots autênticos e manipulados para treinamento de modelos ML
 """
 
+import argparse
 import asyncio
+import os
+import time
+from pathlib import Path
 import pandas as pd
 from playwright.async_api import async_playwright
 
 from src.config import (
-    POSTS_PER_PLATFORM,
-    MANIPULATIONS_PER_POST,
     AUTHENTIC_DIR,
     MANIPULATED_DIR,
-    DATASET_DIR
-)
-from src.screenshots import (
-    create_twitter_screenshot,
-    create_instagram_screenshot,
-    create_whatsapp_screenshot
-)
-from src.manipulations import (
-    manipulate_twitter,
-    manipulate_instagram,
-    manipulate_whatsapp
+    LABELS_PATH,
+    CATALOG_PATH,
+    VIEWPORT,
+    GRID_BATCH_SIZE,
+    CONCURRENCY,
+    LONG_THREADS_DIR,
+    LONG_THREAD_COUNT,
+    LONG_THREAD_MESSAGES,
+    ADAPTIVE_ROUNDS,
+    ADAPTIVE_BUDGET,
+    DETECTOR_PATH,
+    SCORING_HOST,
+    SCORING_PORT,
+    LABEL_SNAPSHOT_EVERY,
+    POSTS_PER_PLATFORM,
+    PLANNER_CALIBRATION_PATH
 )
+from src import config
+from src.benchmark import benchmark_capture, print_benchmark
+from src.batching import verify_grid_batch
+from src.pipeline import PLATFORMS, plan_jobs, render_jobs, interleave_jobs, LabelSnapshots
+from src.variants import expand_variants
+from src.autotune import ConcurrencyTuner, load_tuned_concurrency
+from src.delta import pack_manipulated, export_pngs
+from src.forensics import build_forensic_maps
+from src.catalog import open_catalog, upsert_images, job_record, import_labels, refresh_images, label_path
+from src.rebuild import stale_jobs, watch_templates
+from src.threads import generate_long_whatsapp_data, render_long_thread
+from src.similarity import build_index, NeighborIndex, trace_sources
+from src.forgery import forge_dataset
+from src.png_optimize import optimize_dataset
+from src.adaptive import (evaluate_dataset, slice_weights, plan_adaptive_jobs, last_adaptive_round,
+                          print_slice_report)
+from src.audit import audit_dataset, save_audit
+from src.evaluation import evaluate_baselines, print_evaluation
+from src.scoring import Detector, ScoringService, train_detector, load_test
+from src.assets import build_asset_pool
+from src.planner import calibrate, calibration_settings, load_calibration, save_calibration
+from src.planner import plan_counts, predict_run, suggest_settings
 
 
 # Lista para armazenar metadados
 dataset_metadata = []
 
 
-async def generate_dataset():
+def prepare_assets(workers: int = None, force: bool = False):
+    """
+    Garante o pool de imagens procedurais (posts e avatares) antes de renderizar.
+
+    Só gera os assets que ainda não existem em disco; com o pool pronto,
+    a chamada é instantânea.
+
+    Args:
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        force (bool): Regera todo o pool
+
+    Exemplo de uso:
+        prepare_assets(workers=4)
+        # Output:
+        # >> Pool de assets: 512 imagens geradas, 0 em cache (21.7 MB)
+    """
+    start = time.perf_counter()
+    stats = build_asset_pool(workers=workers, force=force)
+    if stats['generated']:
+        print(f">> Pool de assets: {stats['generated']} imagens geradas, {stats['cached']} em cache "
+              f"({stats['bytes'] / 1e6:.1f} MB) em {time.perf_counter() - start:.1f}s")
+
+
+async def generate_dataset(batch_size: int = GRID_BATCH_SIZE,
+                           concurrency: int = None,
+                           autotune: bool = False,
+                           variants: bool = False,
+                           snapshot_every: int = LABEL_SNAPSHOT_EVERY):
     """
     Função principal que orquestra a geração completa do dataset.
 
@@ -38,21 +94,43 @@ async def generate_dataset():
     de screenshots de redes sociais, incluindo:
 
     Processo de geração:
-    1. Inicializa o browser Playwright para renderização
-    2. Para cada plataforma (Twitter, Instagram, WhatsApp):
-       - Cria screenshots autênticos usando templates HTML
-       - Gera múltiplas versões manipuladas de cada screenshot
-       - Salva metadados para labels do dataset
-    3. Exporta arquivo CSV com labels para treinamento ML
+    1. Gera os dados (spec) de todos os posts e suas manipulações
+    2. Inicializa o browser Playwright para renderização
+    3. Renderiza os screenshots autênticos e manipulados usando templates HTML,
+       individualmente ou em grade (batch_size posts por captura), em várias
+       páginas simultâneas. Os posts se alternam entre plataformas e tipos de
+       manipulação (interleave_jobs), então qualquer prefixo da execução é um
+       dataset balanceado; com --autotune, um único tuner ajusta a concorrência
+       sobre a mistura e salva o nível para cada template
+    4. Publica um labels.csv parcial e consistente a cada snapshot_every imagens
+    5. Publica o labels.csv final, também de forma atômica
 
     Estrutura do dataset gerado:
     - Pasta 'autenticos/': Screenshots originais não modificados
     - Pasta 'manipulados/': Versões alteradas dos originais
-    - Arquivo 'labels.csv': Metadados e labels para cada imagem
+    - Arquivo 'labels.csv': Metadados e labels para cada imagem,
+      incluindo a caixa de recorte (clip_*) de cada captura
+    - Arquivo 'catalog.sqlite': Catálogo indexado (checksum, dimensões, spec
+      e ligação autêntico → manipulados), atualizado a cada lote
 
     Configurações (definidas nas constantes):
     - POSTS_PER_PLATFORM: Quantos posts criar por rede social
     - MANIPULATIONS_PER_POST: Quantas versões manipuladas por post
+    - CLIP_TO_CONTAINER / CLIP_PADDING: Recorte das capturas no contêiner
+    - CAPTURE_BACKEND / CAPTURE_FORMAT / CAPTURE_QUALITY: Backend e codificação
+
+    Args:
+        batch_size (int): Posts renderizados por captura em grade (1 = um por captura)
+        concurrency (int, optional): Páginas renderizando ao mesmo tempo. Se None, usa o
+                                     valor salvo pelo autotune para o host/template
+                                     ou CONCURRENCY
+        autotune (bool): Se True, ajusta a concorrência durante a execução (sobe enquanto
+                         as imagens/s melhoram, recua ao estabilizar ou sob pressão de
+                         memória/event loop) e salva o nível escolhido por host/template
+        variants (bool): Se True, cada imagem é capturada também nas variantes de tema,
+                         escala e largura (VARIANT_*), a partir de um único
+                         preenchimento do DOM
+        snapshot_every (int): Imagens entre publicações do labels.csv parcial (0 = só no final)
 
     Raises:
         Exception: Qualquer erro na geração dos screenshots ou templates
@@ -66,83 +144,52 @@ async def generate_dataset():
             # [SUCESSO] Dataset gerado com sucesso!
     """
 
-    print(">> Iniciando geracao do dataset...")
-    print(f">> Serao gerados: {POSTS_PER_PLATFORM * 3} autenticos + {POSTS_PER_PLATFORM * 3 * MANIPULATIONS_PER_POST} manipulados")
-    print(f">> Total: {POSTS_PER_PLATFORM * 3 * (1 + MANIPULATIONS_PER_POST)} imagens\n")
+    jobs = plan_jobs(variants=expand_variants() if variants else None)
+    authentic_count = sum(1 for job in jobs if job['label']['class'] == 'autentico')
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(viewport={'width': 600, 'height': 800})
+    print(">> Iniciando geracao do dataset...")
+    print(f">> Serao gerados: {authentic_count} autenticos + {len(jobs) - authentic_count} manipulados")
+    print(f">> Total: {len(jobs)} imagens\n")
+    catalog = open_catalog()
+    snapshots = LabelSnapshots(every=snapshot_every)
 
-        platforms = [
-            ('twitter', create_twitter_screenshot, manipulate_twitter),
-            ('instagram', create_instagram_screenshot, manipulate_instagram),
-            ('whatsapp', create_whatsapp_screenshot, manipulate_whatsapp),
-        ]
+    def on_rows(batch, rows):
+        # Atualizar o catálogo incrementalmente
+        upsert_images(catalog, [job_record(job, row) for job, row in zip(batch, rows)])
+        snapshots.add(rows)
 
-        for platform_name, create_func, manipulate_func in platforms:
-            print(f">> Gerando {platform_name.upper()}...")
+        for row in rows:
+            # Adicionar metadados
+            dataset_metadata.append(row)
 
-            for i in range(POSTS_PER_PLATFORM):
-                # Criar screenshot autêntico
-                authentic_filename = AUTHENTIC_DIR / f"{platform_name}_{i:03d}.png"
-                original_data = await create_func(page, str(authentic_filename))
+            if row['class'] == 'autentico':
+                print(f"  [OK] {row['filename']}")
+            else:
+                print(f"    -> {row['filename']} ({row['manipulation_type']})")
 
-                # Adicionar metadados
-                dataset_metadata.append({
-                    'filename': authentic_filename.name,
-                    'class': 'autentico',
-                    'manipulation_type': 'none',
-                    'original_filename': authentic_filename.name,
-                    'social_network': platform_name
-                })
+    prepare_assets()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
 
-                print(f"  [OK] {authentic_filename.name}")
-
-                # Criar manipulações
-                if platform_name == "twitter":
-                    manipulation_types = [
-                        "metrics_change",
-                        "text_change",
-                        "verification_change",
-                    ]
-                elif platform_name == "instagram":
-                    manipulation_types = [
-                        "metrics_change",
-                        "caption_change",
-                        "verification_change",
-                    ]
-                elif platform_name == "whatsapp":
-                    manipulation_types = [
-                        "time_change",
-                        "message_change",
-                        "contact_change",
-                    ]
-
-                for j, manip_type in enumerate(manipulation_types):
-                    manipulated_filename = MANIPULATED_DIR / f"{platform_name}_{i:03d}_manip_{j+1}.png"
-
-                    await manipulate_func(page, original_data, manip_type)
-                    await page.screenshot(path=str(manipulated_filename))
-
-                    dataset_metadata.append({
-                        'filename': manipulated_filename.name,
-                        'class': 'manipulado',
-                        'manipulation_type': manip_type,
-                        'original_filename': authentic_filename.name,
-                        'social_network': platform_name
-                    })
-
-                    print(f"    -> {manipulated_filename.name} ({manip_type})")
-
-            print()
+        print(f">> Gerando {', '.join(name.upper() for name in PLATFORMS)} (intercalados)...")
+        tuned = [load_tuned_concurrency(name) for name in PLATFORMS]
+        tuner = ConcurrencyTuner(list(PLATFORMS)) if autotune else None
+        await render_jobs(browser, interleave_jobs(jobs, min_run=batch_size), batch_size=batch_size,
+                          concurrency=concurrency or max(level or 0 for level in tuned) or CONCURRENCY,
+                          tuner=tuner, on_rows=on_rows)
+        if tuner is not None:
+            print(f"    [autotune] concorrencia salva para {', '.join(PLATFORMS)}: "
+                  f"{load_tuned_concurrency(next(iter(PLATFORMS)))}")
+        print()
 
         await browser.close()
 
-    # Salvar metadados em CSV
+    catalog.close()
+
+    # Salvar metadados em CSV (snapshot final, trocado de forma atômica)
+    snapshots.publish()
     df = pd.DataFrame(dataset_metadata)
-    csv_path = DATASET_DIR / "labels.csv"
-    df.to_csv(csv_path, index=False, encoding='utf-8')
+    csv_path = LABELS_PATH
 
     print("\n[SUCESSO] Dataset gerado com sucesso!")
     print(f"\n>> Estatisticas:")
@@ -153,7 +200,704 @@ async def generate_dataset():
     print(f"   - {AUTHENTIC_DIR}")
     print(f"   - {MANIPULATED_DIR}")
     print(f"   - {csv_path}")
+    print(f"   - {CATALOG_PATH}")
+
+
+def update_labels(rows):
+    """
+    Atualiza o labels.csv com as linhas re-renderizadas (por filename).
+
+    Linhas existentes são substituídas e linhas novas são acrescentadas,
+    mantendo a ordem e as colunas do arquivo atual. O arquivo é gravado
+    num temporário e trocado de uma vez (os.replace), como nos snapshots.
+
+    Args:
+        rows (List[Dict]): Linhas retornadas por render_jobs()
+    """
+    if not rows:
+        return
+
+    merged = pd.read_csv(LABELS_PATH).to_dict('records') if LABELS_PATH.exists() else []
+    position = {row['filename']: i for i, row in enumerate(merged)}
+
+    for row in rows:
+        if row['filename'] in position:
+            merged[position[row['filename']]] = row
+        else:
+            position[row['filename']] = len(merged)
+            merged.append(row)
+
+    tmp_path = LABELS_PATH.with_name(LABELS_PATH.name + '.tmp')
+    pd.DataFrame(merged).to_csv(tmp_path, index=False, encoding='utf-8')
+    os.replace(tmp_path, LABELS_PATH)
+
+
+async def rebuild_dataset(batch_size: int = GRID_BATCH_SIZE,
+                          concurrency: int = None,
+                          watch: bool = False,
+                          variants: bool = False):
+    """
+    Re-renderiza apenas as imagens cujo template ou spec mudou.
+
+    Os jobs são planejados como em generate_dataset() (a seed fixa
+    reproduz os mesmos dados) e comparados com os hashes de template e
+    spec gravados no catálogo. Só os desatualizados são renderizados; o
+    catálogo e o labels.csv são atualizados em seguida. Com watch=True,
+    o browser fica aberto e a verificação se repete a cada alteração em
+    templates/, então mexer no CSS de uma plataforma re-renderiza só as
+    imagens dela.
+
+    Args:
+        batch_size (int): Posts renderizados por captura em grade (1 = um por captura)
+        concurrency (int, optional): Páginas renderizando ao mesmo tempo. Se None, usa o
+                                     valor salvo pelo autotune para o host/template
+                                     ou CONCURRENCY
+        watch (bool): Se True, continua observando templates/ até Ctrl+C
+        variants (bool): Se True, inclui as variantes de tema/escala/largura
+
+    Exemplo de uso:
+        asyncio.run(rebuild_dataset(watch=True))
+        # Output:
+        # >> Templates alterados: whatsapp.html
+        # >> WHATSAPP: 80 imagens desatualizadas
+        # >> 80 imagens re-renderizadas em 6.3s
+    """
+    jobs = plan_jobs(variants=expand_variants() if variants else None)
+    catalog = open_catalog()
+
+    def on_rows(batch, rows):
+        upsert_images(catalog, [job_record(job, row) for job, row in zip(batch, rows)])
+
+    prepare_assets()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+
+        async def rebuild_stale(changed=None):
+            if changed:
+                print(f">> Templates alterados: {', '.join(changed)}")
+
+            stale = stale_jobs(catalog, jobs)
+            if not stale:
+                print(">> Nenhuma imagem desatualizada")
+                return
+
+            start = time.perf_counter()
+            rows = []
+            for platform_name in PLATFORMS:
+                platform_jobs = [job for job in stale if job['platform'] == platform_name]
+                if not platform_jobs:
+                    continue
+
+                print(f">> {platform_name.upper()}: {len(platform_jobs)} imagens desatualizadas")
+                platform_concurrency = concurrency or load_tuned_concurrency(platform_name) or CONCURRENCY
+                rows += await render_jobs(browser, platform_jobs, batch_size=batch_size,
+                                          concurrency=platform_concurrency, on_rows=on_rows)
+
+            update_labels(rows)
+            print(f">> {len(rows)} imagens re-renderizadas em {time.perf_counter() - start:.1f}s")
+
+        try:
+            await rebuild_stale()
+            if watch:
+                print(">> Observando templates/ (Ctrl+C para sair)...")
+                await watch_templates(rebuild_stale)
+        finally:
+            await browser.close()
+            catalog.close()
+
+
+async def generate_long_threads(count: int = LONG_THREAD_COUNT,
+                                num_messages: int = LONG_THREAD_MESSAGES,
+                                stitch: bool = False):
+    """
+    Gera conversas longas do WhatsApp capturadas em blocos da altura do viewport.
+
+    Cada conversa vira uma sequência de blocos '<conversa>_tile_NNN' em
+    dataset/conversas_longas/, com o deslocamento de rolagem e as mensagens
+    visíveis de cada bloco registrados em labels.csv da mesma pasta.
+
+    Args:
+        count (int): Quantidade de conversas
+        num_messages (int): Mensagens por conversa
+        stitch (bool): Se True, grava também a conversa inteira costurada ('<conversa>_full.png')
+
+    Exemplo de uso:
+        asyncio.run(generate_long_threads(count=2, num_messages=500, stitch=True))
+        # Output:
+        # [OK] whatsapp_long_000: 40 blocos, 31870px
+    """
+    rows = []
+
+    prepare_assets()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page(viewport=VIEWPORT)
+
+        for i in range(count):
+            thread_id = f"whatsapp_long_{i:03d}"
+            data = generate_long_whatsapp_data(num_messages)
+            result = await render_long_thread(page, data, LONG_THREADS_DIR, thread_id, stitch=stitch)
+
+            for tile in result['tiles']:
+                rows.append({
+                    'filename': tile.pop('filename'),
+                    'class': 'autentico',
+                    'manipulation_type': 'none',
+                    'original_filename': thread_id,
+                    'social_network': 'whatsapp',
+                    **tile,
+                })
+            print(f"  [OK] {thread_id}: {len(result['tiles'])} blocos, {result['height']}px")
+
+        await browser.close()
+
+    csv_path = LONG_THREADS_DIR / "labels.csv"
+    pd.DataFrame(rows).to_csv(csv_path, index=False, encoding='utf-8')
+    print(f"\n>> {len(rows)} blocos salvos em {LONG_THREADS_DIR}")
+
+
+async def adaptive_generate(rounds: int = ADAPTIVE_ROUNDS,
+                            budget: int = ADAPTIVE_BUDGET,
+                            concurrency: int = None,
+                            workers: int = None):
+    """
+    Gera o dataset em rodadas que concentram a renderização nos casos difíceis.
+
+    A cada rodada, um classificador base é treinado sobre o dataset atual
+    (validação cruzada agrupada por post) e o erro é medido em cada fatia
+    (plataforma, tipo de manipulação). O lote seguinte sorteia mais posts
+    e manipulações nas fatias com mais erro; nas métricas, parte das
+    alterações usa fatores sutis (perto de 1,0). O orçamento de imagens é
+    dividido igualmente entre as rodadas, e o catálogo e o labels.csv são
+    atualizados ao fim de cada uma. Os arquivos continuam a numeração das
+    rodadas que já estão no labels.csv (adapt01, adapt02, ...).
+
+    Args:
+        rounds (int): Quantidade de rodadas
+        budget (int): Máximo de imagens renderizadas, somando todas as rodadas
+        concurrency (int, optional): Páginas renderizando ao mesmo tempo. Se None, usa o
+                                     valor salvo pelo autotune para o host/template
+                                     ou CONCURRENCY
+        workers (int, optional): Processos usados no cálculo das características
+
+    Exemplo de uso:
+        asyncio.run(adaptive_generate(rounds=3, budget=300))
+        # Output:
+        # >> Rodada 1/3: 240 imagens avaliadas
+        #   Plataforma Tipo                         Imagens    Erro   Peso
+        #   twitter    metrics_change                    20   65.0%   0.65
+        # >> 99 imagens renderizadas (orçamento restante: 201)
+    """
+    catalog = open_catalog()
+    cache = {}
+    remaining = budget
+
+    def on_rows(batch, rows):
+        upsert_images(catalog, [job_record(job, row) for job, row in zip(batch, rows)])
+
+    def evaluate():
+        labels = pd.read_csv(LABELS_PATH).to_dict('records')
+        return labels, evaluate_dataset(labels, workers=workers, cache=cache)
+
+    prepare_assets(workers=workers)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            for round_index in range(1, rounds + 1):
+                labels, report = evaluate()
+                weights = slice_weights(report)
+                print(f">> Rodada {round_index}/{rounds}: {len(labels)} imagens avaliadas")
+                print_slice_report(report, weights)
+
+                # Numeração contínua entre execuções: não sobrescreve rodadas já gravadas
+                jobs = plan_adaptive_jobs(weights, remaining // (rounds - round_index + 1),
+                                          last_adaptive_round(labels) + 1)
+                rows = []
+                for platform_name in PLATFORMS:
+                    platform_jobs = [job for job in jobs if job['platform'] == platform_name]
+                    if platform_jobs:
+                        platform_concurrency = concurrency or load_tuned_concurrency(platform_name) or CONCURRENCY
+                        rows += await render_jobs(browser, platform_jobs, concurrency=platform_concurrency,
+                                                  on_rows=on_rows)
+                update_labels(rows)
+                remaining -= len(rows)
+                print(f">> {len(rows)} imagens renderizadas (orçamento restante: {remaining})\n")
+        finally:
+            await browser.close()
+            catalog.close()
+
+    labels, report = evaluate()
+    print(f">> Resultado final: {len(labels)} imagens avaliadas")
+    print_slice_report(report)
+
+
+def generate_pixel_forgeries(workers: int = None):
+    """
+    Gera manipulações editando os pixels dos PNGs autênticos (sem browser).
+
+    Usa o spec e as caixas dos elementos ('layout') gravados no catálogo
+    durante a renderização. Os manipulados entram no catálogo e no
+    labels.csv, herdando as colunas do autêntico de origem (recorte e
+    variante).
+
+    Args:
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+
+    Exemplo de uso:
+        generate_pixel_forgeries(workers=4)
+        # Output:
+        # >> 120 manipulações em pixels de 60 autênticos (0 sem layout) em 4.2s
+    """
+    start = time.perf_counter()
+    catalog = open_catalog()
+    try:
+        records, stats = forge_dataset(catalog, workers=workers)
+        upsert_images(catalog, records)
+    finally:
+        catalog.close()
+
+    sources = pd.read_csv(LABELS_PATH).to_dict('records') if LABELS_PATH.exists() else []
+    sources = {row['filename']: row for row in sources}
+    rows = []
+    for record in records:
+        row = {key: value for key, value in record.items() if key not in ('path', 'spec', 'layout')}
+        rows.append({**sources.get(record['original_filename'], {}), **row})
+    update_labels(rows)
+
+    print(f">> {stats['forged']} manipulações em pixels de {stats['sources'] - stats['skipped']} autênticos "
+          f"({stats['skipped']} sem layout) em {time.perf_counter() - start:.1f}s")
+    if stats['skipped']:
+        print(">> Autênticos sem layout no catálogo: gere o dataset sem --batch-size para medi-lo")
+
+
+def optimize_pngs(workers: int = None):
+    """
+    Recodifica os PNGs do dataset sem perdas e mostra a economia por plataforma.
+
+    Cada arquivo só é substituído se a nova versão for menor e tiver
+    exatamente os mesmos pixels. O catálogo, se existir, recebe os novos
+    checksums e tamanhos.
+
+    Args:
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+
+    Exemplo de uso:
+        optimize_pngs(workers=8)
+        # Output:
+        # >> instagram  :  80 arquivos,  80 regravados (0 em paleta)   10.3 MB ->   3.0 MB (-70.4%)
+    """
+    start = time.perf_counter()
+    report, changed = optimize_dataset(workers=workers)
+
+    if changed and CATALOG_PATH.exists():
+        catalog = open_catalog()
+        refresh_images(catalog, changed)
+        catalog.close()
+
+    for platform_name, entry in sorted(report.items()):
+        saved = 1 - entry['after'] / max(entry['before'], 1)
+        print(f">> {platform_name:<11}: {entry['files']:>4} arquivos, {entry['changed']:>4} regravados "
+              f"({entry['palette']} em paleta) {entry['before'] / 1e6:>7.1f} MB -> "
+              f"{entry['after'] / 1e6:>6.1f} MB (-{saved:.1%})")
+    before = sum(entry['before'] for entry in report.values())
+    after = sum(entry['after'] for entry in report.values())
+    print(f">> Total: {(before - after) / 1e6:.1f} MB economizados em {time.perf_counter() - start:.1f}s")
+
+
+def run_audit(workers: int = None) -> bool:
+    """
+    Confere a integridade do dataset e grava o relatório e a lista de correções.
+
+    Args:
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+
+    Returns:
+        bool: True se nenhum problema foi encontrado
+
+    Exemplo de uso:
+        run_audit(workers=8)
+        # Output:
+        # >> Auditoria: 240 linhas, 240 arquivos (15.5 MB) em 1.8s: nenhum problema
+    """
+    report = audit_dataset(workers=workers)
+    report_path, repairs_path = save_audit(report)
+    summary = ', '.join(f"{kind}={count}" for kind, count in sorted(report['counts'].items())) or "nenhum problema"
+    print(f">> Auditoria: {report['rows']} linhas, {report['files']} arquivos "
+          f"({report['bytes'] / 1e6:.1f} MB) em {report['seconds']}s: {summary}")
+    if not report['catalog']:
+        print(">> Sem catálogo: dimensões e checksums não comparados (python main.py --build-catalog)")
+    for action, filenames in report['repairs'].items():
+        print(f"    {action}: {len(filenames)}")
+    print(f">> Relatório em {report_path}, correções em {repairs_path}")
+    return not report['issues']
+
+
+def evaluate_models(workers: int = None):
+    """
+    Avalia KNN, SVM e árvore de decisão com validação cruzada aninhada e agrupada por post.
+
+    Args:
+        workers (int, optional): Processos dos pools de características e de treino
+
+    Exemplo de uso:
+        evaluate_models(workers=8)
+        # Output:
+        # >> 240 imagens, 3 modelos, 22 combinações de hiperparâmetros em 5.1s
+    """
+    start = time.perf_counter()
+    report, total = evaluate_baselines(workers=workers)
+    combos = sum(len(entry['grid']) for entry in report.values())
+    print(f">> {total} imagens, {len(report)} modelos, {combos} combinações de hiperparâmetros "
+          f"em {time.perf_counter() - start:.1f}s")
+    print_evaluation(report)
+
+
+def train_detector_model(workers: int = None):
+    """
+    Treina o detector sobre o labels.csv e grava o modelo usado por --serve.
+
+    Args:
+        workers (int, optional): Processos do pool de características
+
+    Exemplo de uso:
+        train_detector_model(workers=4)
+        # Output:
+        # >> Detector treinado em 240 imagens (4 classes): acurácia autêntico/manipulado 71.2%, tipo 58.3% (CV por post)
+    """
+    start = time.perf_counter()
+    detector, metrics = train_detector(workers=workers)
+    path = detector.save()
+    print(f">> Detector treinado em {metrics['images']} imagens ({metrics['classes']} classes): "
+          f"acurácia autêntico/manipulado {metrics['binary_accuracy']:.1%}, "
+          f"tipo {metrics['type_accuracy']:.1%} (CV por post) em {time.perf_counter() - start:.1f}s")
+    print(f">> Modelo salvo em {path}")
+
+
+async def serve_detector(host: str = SCORING_HOST, port: int = SCORING_PORT, workers: int = None):
+    """
+    Sobe o serviço de detecção com o modelo de DETECTOR_PATH (até Ctrl+C).
+
+    Args:
+        host (str): Endereço de escuta
+        port (int): Porta de escuta
+        workers (int, optional): Processos do pool de características
+    """
+    if not DETECTOR_PATH.exists():
+        raise SystemExit(f">> Modelo não encontrado em {DETECTOR_PATH}: rode python main.py --train-detector")
+    service = ScoringService(Detector.load(), workers=workers)
+    print(f">> Serviço de detecção em http://{host}:{port} (POST /score, POST /score/batch, GET /stats)")
+    await service.serve(host, port)
+
+
+async def run_load_test(requests: int, concurrency: int = 16,
+                        host: str = SCORING_HOST, port: int = SCORING_PORT):
+    """
+    Mede vazão e latência de um serviço já no ar, enviando imagens do labels.csv.
+
+    Args:
+        requests (int): Total de requisições
+        concurrency (int): Requisições simultâneas
+        host (str): Endereço do serviço
+        port (int): Porta do serviço
+
+    Exemplo de uso:
+        asyncio.run(run_load_test(500, concurrency=32))
+        # Output:
+        # >> Cliente: 500 requisições em 9.8s (51.0 img/s), latência p50 540.1 ms, p95 700.3 ms, p99 810.9 ms
+    """
+    paths = [label_path(row) for row in pd.read_csv(LABELS_PATH).to_dict('records')]
+    paths = [path for path in paths if path.exists()]
+    stats = await load_test(paths, host, port, requests=requests, concurrency=concurrency)
+    latency = stats['latency_ms']
+    print(f">> Cliente: {stats['requests']} requisições em {stats['seconds']}s "
+          f"({stats['images_per_second']} img/s), latência p50 {latency['p50']} ms, "
+          f"p95 {latency['p95']} ms, p99 {latency['p99']} ms")
+
+
+async def plan_run(batch_size: int = GRID_BATCH_SIZE, concurrency: int = None, variants: bool = False,
+                   time_budget: float = None, disk_budget: float = None, recalibrate: bool = False,
+                   workers: int = None):
+    """
+    Dry run: prevê o custo da geração completa e sugere as configurações mais rápidas.
+
+    Na primeira vez (ou com recalibrate, ou se host, viewport, captura ou
+    templates mudarem) renderiza uma amostra curta por plataforma numa
+    pasta temporária para calibrar o modelo de custo; depois usa a
+    calibração salva em PLANNER_CALIBRATION_PATH. Nenhuma imagem do
+    dataset é gerada.
+
+    Args:
+        batch_size (int): Posts por captura em grade, como na geração
+        concurrency (int, optional): Páginas simultâneas da previsão. Se None, como em generate_dataset()
+        variants (bool): Se True, inclui as variantes de tema, escala e largura
+        time_budget (float, optional): Tempo disponível em minutos
+        disk_budget (float, optional): Espaço disponível em MB
+        recalibrate (bool): Refaz a calibração mesmo havendo uma salva
+        workers (int, optional): Processos do pool de assets
+
+    Exemplo de uso:
+        asyncio.run(plan_run(time_budget=30))
+        # Output:
+        # >> Configuração atual (png, recorte, 1 página(s)): 240 imagens em 0.3 min (15.3 img/s), 365 MB de RAM, 12.0 MB em disco
+        # >> Mais rápidas dentro do orçamento:
+        #    jpeg  recorte   4 páginas: 0.1 min (52.7 img/s), 545 MB de RAM, 3.6 MB em disco
+    """
+    variant_list = expand_variants() if variants else None
+    settings = calibration_settings(batch_size, variant_list)
+    calibration = None if recalibrate else load_calibration(settings)
+    if calibration is None:
+        prepare_assets(workers=workers)
+        print(">> Calibrando: renderizando amostras de cada plataforma...")
+        start = time.perf_counter()
+        calibration = await calibrate(batch_size, variant_list)
+        save_calibration(calibration)
+        print(f">> Calibração salva em {PLANNER_CALIBRATION_PATH} ({time.perf_counter() - start:.1f}s)")
+    else:
+        print(f">> Usando a calibração salva em {PLANNER_CALIBRATION_PATH} (--recalibrate para refazer)")
+
+    def describe(run):
+        memory = f"{run['peak_memory_mb']:.0f} MB" if run['peak_memory_mb'] is not None else "? MB"
+        return (f"{run['seconds'] / 60:.1f} min ({run['images_per_second']:.1f} img/s), "
+                f"{memory} de RAM, {run['bytes'] / 1e6:.1f} MB em disco")
+
+    concurrency = concurrency or max(load_tuned_concurrency(name) or 0 for name in PLATFORMS) or CONCURRENCY
+    current = predict_run(calibration, plan_counts(variants=variant_list), config.CAPTURE_FORMAT,
+                          config.CLIP_TO_CONTAINER, concurrency)
+    clip_name = 'recorte' if current['clip'] else 'viewport'
+    print(f">> Configuração atual ({current['format']}, {clip_name}, {concurrency} página(s)): "
+          f"{current['images']} imagens em {describe(current)}")
+
+    plan = suggest_settings(calibration, variants=variant_list,
+                            time_budget=time_budget * 60 if time_budget is not None else None,
+                            disk_budget=disk_budget * 1e6 if disk_budget is not None else None)
+    if plan['fits']:
+        print(">> Mais rápidas dentro do orçamento:" if time_budget or disk_budget else ">> Mais rápidas:")
+        for run in plan['fits'][:5]:
+            print(f"   {run['format']:<5} {'recorte' if run['clip'] else 'viewport':<8} "
+                  f"{run['concurrency']:>2} páginas: {describe(run)}")
+        best = plan['fits'][0]
+        print(f">> Sugestão: python main.py --format {best['format']} --concurrency {best['concurrency']}"
+              f"{'' if best['clip'] else ' --no-clip'}{f' --batch-size {batch_size}' if batch_size > 1 else ''}"
+              f"{' --variants' if variants else ''}")
+    elif plan['max_posts'] is not None:
+        best = plan['max_posts_run']
+        print(f">> Nenhuma configuração cabe no orçamento com POSTS_PER_PLATFORM={POSTS_PER_PLATFORM}; "
+              f"cabem até {plan['max_posts']} posts por plataforma com {best['format']}, "
+              f"{'recorte' if best['clip'] else 'viewport'}, {best['concurrency']} páginas")
+    else:
+        print(">> Nenhuma configuração cabe na memória disponível")
+
+
+def parse_args():
+    """
+    Lê os argumentos de linha de comando.
+
+    Returns:
+        argparse.Namespace: Argumentos informados pelo usuário
+    """
+    parser = argparse.ArgumentParser(description="Gerador de dataset de screenshots de redes sociais")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Mede latência e tamanho das capturas por formato em vez de gerar o dataset")
+    parser.add_argument('--backend', choices=['cdp', 'playwright'], default=config.CAPTURE_BACKEND,
+                        help="Backend de captura")
+    parser.add_argument('--format', choices=sorted(config.FORMAT_EXTENSIONS), default=config.CAPTURE_FORMAT,
+                        help="Formato das imagens")
+    parser.add_argument('--quality', type=int, default=config.CAPTURE_QUALITY,
+                        help="Qualidade para jpeg/webp (0-100)")
+    parser.add_argument('--no-clip', action='store_true',
+                        help="Captura o viewport inteiro em vez de recortar no contêiner do post")
+    parser.add_argument('--batch-size', type=int, default=GRID_BATCH_SIZE,
+                        help="Posts renderizados por captura em grade (1 = desativado)")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Páginas renderizando ao mesmo tempo (padrão: valor do autotune ou CONCURRENCY)")
+    parser.add_argument('--autotune', action='store_true',
+                        help="Ajusta a concorrência automaticamente e salva o valor por host/template")
+    parser.add_argument('--variants', action='store_true',
+                        help="Captura cada imagem também nos temas/escalas/larguras de VARIANT_*")
+    parser.add_argument('--snapshot-every', type=int, default=LABEL_SNAPSHOT_EVERY, metavar='N',
+                        help="Publica um labels.csv parcial e consistente a cada N imagens (0 = só no final)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Re-renderiza apenas as imagens cujo template ou spec mudou")
+    parser.add_argument('--watch', action='store_true',
+                        help="Como --rebuild, e continua re-renderizando a cada alteração em templates/")
+    parser.add_argument('--long-threads', type=int, nargs='?', const=LONG_THREAD_COUNT, metavar='N',
+                        help="Gera N conversas longas do WhatsApp capturadas em blocos")
+    parser.add_argument('--thread-messages', type=int, default=LONG_THREAD_MESSAGES,
+                        help="Mensagens por conversa longa")
+    parser.add_argument('--stitch', action='store_true',
+                        help="Grava também a conversa longa inteira numa única imagem")
+    parser.add_argument('--build-catalog', action='store_true',
+                        help="Cria/atualiza o catálogo SQLite a partir do labels.csv existente")
+    parser.add_argument('--pack-deltas', action='store_true',
+                        help="Armazena os manipulados como delta (retângulos alterados) do autêntico")
+    parser.add_argument('--export-deltas', metavar='PASTA',
+                        help="Re-materializa os manipulados armazenados como delta em PNGs na pasta indicada")
+    parser.add_argument('--forensics', action='store_true',
+                        help="Calcula os mapas forenses (ELA, ruído, bordas) das imagens novas do dataset")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Gera rodadas extras concentradas nas fatias (plataforma, tipo) com mais erro do classificador base")
+    parser.add_argument('--rounds', type=int, default=ADAPTIVE_ROUNDS,
+                        help="Rodadas da geração adaptativa")
+    parser.add_argument('--budget', type=int, default=ADAPTIVE_BUDGET,
+                        help="Máximo de imagens renderizadas na geração adaptativa (todas as rodadas)")
+    parser.add_argument('--optimize-png', action='store_true',
+                        help="Recodifica os PNGs sem perdas (paleta, filtro e zlib) e mostra a economia por plataforma")
+    parser.add_argument('--pixel-forgeries', action='store_true',
+                        help="Gera manipulações editando os pixels dos autênticos (usa o layout do catálogo)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos usados nas etapas em lote (padrão: núcleos disponíveis)")
+    parser.add_argument('--build-assets', action='store_true',
+                        help="Regera o pool de imagens procedurais de posts e avatares")
+    parser.add_argument('--audit', action='store_true',
+                        help="Confere arquivos, labels.csv e catálogo e grava um relatório com as correções sugeridas")
+    parser.add_argument('--evaluate', action='store_true',
+                        help="Validação cruzada agrupada de KNN, SVM e árvore de decisão sobre o dataset")
+    parser.add_argument('--train-detector', action='store_true',
+                        help="Treina o detector autêntico/manipulado sobre o labels.csv e grava o modelo")
+    parser.add_argument('--serve', action='store_true',
+                        help="Sobe o serviço HTTP local de detecção com micro-lotes")
+    parser.add_argument('--port', type=int, default=SCORING_PORT,
+                        help="Porta do serviço de detecção (--serve e --load-test)")
+    parser.add_argument('--load-test', type=int, metavar='N',
+                        help="Envia N requisições ao serviço de detecção e mede vazão e latência")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Prevê tempo, vazão, memória e disco da geração e sugere configurações (não gera imagens)")
+    parser.add_argument('--time-budget', type=float, metavar='MIN',
+                        help="Com --dry-run: tempo disponível em minutos")
+    parser.add_argument('--disk-budget', type=float, metavar='MB',
+                        help="Com --dry-run: espaço disponível em MB")
+    parser.add_argument('--recalibrate', action='store_true',
+                        help="Com --dry-run: refaz a calibração mesmo havendo uma salva")
+    parser.add_argument('--build-index', action='store_true',
+                        help="Monta o índice de vizinhos mais próximos sobre os embeddings das imagens")
+    parser.add_argument('--trace', nargs='+', metavar='IMAGEM',
+                        help="Rastreia o post autêntico de origem e as variantes mais próximas de imagens suspeitas")
+    parser.add_argument('--verify-batch', action='store_true',
+                        help="Confere se a captura em grade é idêntica à renderização individual")
+    args = parser.parse_args()
+    if args.backend == 'playwright' and args.format not in config.PLAYWRIGHT_FORMATS:
+        parser.error(f"--backend playwright não captura em {args.format} (use {'/'.join(config.PLAYWRIGHT_FORMATS)} "
+                     f"ou --backend cdp)")
+    return args
+
+
+async def verify_batching(batch_size: int):
+    """
+    Confere, para cada plataforma, se a renderização em grade é idêntica à individual.
+
+    Args:
+        batch_size (int): Quantidade de posts no lote verificado
+
+    Returns:
+        bool: True se todos os recortes forem idênticos
+    """
+    ok = True
+
+    prepare_assets()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page(viewport=VIEWPORT)
+
+        for platform_name in PLATFORMS:
+            datas = [job['data'] for job in plan_jobs([platform_name], batch_size)][:batch_size]
+            report = await verify_grid_batch(page, platform_name, datas)
+            status = "OK" if not report['mismatches'] else "FALHOU"
+            print(f"  [{status}] {platform_name}: {report['checked']} recortes, "
+                  f"divergentes={report['mismatches']}, max_diff={report['max_abs_diff']}")
+            ok = ok and not report['mismatches']
+
+        await browser.close()
+
+    return ok
 
 
 if __name__ == "__main__":
-    asyncio.run(generate_dataset())
+    args = parse_args()
+    config.CAPTURE_BACKEND = args.backend
+    config.CAPTURE_FORMAT = args.format
+    config.CAPTURE_QUALITY = args.quality
+    if args.no_clip:
+        config.CLIP_TO_CONTAINER = False
+
+    if args.benchmark:
+        prepare_assets(workers=args.workers)
+        print_benchmark(asyncio.run(benchmark_capture()))
+    elif args.dry_run:
+        asyncio.run(plan_run(batch_size=args.batch_size,
+                             concurrency=args.concurrency,
+                             variants=args.variants,
+                             time_budget=args.time_budget,
+                             disk_budget=args.disk_budget,
+                             recalibrate=args.recalibrate,
+                             workers=args.workers))
+    elif args.rebuild or args.watch:
+        try:
+            asyncio.run(rebuild_dataset(batch_size=args.batch_size,
+                                        concurrency=args.concurrency,
+                                        watch=args.watch,
+                                        variants=args.variants))
+        except KeyboardInterrupt:
+            print("\n>> Watch encerrado")
+    elif args.long_threads:
+        asyncio.run(generate_long_threads(count=args.long_threads,
+                                          num_messages=args.thread_messages,
+                                          stitch=args.stitch))
+    elif args.build_catalog:
+        catalog = open_catalog()
+        total = import_labels(catalog)
+        catalog.close()
+        print(f">> {total} imagens catalogadas em {CATALOG_PATH}")
+    elif args.pack_deltas:
+        stats = pack_manipulated()
+        print(f">> {stats['images']} manipulados: {stats['png_bytes'] / 1e6:.1f} MB em PNG -> "
+              f"{stats['delta_bytes'] / 1e6:.1f} MB em delta "
+              f"({stats['png_bytes'] / max(stats['delta_bytes'], 1):.1f}x menor)")
+    elif args.export_deltas:
+        total = export_pngs(Path(args.export_deltas))
+        print(f">> {total} imagens exportadas para {args.export_deltas}")
+    elif args.forensics:
+        stats = build_forensic_maps(workers=args.workers)
+        print(f">> Mapas forenses: {stats['processed']} processadas, "
+              f"{stats['cached']} em cache (total {stats['total']})")
+    elif args.adaptive:
+        asyncio.run(adaptive_generate(rounds=args.rounds, budget=args.budget,
+                                      concurrency=args.concurrency, workers=args.workers))
+    elif args.optimize_png:
+        optimize_pngs(workers=args.workers)
+    elif args.pixel_forgeries:
+        generate_pixel_forgeries(workers=args.workers)
+    elif args.build_assets:
+        prepare_assets(workers=args.workers, force=True)
+    elif args.audit:
+        if not run_audit(workers=args.workers):
+            raise SystemExit(1)
+    elif args.evaluate:
+        evaluate_models(workers=args.workers)
+    elif args.train_detector:
+        train_detector_model(workers=args.workers)
+    elif args.serve:
+        try:
+            asyncio.run(serve_detector(port=args.port, workers=args.workers))
+        except KeyboardInterrupt:
+            print("\n>> Serviço encerrado")
+    elif args.load_test:
+        asyncio.run(run_load_test(args.load_test, concurrency=args.concurrency or 16, port=args.port))
+    elif args.build_index:
+        index = build_index(workers=args.workers)
+        path = index.save()
+        quantizer = f", {len(index.centroids)} listas" if index.centroids is not None else ""
+        print(f">> Índice com {len(index)} imagens{quantizer} salvo em {path}")
+    elif args.trace:
+        for result in trace_sources(NeighborIndex.load(), args.trace):
+            print(f">> {result['image']}: origem {result['source']} (similaridade {result['source_score']:.3f})")
+            for variant in result['variants']:
+                print(f"    -> {variant['filename']} ({variant['score']:.3f})")
+    elif args.verify_batch:
+        if not asyncio.run(verify_batching(max(args.batch_size, 2))):
+            raise SystemExit(1)
+    else:
+        asyncio.run(generate_dataset(batch_size=args.batch_size,
+                                     concurrency=args.concurrency,
+                                     autotune=args.autotune,
+                                     variants=args.variants,
+                                     snapshot_every=args.snapshot_every))
@@ -17,6 +17,8 @@ from .config import (
 
 from .generators import (
     generate_avatar_color,
+    generate_avatar_image,
+    generate_asset_id,
     get_initials,
     generate_username,
     generate_tweet_text,
@@ -27,18 +29,176 @@ from .generators import (
     generate_time
 )
 
+from .assets import (
+    synthesize_asset,
+    build_asset_pool,
+    asset_url
+)
+
+from .rendering import (
+    build_payload,
+    render_post
+)
+
 from .screenshots import (
+    generate_twitter_data,
+    generate_instagram_data,
+    generate_whatsapp_data,
     create_twitter_screenshot,
     create_instagram_screenshot,
     create_whatsapp_screenshot
 )
 
+from .capture import (
+    get_clip_box,
+    capture_screenshot,
+    capture_region,
+    capture_to_file,
+    clip_label_fields,
+    measure_layout,
+    image_extension
+)
+
 from .manipulations import (
+    manipulate_twitter_data,
+    manipulate_instagram_data,
+    manipulate_whatsapp_data,
     manipulate_twitter,
     manipulate_instagram,
     manipulate_whatsapp
 )
 
+from .batching import (
+    capture_grid,
+    measure_grid_layout,
+    verify_grid_batch
+)
+
+from .catalog import (
+    open_catalog,
+    upsert_images,
+    import_labels,
+    label_path,
+    query_images,
+    get_manipulations,
+    refresh_images,
+    template_hash,
+    spec_hash
+)
+
+from .image_cache import (
+    SharedImageCache,
+    DatasetImageLoader
+)
+
+from .pairs import (
+    PairIndex,
+    PairLoader
+)
+
+from .similarity import (
+    embed_image,
+    NeighborIndex,
+    build_index,
+    trace_sources
+)
+
+from .threads import (
+    generate_long_whatsapp_data,
+    render_long_thread,
+    stitch_tiles
+)
+
+from .rebuild import (
+    stale_jobs,
+    watch_templates
+)
+
+from .delta import (
+    encode_delta,
+    apply_delta,
+    reconstruct_image,
+    pack_manipulated,
+    export_pngs
+)
+
+from .png_optimize import (
+    optimize_png,
+    optimize_dataset
+)
+
+from .forensics import (
+    compute_forensic_maps,
+    build_forensic_maps,
+    load_forensic_maps
+)
+
+from .forgery import (
+    forge_image,
+    forge_dataset
+)
+
+from .variants import (
+    expand_variants,
+    apply_variant,
+    render_variants
+)
+
+from .pipeline import (
+    make_job,
+    plan_jobs,
+    post_group,
+    interleave_jobs,
+    LabelSnapshots,
+    render_job,
+    render_job_batch,
+    render_jobs
+)
+
+from .features import (
+    image_features,
+    dataset_features,
+    load_feature_cache,
+    save_feature_cache
+)
+
+from .adaptive import (
+    evaluate_slices,
+    evaluate_dataset,
+    slice_weights,
+    last_adaptive_round,
+    plan_adaptive_jobs
+)
+
+from .audit import (
+    audit_dataset,
+    save_audit
+)
+
+from .evaluation import (
+    cross_validate_models,
+    evaluate_baselines
+)
+
+from .scoring import (
+    Detector,
+    ScoringService,
+    train_detector,
+    load_test
+)
+
+from .autotune import (
+    ConcurrencyTuner,
+    load_tuned_concurrency
+)
+
+from .planner import (
+    calibrate,
+    plan_counts,
+    predict_run,
+    suggest_settings
+)
+
 __all__ = [
     # Config
     'POSTS_PER_PLATFORM',
@@ -49,6 +209,8 @@ __all__ = [
     'fake',
     # Generators
     'generate_avatar_color',
+    'generate_avatar_image',
+    'generate_asset_id',
     'get_initials',
     'generate_username',
     'generate_tweet_text',
@@ -57,12 +219,124 @@ __all__ = [
     'format_number',
     'generate_timestamp',
     'generate_time',
+    # Assets
+    'synthesize_asset',
+    'build_asset_pool',
+    'asset_url',
+    # Rendering
+    'build_payload',
+    'render_post',
     # Screenshots
+    'generate_twitter_data',
+    'generate_instagram_data',
+    'generate_whatsapp_data',
     'create_twitter_screenshot',
     'create_instagram_screenshot',
     'create_whatsapp_screenshot',
+    # Capture
+    'get_clip_box',
+    'capture_screenshot',
+    'capture_region',
+    'capture_to_file',
+    'clip_label_fields',
+    'measure_layout',
+    'image_extension',
     # Manipulations
+    'manipulate_twitter_data',
+    'manipulate_instagram_data',
+    'manipulate_whatsapp_data',
     'manipulate_twitter',
     'manipulate_instagram',
     'manipulate_whatsapp',
+    # Batching
+    'capture_grid',
+    'measure_grid_layout',
+    'verify_grid_batch',
+    # Catalog
+    'open_catalog',
+    'upsert_images',
+    'import_labels',
+    'label_path',
+    'query_images',
+    'get_manipulations',
+    'refresh_images',
+    'template_hash',
+    'spec_hash',
+    # Image cache
+    'SharedImageCache',
+    'DatasetImageLoader',
+    # Pairs
+    'PairIndex',
+    'PairLoader',
+    # Similarity
+    'embed_image',
+    'NeighborIndex',
+    'build_index',
+    'trace_sources',
+    # Threads
+    'generate_long_whatsapp_data',
+    'render_long_thread',
+    'stitch_tiles',
+    # Rebuild
+    'stale_jobs',
+    'watch_templates',
+    # Delta
+    'encode_delta',
+    'apply_delta',
+    'reconstruct_image',
+    'pack_manipulated',
+    'export_pngs',
+    # PNG optimize
+    'optimize_png',
+    'optimize_dataset',
+    # Forensics
+    'compute_forensic_maps',
+    'build_forensic_maps',
+    'load_forensic_maps',
+    # Forgery
+    'forge_image',
+    'forge_dataset',
+    # Variants
+    'expand_variants',
+    'apply_variant',
+    'render_variants',
+    # Pipeline
+    'make_job',
+    'plan_jobs',
+    'post_group',
+    'interleave_jobs',
+    'LabelSnapshots',
+    'render_job',
+    'render_job_batch',
+    'render_jobs',
+    # Features
+    'image_features',
+    'dataset_features',
+    'load_feature_cache',
+    'save_feature_cache',
+    # Adaptive
+    'evaluate_slices',
+    'evaluate_dataset',
+    'slice_weights',
+    'last_adaptive_round',
+    'plan_adaptive_jobs',
+    # Audit
+    'audit_dataset',
+    'save_audit',
+    # Evaluation
+    'cross_validate_models',
+    'evaluate_baselines',
+    # Scoring
+    'Detector',
+    'ScoringService',
+    'train_detector',
+    'load_test',
+    # Autotune
+    'ConcurrencyTuner',
+    'load_tuned_concurrency',
+    # Planner
+    'calibrate',
+    'plan_counts',
+    'predict_run',
+    'suggest_settings',
 ]
@@ -0,0 +1,230 @@
+"""
+Geração adaptativa: erro de um classificador base por fatia (plataforma, tipo) guiando o replanejamento
+"""
+
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupKFold, cross_val_predict
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from .config import (
+    fake,
+    SEED,
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    MANIPULATION_TYPES,
+    ADAPTIVE_MANIPULATIONS_PER_POST,
+    ADAPTIVE_MIN_WEIGHT,
+    ADAPTIVE_SUBTLE_FACTOR,
+    ADAPTIVE_CV_FOLDS
+)
+from .catalog import label_path
+from .features import dataset_features
+from .pipeline import PLATFORMS, make_job, post_group
+from .rendering import build_payload
+
+
+Slice = Tuple[str, str]
+
+# Rodada gravada no nome dos arquivos gerados ('<plataforma>_adaptNN_...')
+ADAPTIVE_ROUND_PATTERN = re.compile(r'_adapt(\d+)_')
+
+
+def baseline_model():
+    """
+    Classificador base: regressão logística sobre as características padronizadas.
+    """
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000, class_weight='balanced'))
+
+
+def evaluate_slices(features: np.ndarray, labels: Sequence[Dict],
+                    folds: int = ADAPTIVE_CV_FOLDS) -> Dict[Slice, Dict]:
+    """
+    Erro fora da amostra do classificador base em cada fatia (plataforma, tipo de manipulação).
+
+    As predições vêm de validação cruzada agrupada por post de origem,
+    então um manipulado nunca é avaliado por um modelo que viu o seu
+    autêntico. Nos autênticos (tipo 'none') o erro é a taxa de falso
+    positivo; nos manipulados, a taxa de manipulações não detectadas.
+
+    Args:
+        features (np.ndarray): Matriz de características (dataset_features())
+        labels (Sequence[Dict]): Linhas do labels.csv, na ordem da matriz
+        folds (int): Máximo de folds da validação cruzada
+
+    Returns:
+        Dict[Slice, Dict]: {(plataforma, tipo): {'count', 'errors', 'error'}}
+
+    Exemplo:
+        >>> report = evaluate_slices(X, labels)
+        >>> report[('twitter', 'metrics_change')]
+        {'count': 20, 'errors': 13, 'error': 0.65}
+    """
+    target = np.array([label['class'] == 'manipulado' for label in labels])
+    groups = [post_group(label) for label in labels]
+    cv = GroupKFold(n_splits=min(folds, len(set(groups))))
+    predicted = cross_val_predict(baseline_model(), features, target, groups=groups, cv=cv)
+
+    report = defaultdict(lambda: {'count': 0, 'errors': 0})
+    for label, truth, guess in zip(labels, target, predicted):
+        entry = report[(label['social_network'], label['manipulation_type'])]
+        entry['count'] += 1
+        entry['errors'] += int(truth != guess)
+    for entry in report.values():
+        entry['error'] = entry['errors'] / entry['count']
+    return dict(report)
+
+
+def evaluate_dataset(labels: Sequence[Dict], workers: Optional[int] = None,
+                     cache: Optional[Dict] = None) -> Dict[Slice, Dict]:
+    """
+    Calcula as características das imagens do labels.csv e avalia cada fatia.
+
+    Args:
+        labels (Sequence[Dict]): Linhas do labels.csv (linhas sem arquivo são ignoradas)
+        workers (int, optional): Processos do pool de características
+        cache (Dict, optional): Cache de características entre rodadas (dataset_features())
+
+    Returns:
+        Dict[Slice, Dict]: Relatório de evaluate_slices()
+    """
+    labels = [label for label in labels if label_path(label).exists()]
+    features = dataset_features([label_path(label) for label in labels], workers=workers, cache=cache)
+    return evaluate_slices(features, labels)
+
+
+def slice_weights(report: Dict[Slice, Dict], min_weight: float = ADAPTIVE_MIN_WEIGHT) -> Dict[Slice, float]:
+    """
+    Peso de cada fatia renderizável no próximo lote: o erro medido, com um piso.
+
+    Fatias sem nenhuma imagem ainda recebem peso 1 (tratadas como difíceis).
+
+    Args:
+        report (Dict[Slice, Dict]): Relatório de evaluate_slices()
+        min_weight (float): Peso mínimo, para nenhuma fatia sumir do dataset
+
+    Returns:
+        Dict[Slice, float]: {(plataforma, tipo): peso} para os tipos de MANIPULATION_TYPES
+    """
+    weights = {}
+    for platform_name, manipulation_types in MANIPULATION_TYPES.items():
+        for manip_type in manipulation_types:
+            entry = report.get((platform_name, manip_type))
+            weights[(platform_name, manip_type)] = max(entry['error'] if entry else 1.0, min_weight)
+    return weights
+
+
+def _manipulate(platform_name: str, original_data: Dict, manip_type: str, error: float,
+                rng: random.Random, subtle_factor: Tuple[float, float]) -> Dict:
+    """
+    Manipula os dados de um post; nas métricas de uma fatia difícil, com probabilidade
+    igual ao erro, usa um fator sutil (perto de 1,0) que ainda muda o valor exibido.
+    """
+    manipulate_func = PLATFORMS[platform_name][1]
+    if manip_type == 'metrics_change' and rng.random() < error:
+        shown = build_payload(platform_name, original_data)['text']
+        for _ in range(10):
+            factor = 1 + rng.choice((-1, 1)) * rng.uniform(*subtle_factor)
+            data = manipulate_func(original_data, manip_type, factor=factor)
+            if build_payload(platform_name, data)['text'] != shown:
+                return data
+    return manipulate_func(original_data, manip_type)
+
+
+def last_adaptive_round(labels: Sequence[Dict]) -> int:
+    """
+    Maior rodada adaptativa já gravada no labels.csv (0 se nenhuma).
+
+    Uma nova execução do --adaptive continua a numeração a partir daqui,
+    para não sobrescrever os arquivos das rodadas anteriores.
+
+    Exemplo:
+        >>> last_adaptive_round([{'filename': 'twitter_adapt02_013.png'}, {'filename': 'twitter_000.png'}])
+        2
+    """
+    rounds = [int(match.group(1)) for label in labels
+              if (match := ADAPTIVE_ROUND_PATTERN.search(str(label['filename'])))]
+    return max(rounds, default=0)
+
+
+def plan_adaptive_jobs(weights: Dict[Slice, float], budget: int, round_index: int,
+                       manipulations_per_post: int = ADAPTIVE_MANIPULATIONS_PER_POST,
+                       subtle_factor: Tuple[float, float] = ADAPTIVE_SUBTLE_FACTOR) -> List[Dict]:
+    """
+    Planeja o lote de uma rodada, sorteando mais posts e manipulações nas fatias difíceis.
+
+    Cada post novo gera um autêntico e `manipulations_per_post`
+    manipulados. A plataforma do post é sorteada pela soma dos pesos das
+    suas fatias e os tipos de manipulação pelos pesos de cada fatia.
+    Os arquivos recebem o prefixo '<plataforma>_adaptNN_' (NN = rodada) e
+    o sorteio usa uma seed derivada de SEED e da rodada, então a mesma
+    rodada com os mesmos pesos gera os mesmos dados. O estado do random e
+    do Faker globais é restaurado ao final.
+
+    Args:
+        weights (Dict[Slice, float]): Pesos de slice_weights()
+        budget (int): Máximo de imagens renderizadas na rodada
+        round_index (int): Número da rodada (1, 2, ...)
+        manipulations_per_post (int): Manipulados gerados por autêntico
+        subtle_factor (Tuple[float, float]): Faixa de |fator - 1| das métricas sutis
+
+    Returns:
+        List[Dict]: Jobs no formato de plan_jobs()
+
+    Exemplo:
+        >>> weights = slice_weights(evaluate_dataset(labels))
+        >>> jobs = plan_adaptive_jobs(weights, budget=99, round_index=1)
+        >>> len(jobs), jobs[0]['label']['filename']
+        (99, 'twitter_adapt01_000.png')
+    """
+    seed = f"{SEED}:adaptive:{round_index}"
+    rng = random.Random(seed)
+
+    platform_weights = defaultdict(float)
+    for (platform_name, _), weight in weights.items():
+        platform_weights[platform_name] += weight
+    platforms = list(platform_weights)
+
+    jobs = []
+    counters = defaultdict(int)
+
+    # Os geradores de dados usam o random e o Faker globais: semeia e restaura no fim
+    random_state, faker_random = random.getstate(), fake.random
+    random.seed(seed)
+    fake.seed_instance(seed)
+    try:
+        for _ in range(budget // (1 + manipulations_per_post)):
+            platform_name = rng.choices(platforms, [platform_weights[name] for name in platforms])[0]
+            stem = f"{platform_name}_adapt{round_index:02d}_{counters[platform_name]:03d}"
+            counters[platform_name] += 1
+
+            original_data = PLATFORMS[platform_name][0]()
+            jobs.append(make_job(platform_name, AUTHENTIC_DIR, stem, original_data, 'autentico', 'none', stem))
+
+            slices = [key for key in weights if key[0] == platform_name]
+            chosen = rng.choices(slices, [weights[key] for key in slices], k=manipulations_per_post)
+            for j, (_, manip_type) in enumerate(chosen):
+                data = _manipulate(platform_name, original_data, manip_type,
+                                   weights[(platform_name, manip_type)], rng, subtle_factor)
+                jobs.append(make_job(platform_name, MANIPULATED_DIR, f"{stem}_manip_{j+1}", data,
+                                     'manipulado', manip_type, stem))
+    finally:
+        random.setstate(random_state)
+        fake.random = faker_random
+
+    return jobs
+
+
+def print_slice_report(report: Dict[Slice, Dict], weights: Optional[Dict[Slice, float]] = None) -> None:
+    """
+    Imprime o erro de cada fatia (e o peso no próximo lote, se informado).
+    """
+    print(f"  {'Plataforma':<10} {'Tipo':<28} {'Imagens':>7} {'Erro':>7} {'Peso':>6}")
+    for key in sorted(report):
+        entry = report[key]
+        weight = f"{weights[key]:.2f}" if weights and key in weights else '-'
+        print(f"  {key[0]:<10} {key[1]:<28} {entry['count']:>7} {entry['error']:>7.1%} {weight:>6}")
@@ -0,0 +1,338 @@
+"""
+Imagens procedurais dos posts e avatares, pré-renderizadas num pool em disco
+"""
+
+import colorsys
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageFilter
+from .config import (
+    SEED,
+    ASSETS_DIR,
+    ASSET_POOL_SIZES,
+    ASSET_IMAGE_SIZES,
+    ASSET_JPEG_QUALITY
+)
+
+
+# Versão dos geradores: mudar invalida o pool já gravado
+ASSETS_VERSION = 1
+
+# Tons de pele dos retratos (RGB 0-1)
+SKIN_TONES = [
+    (0.96, 0.80, 0.69), (0.91, 0.72, 0.58), (0.82, 0.61, 0.45),
+    (0.69, 0.48, 0.33), (0.55, 0.36, 0.24), (0.38, 0.25, 0.17),
+]
+
+
+def _rng(kind: str, index: int, seed=SEED) -> np.random.Generator:
+    """
+    Gerador de um asset, derivado da seed, do tipo e do índice.
+    """
+    digest = hashlib.sha256(f"{seed}:asset:{kind}:{index}".encode()).digest()
+    return np.random.default_rng(int.from_bytes(digest[:8], 'little'))
+
+
+def _grid(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordenadas normalizadas (0-1) de cada pixel: (y, x), cada uma (size, size).
+    """
+    axis = (np.arange(size) + 0.5) / size
+    return np.meshgrid(axis, axis, indexing='ij')
+
+
+def _upsample(grid: np.ndarray, size: int) -> np.ndarray:
+    """
+    Interpola uma grade aleatória (n+1, n+1) para (size, size) com suavização cúbica.
+    """
+    cells = grid.shape[0] - 1
+    coords = np.linspace(0, cells, size, endpoint=False)
+    i = coords.astype(int)
+    f = coords - i
+    f = f * f * (3 - 2 * f)
+    top = grid[i][:, i] * (1 - f) + grid[i][:, i + 1] * f
+    bottom = grid[i + 1][:, i] * (1 - f) + grid[i + 1][:, i + 1] * f
+    return top * (1 - f)[:, None] + bottom * f[:, None]
+
+
+def noise_field(rng: np.random.Generator, size: int, octaves: int = 5,
+                base_cells: int = 3, persistence: float = 0.5) -> np.ndarray:
+    """
+    Ruído fractal (soma de oitavas de value noise), normalizado em 0-1.
+
+    Args:
+        rng (np.random.Generator): Gerador do asset
+        size (int): Lado da imagem em pixels
+        octaves (int): Quantidade de oitavas
+        base_cells (int): Células da oitava mais grossa
+        persistence (float): Fator de amplitude entre oitavas
+
+    Returns:
+        np.ndarray: Campo (size, size) float
+    """
+    total = np.zeros((size, size))
+    amplitude = 1.0
+    for octave in range(octaves):
+        cells = base_cells * 2 ** octave
+        total += amplitude * _upsample(rng.random((cells + 1, cells + 1)), size)
+        amplitude *= persistence
+    return (total - total.min()) / max(np.ptp(total), 1e-9)
+
+
+def _color(hue: float, saturation: float, value: float) -> np.ndarray:
+    return np.array(colorsys.hsv_to_rgb(hue % 1.0, np.clip(saturation, 0, 1), np.clip(value, 0, 1)))
+
+
+def _mix(a: np.ndarray, b, t: np.ndarray) -> np.ndarray:
+    """
+    Interpola `a` -> `b` pelo campo `t` (H, W), em todos os canais.
+    """
+    t = t[..., None]
+    return a * (1 - t) + np.asarray(b) * t
+
+
+def _ellipse(y: np.ndarray, x: np.ndarray, cy: float, cx: float, ry: float, rx: float,
+             edge: float) -> np.ndarray:
+    """
+    Máscara suave (0-1) de uma elipse; `edge` é a largura da borda em coordenadas normalizadas.
+    """
+    distance = np.sqrt(((y - cy) / ry) ** 2 + ((x - cx) / rx) ** 2)
+    return np.clip((1 - distance) * min(ry, rx) / edge + 0.5, 0, 1)
+
+
+def _landscape(rng: np.random.Generator, size: int) -> np.ndarray:
+    y, x = _grid(size)
+    sunset = rng.random() < 0.4
+    hue = rng.uniform(0.02, 0.1) if sunset else rng.uniform(0.52, 0.62)
+    top = _color(hue + (0.6 if sunset else 0.02), rng.uniform(0.4, 0.8), rng.uniform(0.35, 0.7))
+    horizon_color = _color(hue, rng.uniform(0.3, 0.7), rng.uniform(0.8, 1.0))
+    horizon = rng.uniform(0.45, 0.7)
+    image = _mix(top, horizon_color, np.clip(y / horizon, 0, 1) ** 1.5)
+
+    # Sol com halo e nuvens
+    sy, sx = rng.uniform(0.15, horizon - 0.05), rng.uniform(0.15, 0.85)
+    distance = np.hypot(y - sy, x - sx)
+    glow = np.exp(-distance / rng.uniform(0.08, 0.2)) * 0.6 + np.clip((0.045 - distance) / 0.005, 0, 1)
+    image = _mix(image, _color(hue + 0.05, 0.25, 1.0), np.clip(glow, 0, 1))
+    clouds = np.clip((noise_field(rng, size, base_cells=2) - 0.55) * 3, 0, 1) * (y < horizon)
+    image = _mix(image, np.ones(3), clouds * rng.uniform(0.2, 0.6))
+
+    # Camadas de montanhas, mais escuras e saturadas à frente
+    layers = rng.integers(2, 5)
+    ground_hue = rng.uniform(0.2, 0.4) if rng.random() < 0.7 else rng.uniform(0.05, 0.12)
+    for layer in range(layers):
+        depth = (layer + 1) / layers
+        ridge_noise = _upsample(rng.random((9, 9)), size)[size // 2]
+        ridge = horizon - rng.uniform(0.05, 0.25) * (1 - depth) + (ridge_noise - 0.5) * 0.25
+        mask = np.clip((y - ridge[None, :]) * size / 1.5, 0, 1)
+        haze = 1 - depth
+        color = _color(ground_hue + rng.uniform(-0.03, 0.03), 0.3 + 0.4 * depth, 0.25 + 0.45 * haze)
+        texture = noise_field(rng, size, base_cells=6, octaves=4)[..., None] * 0.25 + 0.87
+        layer_color = _mix(np.broadcast_to(color, image.shape) * texture, horizon_color, np.full(y.shape, haze * 0.45))
+        image = _mix(image, layer_color, mask)
+    return image
+
+
+def _bokeh(rng: np.random.Generator, size: int) -> np.ndarray:
+    y, x = _grid(size)
+    hue = rng.random()
+    angle = rng.uniform(0, 2 * np.pi)
+    t = np.clip((x - 0.5) * np.cos(angle) + (y - 0.5) * np.sin(angle) + 0.5, 0, 1)
+    image = _mix(_color(hue, 0.6, rng.uniform(0.1, 0.35)), _color(hue + rng.uniform(0.08, 0.25), 0.7, 0.5), t)
+    for _ in range(rng.integers(12, 30)):
+        radius = rng.uniform(0.03, 0.14)
+        disc = _ellipse(y, x, rng.random(), rng.random(), radius, radius, radius * rng.uniform(0.1, 0.6))
+        color = _color(hue + rng.uniform(-0.15, 0.15), rng.uniform(0.2, 0.7), rng.uniform(0.7, 1.0))
+        image = _mix(image, color, disc * rng.uniform(0.15, 0.55))
+    return image
+
+
+def _still_life(rng: np.random.Generator, size: int) -> np.ndarray:
+    y, x = _grid(size)
+    table = rng.uniform(0.55, 0.75)
+    wall = _color(rng.random(), rng.uniform(0.05, 0.35), rng.uniform(0.55, 0.9))
+    image = _mix(wall * 0.8, wall, np.clip(1 - np.hypot(x - 0.3, y - 0.2), 0, 1))
+    wood = np.sin((x + noise_field(rng, size, base_cells=2) * 0.3) * rng.uniform(40, 80)) * 0.08 + 0.92
+    surface = _color(rng.uniform(0.05, 0.11), rng.uniform(0.3, 0.6), rng.uniform(0.35, 0.7))
+    image = _mix(image, surface * wood[..., None], np.clip((y - table) * size / 2, 0, 1))
+
+    # Objetos com sombra no chão e iluminação vinda da esquerda
+    for _ in range(rng.integers(1, 4)):
+        cx, width = rng.uniform(0.2, 0.8), rng.uniform(0.08, 0.2)
+        height = rng.uniform(0.1, 0.35)
+        base = table + rng.uniform(0.02, 0.12)
+        shadow = _ellipse(y, x, base, cx + width * 0.4, width * 0.3, width * 1.2, width * 0.4)
+        image = _mix(image, np.zeros(3), shadow * 0.35)
+        body = _ellipse(y, x, base - height / 2, cx, height / 2, width, 0.004)
+        light = np.clip(0.6 + (cx - x) / width * 0.4, 0.25, 1.1)[..., None]
+        color = _color(rng.random(), rng.uniform(0.4, 0.9), rng.uniform(0.6, 0.95))
+        image = _mix(image, np.clip(color * light, 0, 1), body)
+    return image
+
+
+def _marble(rng: np.random.Generator, size: int) -> np.ndarray:
+    y, x = _grid(size)
+    field = noise_field(rng, size, octaves=4, base_cells=2, persistence=0.4)
+    veins = (np.sin((x * rng.uniform(3, 8) + y * rng.uniform(1, 5) + field * rng.uniform(4, 10)) * np.pi) + 1) / 2
+    hue = rng.random()
+    image = _mix(_color(hue, rng.uniform(0.1, 0.6), rng.uniform(0.15, 0.45)),
+                 _color(hue + rng.uniform(0.05, 0.3), rng.uniform(0.1, 0.5), rng.uniform(0.75, 1.0)), veins ** 1.5)
+    return _mix(image, _color(hue + 0.5, 0.5, 0.9), np.clip(field - 0.75, 0, 1) * 2)
+
+
+def _portrait(rng: np.random.Generator, size: int) -> np.ndarray:
+    y, x = _grid(size)
+    image = _bokeh(rng, size)
+    skin = np.array(SKIN_TONES[rng.integers(len(SKIN_TONES))]) * rng.uniform(0.92, 1.05)
+    cx = rng.uniform(0.45, 0.55)
+    head_y, head_r = rng.uniform(0.4, 0.48), rng.uniform(0.17, 0.22)
+    light = np.clip(1.05 - (x - cx + 0.1) * 0.9, 0.6, 1.1)[..., None]
+
+    shirt = _color(rng.random(), rng.uniform(0.2, 0.8), rng.uniform(0.2, 0.9))
+    shoulders = _ellipse(y, x, 1.08, cx, 0.32, rng.uniform(0.38, 0.48), 0.01)
+    neck = _ellipse(y, x, head_y + head_r * 1.1, cx, head_r * 0.6, head_r * 0.45, 0.01)
+    head = _ellipse(y, x, head_y, cx, head_r * 1.2, head_r, 0.008)
+    image = _mix(image, np.clip(shirt * light, 0, 1), shoulders)
+    image = _mix(image, np.clip(skin * light * 0.85, 0, 1), neck)
+    image = _mix(image, np.clip(skin * light, 0, 1), head)
+
+    # Cabelo: calota sobre a cabeça com borda irregular
+    hair = _color(rng.uniform(0.03, 0.1), rng.uniform(0.3, 0.8), rng.uniform(0.05, 0.5))
+    edge = noise_field(rng, size, base_cells=4, octaves=3) * 0.06
+    cap = _ellipse(y, x, head_y - head_r * 0.25, cx, head_r * rng.uniform(1.0, 1.25), head_r * 1.12, 0.01)
+    cap *= np.clip((head_y - head_r * rng.uniform(0.1, 0.6) + edge - y) * size / 3, 0, 1)
+    return _mix(image, np.clip(hair * light, 0, 1), cap)
+
+
+POST_SCENES = [_landscape, _bokeh, _still_life, _marble]
+AVATAR_SCENES = [_portrait, _portrait, _portrait, _landscape, _marble]
+
+
+def _finish(image: np.ndarray, rng: np.random.Generator) -> Image.Image:
+    """
+    Acabamento fotográfico: exposição, vinheta, desfoque leve e granulação do sensor.
+    """
+    size = image.shape[0]
+    y, x = _grid(size)
+    vignette = 1 - rng.uniform(0.1, 0.45) * (np.hypot(y - 0.5, x - 0.5) / 0.707) ** 2
+    image = image * vignette[..., None] * rng.uniform(0.9, 1.1)
+    picture = Image.fromarray((np.clip(image, 0, 1) * 255).astype(np.uint8))
+    picture = picture.filter(ImageFilter.GaussianBlur(rng.uniform(0.3, 1.0) * size / 640))
+
+    grain = rng.normal(0, rng.uniform(2, 6) * min(1.0, size / 640) ** 0.5, (size, size, 1))
+    pixels = np.asarray(picture).astype(np.float32) + grain
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def synthesize_asset(kind: str, index: int, size: int, seed=SEED) -> Image.Image:
+    """
+    Gera uma imagem procedural (sempre a mesma para a mesma seed, tipo e índice).
+
+    Posts sorteiam entre paisagem, bokeh, natureza-morta e textura de
+    mármore; avatares são na maior parte retratos (fundo desfocado,
+    ombros, rosto e cabelo), às vezes paisagem ou textura. Tudo é
+    calculado com operações vetorizadas do NumPy sobre a grade de pixels.
+
+    Args:
+        kind (str): 'post' ou 'avatar'
+        index (int): Índice no pool
+        size (int): Lado da imagem quadrada em pixels
+        seed: Seed base (padrão: SEED)
+
+    Returns:
+        Image.Image: Imagem RGB (size, size)
+
+    Exemplo:
+        >>> synthesize_asset('avatar', 7, 128).size
+        (128, 128)
+    """
+    rng = _rng(kind, index, seed)
+    scenes = POST_SCENES if kind == 'post' else AVATAR_SCENES
+    scene = scenes[rng.integers(len(scenes))]
+    return _finish(scene(rng, size), rng)
+
+
+def asset_path(kind: str, asset_id: int) -> Path:
+    """
+    Caminho de um asset do pool.
+    """
+    return ASSETS_DIR / f"{kind}_{asset_id:04d}.jpg"
+
+
+def asset_url(kind: str, asset_id: int) -> str:
+    """
+    URL file:// de um asset do pool, usada pelos templates.
+    """
+    return asset_path(kind, asset_id).absolute().as_uri()
+
+
+def _asset_task(args: Tuple[str, int, int, int]) -> int:
+    """
+    Tarefa do pool: gera e grava um asset; retorna o tamanho do arquivo.
+    """
+    kind, index, size, quality = args
+    path = asset_path(kind, index)
+    synthesize_asset(kind, index, size).save(path, 'JPEG', quality=quality)
+    return path.stat().st_size
+
+
+def build_asset_pool(workers: Optional[int] = None, force: bool = False,
+                     pool_sizes: Dict[str, int] = ASSET_POOL_SIZES,
+                     image_sizes: Dict[str, int] = ASSET_IMAGE_SIZES,
+                     quality: int = ASSET_JPEG_QUALITY) -> Dict:
+    """
+    Pré-renderiza o pool de imagens dos posts e avatares em ASSETS_DIR.
+
+    Os templates referenciam os assets pelo ID sorteado nos dados do post
+    (generate_asset_id()), então a renderização só carrega um arquivo
+    pronto. O manifest.json guarda seed, versão e tamanhos: se nada
+    mudou, só os arquivos que faltam são gerados.
+
+    Args:
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        force (bool): Regera todos os assets
+        pool_sizes (Dict[str, int]): Quantidade de assets por tipo
+        image_sizes (Dict[str, int]): Lado das imagens por tipo, em pixels
+        quality (int): Qualidade JPEG
+
+    Returns:
+        Dict: {'generated', 'cached', 'bytes'}
+
+    Exemplo:
+        >>> build_asset_pool(workers=4)
+        {'generated': 512, 'cached': 0, 'bytes': 21733120}
+    """
+    ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = ASSETS_DIR / "manifest.json"
+    manifest = {
+        'seed': SEED,
+        'version': ASSETS_VERSION,
+        'quality': quality,
+        'kinds': {kind: {'count': pool_sizes[kind], 'size': image_sizes[kind]} for kind in pool_sizes},
+    }
+    previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+    if previous != manifest:
+        # Seed, versão ou tamanhos mudaram: os arquivos existentes não valem mais
+        force = True
+        manifest_path.unlink(missing_ok=True)
+
+    tasks = [
+        (kind, index, image_sizes[kind], quality)
+        for kind, count in pool_sizes.items()
+        for index in range(count)
+        if force or not asset_path(kind, index).exists()
+    ]
+    total = sum(pool_sizes.values())
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_asset_task, tasks, chunksize=8))
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+
+    size = sum(asset_path(kind, index).stat().st_size
+               for kind, count in pool_sizes.items() for index in range(count))
+    return {'generated': len(tasks), 'cached': total - len(tasks), 'bytes': size}
@@ -0,0 +1,265 @@
+"""
+Auditoria de integridade do dataset: labels.csv x arquivos x catálogo, em paralelo
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from PIL import Image
+from .config import (
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    LABELS_PATH,
+    CATALOG_PATH,
+    AUDIT_REPORT_PATH,
+    AUDIT_REPAIRS_PATH,
+    AUDIT_CHUNK_SIZE
+)
+from .catalog import label_path
+
+
+# Correção sugerida para cada tipo de problema
+REPAIR_ACTIONS = {
+    'missing_file': 'rerender',  # linha sem arquivo (ou 'drop_row', sem spec no catálogo)
+    'corrupt_file': 'rerender',  # arquivo que não decodifica (ou 'drop_row', sem spec)
+    'size_mismatch': 'rerender',  # dimensões diferentes das do catálogo
+    'checksum_mismatch': 'refresh_catalog',  # decodifica, mas o catálogo tem outro checksum
+    'uncatalogued': 'import_catalog',  # linha válida que não está no catálogo
+    'missing_original': 'drop_row',  # manipulado cujo autêntico não existe
+    'duplicate_row': 'drop_row',  # filename repetido no labels.csv
+    'orphan_file': 'delete_file',  # arquivo sem linha (ou 'restore_row', se está no catálogo)
+}
+
+
+def check_file(path: str) -> Dict:
+    """
+    Lê, calcula o checksum e decodifica uma imagem por completo.
+
+    Args:
+        path (str): Caminho da imagem
+
+    Returns:
+        Dict: {'exists', 'sha256', 'bytes', 'width', 'height', 'error'}
+    """
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return {'exists': False}
+
+    result = {'exists': True, 'sha256': hashlib.sha256(data).hexdigest(), 'bytes': len(data),
+              'width': None, 'height': None, 'error': None}
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            result['width'], result['height'] = image.size
+    except Exception as error:
+        result['error'] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def _check_task(paths: List[str]) -> List[Dict]:
+    """
+    Tarefa do pool: confere um grupo de arquivos.
+    """
+    return [check_file(path) for path in paths]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream_checks(rows: Iterable[Tuple[Dict, Path]], workers: Optional[int],
+                   chunk_size: int) -> Iterator[Tuple[Dict, Path, Dict]]:
+    """
+    Confere os arquivos das linhas num pool, com poucas tarefas em andamento por vez.
+
+    A leitura do labels.csv avança só à medida que os resultados são
+    consumidos, então a memória não cresce com o tamanho do dataset.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = 4 * (workers or os.cpu_count() or 1)
+        pending: deque = deque()
+        for chunk in _chunks(rows, chunk_size):
+            pending.append((chunk, executor.submit(_check_task, [str(path) for _, path in chunk])))
+            if len(pending) >= window:
+                chunk, future = pending.popleft()
+                yield from ((row, path, result) for (row, path), result in zip(chunk, future.result()))
+        while pending:
+            chunk, future = pending.popleft()
+            yield from ((row, path, result) for (row, path), result in zip(chunk, future.result()))
+
+
+def _catalog_entry(conn: Optional[sqlite3.Connection], filename: str) -> Optional[sqlite3.Row]:
+    if conn is None:
+        return None
+    return conn.execute("SELECT sha256, width, height, spec IS NOT NULL AS has_spec FROM images WHERE filename = ?",
+                        (filename,)).fetchone()
+
+
+def audit_dataset(labels_path: Path = LABELS_PATH,
+                  authentic_dir: Path = AUTHENTIC_DIR,
+                  manipulated_dir: Path = MANIPULATED_DIR,
+                  catalog_path: Path = CATALOG_PATH,
+                  workers: Optional[int] = None,
+                  chunk_size: int = AUDIT_CHUNK_SIZE) -> Dict:
+    """
+    Confere a integridade do dataset e sugere uma correção para cada problema.
+
+    Para cada linha do labels.csv: o arquivo existe na pasta da classe,
+    decodifica por completo e, se houver catálogo, tem as dimensões e o
+    checksum registrados. Depois: todo manipulado aponta para um
+    autêntico existente, não há filenames repetidos e não há arquivos em
+    autenticos/ ou manipulados/ sem linha no labels.csv. A leitura,
+    o checksum e a decodificação rodam num pool de processos, em
+    streaming; só os nomes dos arquivos ficam em memória.
+
+    Args:
+        labels_path (Path): Caminho do labels.csv
+        authentic_dir (Path): Pasta dos autênticos
+        manipulated_dir (Path): Pasta dos manipulados
+        catalog_path (Path): Catálogo SQLite (opcional: sem ele, dimensões e checksums não são comparados)
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        chunk_size (int): Arquivos por tarefa do pool
+
+    Returns:
+        Dict: {'rows', 'files', 'bytes', 'catalog', 'seconds', 'counts', 'issues', 'repairs'}
+
+    Exemplo:
+        >>> report = audit_dataset(workers=8)
+        >>> report['counts'], report['repairs'].get('rerender', [])[:1]
+        ({'size_mismatch': 1}, ['twitter_004_manip_2.png'])
+    """
+    start = time.perf_counter()
+    conn = None
+    if catalog_path.exists():
+        conn = sqlite3.connect(f"file:{catalog_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+
+    issues: List[Dict] = []
+    seen = {authentic_dir: set(), manipulated_dir: set()}
+    authentic_names = set()
+    children: List[Tuple[str, str]] = []
+    duplicates = set()
+    stats = {'rows': 0, 'bytes': 0}
+
+    def issue(kind: str, filename: str, path: Path, detail: str = '', has_spec: bool = True) -> None:
+        action = REPAIR_ACTIONS[kind]
+        if action == 'rerender' and not has_spec:
+            action = 'drop_row'
+        issues.append({'kind': kind, 'filename': filename, 'path': str(path), 'detail': detail, 'repair': action})
+
+    def rows() -> Iterator[Tuple[Dict, Path]]:
+        with open(labels_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                path = label_path(row, authentic_dir, manipulated_dir)
+                if row['filename'] in seen[path.parent]:
+                    duplicates.add(row['filename'])
+                    continue
+                seen[path.parent].add(row['filename'])
+                yield row, path
+
+    try:
+        for row, path, result in _stream_checks(rows(), workers, chunk_size):
+            stats['rows'] += 1
+            filename = row['filename']
+            entry = _catalog_entry(conn, filename)
+            has_spec = bool(entry and entry['has_spec'])
+
+            if row['class'] == 'autentico':
+                authentic_names.add(filename)
+            else:
+                children.append((filename, row['original_filename']))
+
+            if not result['exists']:
+                issue('missing_file', filename, path, has_spec=has_spec)
+                continue
+            stats['bytes'] += result['bytes']
+            if result['error']:
+                issue('corrupt_file', filename, path, result['error'], has_spec=has_spec)
+                continue
+            if conn is None:
+                continue
+            if entry is None:
+                issue('uncatalogued', filename, path)
+            elif (entry['width'], entry['height']) != (result['width'], result['height']):
+                issue('size_mismatch', filename, path,
+                      f"{result['width']}x{result['height']} (catálogo: {entry['width']}x{entry['height']})",
+                      has_spec=has_spec)
+            elif entry['sha256'] and entry['sha256'] != result['sha256']:
+                issue('checksum_mismatch', filename, path)
+
+        for filename in sorted(duplicates):
+            issue('duplicate_row', filename, labels_path)
+
+        # Autênticos re-renderizados voltam a existir; só os removidos deixam o manipulado sem origem
+        dropped = {item['filename'] for item in issues
+                   if item['repair'] == 'drop_row' and item['kind'] != 'duplicate_row'}
+        for filename, original in children:
+            if original not in authentic_names or original in dropped:
+                issue('missing_original', filename, manipulated_dir / filename, f"original_filename: {original}")
+
+        files = 0
+        for folder, names in seen.items():
+            if not folder.exists():
+                continue
+            for entry in os.scandir(folder):
+                if not entry.is_file() or entry.name.startswith('.') or entry.name.endswith('.tmp'):
+                    continue
+                files += 1
+                if entry.name not in names:
+                    known = _catalog_entry(conn, entry.name) is not None
+                    issue('orphan_file', entry.name, Path(entry.path))
+                    if known:
+                        issues[-1]['repair'] = 'restore_row'
+    finally:
+        if conn is not None:
+            conn.close()
+
+    repairs = defaultdict(list)
+    for item in issues:
+        repairs[item['repair']].append(item['filename'])
+
+    return {
+        'rows': stats['rows'],
+        'files': files,
+        'bytes': stats['bytes'],
+        'catalog': conn is not None,
+        'seconds': round(time.perf_counter() - start, 2),
+        'counts': dict(Counter(item['kind'] for item in issues)),
+        'issues': issues,
+        'repairs': {action: sorted(set(names)) for action, names in sorted(repairs.items())},
+    }
+
+
+def save_audit(report: Dict, report_path: Path = AUDIT_REPORT_PATH,
+               repairs_path: Path = AUDIT_REPAIRS_PATH) -> Tuple[Path, Path]:
+    """
+    Grava o relatório (JSON) e a lista de correções (CSV: repair, kind, filename, path, detail).
+
+    Returns:
+        Tuple[Path, Path]: Caminhos do relatório e da lista de correções
+    """
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    with open(repairs_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['repair', 'kind', 'filename', 'path', 'detail'])
+        writer.writeheader()
+        for item in sorted(report['issues'], key=lambda item: (item['repair'], item['filename'])):
+            writer.writerow(item)
+    return report_path, repairs_path
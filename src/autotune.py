@@ -0,0 +1,209 @@
+"""
+Autotune da concorrência de renderização de acordo com o host
+"""
+
+import asyncio
+import json
+import socket
+import time
+from pathlib import Path
+from typing import Optional, Sequence, Union
+from .config import (
+    TEMPLATE_FILES,
+    AUTOTUNE_MAX_CONCURRENCY,
+    AUTOTUNE_WINDOW,
+    AUTOTUNE_MIN_GAIN,
+    AUTOTUNE_MAX_LOOP_LAG_MS,
+    AUTOTUNE_MIN_FREE_MEMORY_MB,
+    AUTOTUNE_STATE_PATH
+)
+
+
+def available_memory_mb() -> Optional[float]:
+    """
+    Retorna a memória disponível do host em MB (Linux, via /proc/meminfo).
+
+    Returns:
+        Optional[float]: MemAvailable em MB, ou None se não for possível medir
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def tuning_key(platform: str) -> str:
+    """
+    Chave usada para persistir a concorrência escolhida (host + template).
+
+    Args:
+        platform (str): Nome da plataforma
+
+    Returns:
+        str: Chave no formato 'host:template'
+    """
+    return f"{socket.gethostname()}:{TEMPLATE_FILES[platform]}"
+
+
+def load_tuned_concurrency(platform: str, path: Path = AUTOTUNE_STATE_PATH) -> Optional[int]:
+    """
+    Lê a concorrência salva para este host e template.
+
+    Args:
+        platform (str): Nome da plataforma
+        path (Path): Arquivo JSON com os valores salvos
+
+    Returns:
+        Optional[int]: Concorrência salva, ou None se ainda não houver
+    """
+    if not path.exists():
+        return None
+    return json.loads(path.read_text()).get(tuning_key(platform))
+
+
+def save_tuned_concurrency(platform: str, concurrency: int, path: Path = AUTOTUNE_STATE_PATH) -> None:
+    """
+    Salva a concorrência escolhida para este host e template.
+
+    Args:
+        platform (str): Nome da plataforma
+        concurrency (int): Concorrência escolhida
+        path (Path): Arquivo JSON com os valores salvos
+    """
+    state = json.loads(path.read_text()) if path.exists() else {}
+    state[tuning_key(platform)] = concurrency
+    path.write_text(json.dumps(state, indent=2, sort_keys=True))
+
+
+class ConcurrencyTuner:
+    """
+    Ajusta a quantidade de páginas simultâneas medindo a vazão em janelas.
+
+    A cada janela de AUTOTUNE_WINDOW imagens, compara as imagens/s com a
+    melhor janela até agora: enquanto houver ganho de pelo menos
+    AUTOTUNE_MIN_GAIN, sobe a concorrência em 1; quando a vazão estabiliza,
+    volta para o melhor nível e fixa. Se o atraso do event loop ou a memória
+    livre passarem dos limites, reduz a concorrência em qualquer fase.
+
+    Com várias plataformas (jobs intercalados), a vazão medida é a da
+    mistura; o nível escolhido é salvo para o template de cada uma.
+
+    Exemplo:
+        tuner = ConcurrencyTuner('twitter')  # ou ConcurrencyTuner(['twitter', 'instagram'])
+        tuner.start()
+        ...
+        tuner.record(images_done)   # a cada lote concluído
+        pages = tuner.limit          # concorrência atual
+        ...
+        tuner.finish()               # salva o nível escolhido
+    """
+
+    def __init__(self, platform: Union[str, Sequence[str]],
+                 max_concurrency: int = AUTOTUNE_MAX_CONCURRENCY,
+                 window: int = AUTOTUNE_WINDOW,
+                 min_gain: float = AUTOTUNE_MIN_GAIN,
+                 max_loop_lag_ms: float = AUTOTUNE_MAX_LOOP_LAG_MS,
+                 min_free_memory_mb: float = AUTOTUNE_MIN_FREE_MEMORY_MB,
+                 state_path: Path = AUTOTUNE_STATE_PATH):
+        self.platforms = [platform] if isinstance(platform, str) else list(platform)
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.min_gain = min_gain
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.min_free_memory_mb = min_free_memory_mb
+        self.state_path = state_path
+
+        saved = [load_tuned_concurrency(name, state_path) for name in self.platforms]
+        self.limit = min(max(level or 1 for level in saved), max_concurrency)
+        self.ramping = True
+        self.best_rate = 0.0
+        self.best_limit = self.limit
+
+        self._window_images = 0
+        self._window_start = None
+        self._max_lag_ms = 0.0
+        self._lag_task = None
+
+    def start(self) -> None:
+        """
+        Inicia a medição (relógio da janela e monitor de atraso do event loop).
+        """
+        self._window_start = time.perf_counter()
+        self._lag_task = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def _monitor_loop_lag(self, interval: float = 0.05) -> None:
+        """
+        Mede quanto o event loop atrasa para acordar um sleep curto.
+        """
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag_ms = (time.perf_counter() - start - interval) * 1000
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+
+    def _under_pressure(self) -> bool:
+        """
+        Indica se o atraso do event loop ou a memória livre passaram dos limites.
+        """
+        if self._max_lag_ms > self.max_loop_lag_ms:
+            return True
+        free_mb = available_memory_mb()
+        return free_mb is not None and free_mb < self.min_free_memory_mb
+
+    def record(self, images: int) -> None:
+        """
+        Registra imagens concluídas e, ao fechar uma janela, ajusta a concorrência.
+
+        Args:
+            images (int): Quantidade de imagens concluídas desde a última chamada
+        """
+        self._window_images += images
+        if self._window_images < self.window:
+            return
+
+        previous_limit = self.limit
+        elapsed = time.perf_counter() - self._window_start
+        rate = self._window_images / elapsed if elapsed > 0 else 0.0
+
+        if self._under_pressure():
+            self.limit = max(1, self.limit - 1)
+            self.best_limit = min(self.best_limit, self.limit)
+            self.ramping = False
+        elif self.ramping:
+            if rate > self.best_rate * (1 + self.min_gain):
+                self.best_rate = rate
+                self.best_limit = self.limit
+                if self.limit < self.max_concurrency:
+                    self.limit += 1
+                else:
+                    self.ramping = False
+            else:
+                # Vazão estabilizou: volta para o melhor nível medido
+                self.limit = self.best_limit
+                self.ramping = False
+
+        if self.limit != previous_limit:
+            print(f"    [autotune] {rate:.1f} img/s, lag={self._max_lag_ms:.0f}ms -> "
+                  f"concorrencia {previous_limit} -> {self.limit}")
+
+        self._window_images = 0
+        self._window_start = time.perf_counter()
+        self._max_lag_ms = 0.0
+
+    def finish(self) -> int:
+        """
+        Encerra a medição e salva a concorrência escolhida para este host e cada template.
+
+        Returns:
+            int: Concorrência salva
+        """
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        chosen = self.best_limit if self.ramping else self.limit
+        for name in self.platforms:
+            save_tuned_concurrency(name, chosen, self.state_path)
+        return chosen
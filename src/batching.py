@@ -0,0 +1,269 @@
+"""
+Renderização em grade: vários posts numa única página e uma única captura
+"""
+
+import io
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image
+from playwright.async_api import Page
+from . import config
+from .config import VIEWPORT, CONTAINER_SELECTORS, LAYOUT_SELECTORS
+from .capture import capture_screenshot, offset_layout, pad_box
+from .rendering import APPLY_PAYLOAD_JS, build_payload, render_post, template_url
+
+
+# Maior dimensão de captura suportada pelo Chromium
+MAX_CAPTURE_SIZE = 16384
+
+# Nomes dos formatos no Pillow
+PIL_FORMATS = {
+    'png': 'PNG',
+    'jpeg': 'JPEG',
+    'webp': 'WEBP',
+}
+
+# Monta a grade: cada célula recebe um clone do contêiner do template com o
+# tamanho exato do viewport, para que o layout seja igual ao de uma página isolada.
+BUILD_GRID_JS = """
+async (args) => {
+    %s
+    const source = document.querySelector(args.selector);
+    const grid = document.createElement('div');
+    grid.style.cssText = `display: grid; grid-template-columns: repeat(${args.columns}, ${args.cellWidth}px);`;
+
+    const cells = [];
+    for (const payload of args.payloads) {
+        const cell = document.createElement('div');
+        cell.setAttribute('data-grid-cell', '');
+        cell.style.cssText = `width: ${args.cellWidth}px; height: ${args.cellHeight}px; overflow: hidden; position: relative;`;
+        const clone = source.cloneNode(true);
+        applyPayload(clone, payload);
+        cell.appendChild(clone);
+        grid.appendChild(cell);
+        cells.push([cell, clone]);
+    }
+    source.replaceWith(grid);
+    await loadImages(args.payloads);
+
+    // Posts mais altos que o viewport aumentam a altura de todas as células
+    const cellHeight = Math.max(args.cellHeight, ...cells.map(([cell]) => cell.scrollHeight));
+    for (const [cell] of cells) {
+        cell.style.height = `${cellHeight}px`;
+    }
+
+    return {
+        cellHeight: cellHeight,
+        items: cells.map(([cell, clone]) => {
+            const cellRect = cell.getBoundingClientRect();
+            const rect = clone.getBoundingClientRect();
+            return {
+                x: rect.left - cellRect.left,
+                y: rect.top - cellRect.top,
+                width: rect.width,
+                height: rect.height,
+                docHeight: Math.max(args.cellHeight, cell.scrollHeight),
+            };
+        }),
+    };
+}
+""" % APPLY_PAYLOAD_JS
+
+# Mede as caixas dos elementos de cada célula relativas à própria célula, ou
+# seja, nas coordenadas da página isolada equivalente (como MEASURE_LAYOUT_JS).
+MEASURE_GRID_LAYOUT_JS = """
+(selectors) => [...document.querySelectorAll('[data-grid-cell]')].map(cell => {
+    const origin = cell.getBoundingClientRect();
+    const layout = {};
+    for (const [name, selector] of Object.entries(selectors)) {
+        layout[name] = [...cell.querySelectorAll(selector)]
+            .map(el => el.getBoundingClientRect())
+            .filter(rect => rect.width > 0 && rect.height > 0)
+            .map(rect => [rect.x - origin.left, rect.y - origin.top, rect.width, rect.height]);
+    }
+    return layout;
+})
+"""
+
+
+def encode_image(image: Image.Image, fmt: str = None, quality: int = None) -> bytes:
+    """
+    Codifica uma imagem do Pillow no formato de captura configurado.
+
+    Args:
+        image (Image.Image): Imagem a codificar
+        fmt (str, optional): 'png', 'jpeg' ou 'webp'. Se None, usa CAPTURE_FORMAT
+        quality (int, optional): Qualidade para jpeg/webp. Se None, usa CAPTURE_QUALITY
+
+    Returns:
+        bytes: Imagem codificada
+    """
+    fmt = fmt or config.CAPTURE_FORMAT
+    quality = config.CAPTURE_QUALITY if quality is None else quality
+
+    buffer = io.BytesIO()
+    if fmt == 'png':
+        image.save(buffer, format='PNG')
+    else:
+        image.convert('RGB').save(buffer, format=PIL_FORMATS[fmt], quality=quality)
+    return buffer.getvalue()
+
+
+async def capture_grid(page: Page, platform: str, datas: List[Dict],
+                       columns: int = None, clip: bool = None,
+                       padding: int = None) -> List[Tuple[Image.Image, Dict[str, int]]]:
+    """
+    Renderiza vários posts do mesmo template numa página e recorta uma única captura.
+
+    Os custos fixos por imagem (navegação, round trips CDP, frame do
+    compositor e codificação) passam a ser pagos uma vez por lote. Cada
+    post ocupa uma célula do tamanho do viewport, então os recortes são
+    idênticos, pixel a pixel, a uma renderização isolada. A captura da
+    grade é sempre PNG (sem perdas); a codificação final fica com
+    encode_image().
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        datas (List[Dict]): Dados de cada post do lote
+        columns (int, optional): Colunas da grade. Se None, usa GRID_COLUMNS
+        clip (bool, optional): Se True, recorta no contêiner. Se None, usa CLIP_TO_CONTAINER
+        padding (int, optional): Margem do recorte. Se None, usa CLIP_PADDING
+
+    Returns:
+        List[Tuple[Image.Image, Dict[str, int]]]: Para cada post, a imagem recortada
+            e a caixa de recorte em coordenadas da página isolada
+
+    Raises:
+        ValueError: Se a grade ultrapassar o tamanho máximo de captura do Chromium
+
+    Exemplo:
+        async def exemplo():
+            datas = [generate_twitter_data() for _ in range(8)]
+            for image, box in await capture_grid(page, 'twitter', datas):
+                print(image.size, box)
+    """
+    columns = min(columns or config.GRID_COLUMNS, len(datas))
+    clip = config.CLIP_TO_CONTAINER if clip is None else clip
+    padding = config.CLIP_PADDING if padding is None else padding
+
+    viewport = page.viewport_size or VIEWPORT
+    cell_width, cell_height = viewport['width'], viewport['height']
+
+    await page.goto(template_url(platform))
+    layout = await page.evaluate(BUILD_GRID_JS, {
+        'selector': CONTAINER_SELECTORS[platform],
+        'payloads': [build_payload(platform, data) for data in datas],
+        'columns': columns,
+        'cellWidth': cell_width,
+        'cellHeight': cell_height,
+    })
+
+    rows = -(-len(datas) // columns)
+    grid_height = rows * layout['cellHeight']
+    grid_width = columns * cell_width
+    if grid_height > MAX_CAPTURE_SIZE or grid_width > MAX_CAPTURE_SIZE:
+        raise ValueError(f"Grade de {grid_width}x{grid_height}px excede {MAX_CAPTURE_SIZE}px; "
+                         "reduza GRID_BATCH_SIZE ou aumente GRID_COLUMNS")
+
+    await page.set_viewport_size({'width': grid_width, 'height': grid_height})
+    try:
+        png, _ = await capture_screenshot(page, platform, clip=False, fmt='png')
+    finally:
+        await page.set_viewport_size(viewport)
+
+    grid_image = Image.open(io.BytesIO(png))
+    grid_image.load()
+
+    results = []
+    for index, item in enumerate(layout['items']):
+        if clip:
+            box = pad_box(item, padding, cell_width, item['docHeight'])
+        else:
+            box = {'x': 0, 'y': 0, 'width': cell_width, 'height': cell_height}
+
+        origin_x = (index % columns) * cell_width
+        origin_y = (index // columns) * layout['cellHeight']
+        image = grid_image.crop((
+            origin_x + box['x'],
+            origin_y + box['y'],
+            origin_x + box['x'] + box['width'],
+            origin_y + box['y'] + box['height'],
+        ))
+        results.append((image, box))
+
+    return results
+
+
+async def measure_grid_layout(page: Page, platform: str,
+                              boxes: List[Dict[str, int]]) -> List[Dict[str, List[List[int]]]]:
+    """
+    Mede o layout de cada post de uma grade montada por capture_grid().
+
+    Equivalente a measure_layout() para cada recorte: as caixas são
+    medidas dentro da célula do post e deslocadas pela sua caixa de recorte.
+
+    Args:
+        page (Page): Página com a grade (depois de capture_grid())
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        boxes (List[Dict[str, int]]): Caixas de recorte retornadas por capture_grid()
+
+    Returns:
+        List[Dict[str, List[List[int]]]]: Layout de cada post, na ordem da grade
+
+    Exemplo:
+        async def exemplo():
+            slices = await capture_grid(page, 'twitter', datas)
+            layouts = await measure_grid_layout(page, 'twitter', [box for _, box in slices])
+    """
+    cells = await page.evaluate(MEASURE_GRID_LAYOUT_JS, LAYOUT_SELECTORS[platform])
+    return [offset_layout(rects, box) for rects, box in zip(cells, boxes)]
+
+
+async def verify_grid_batch(page: Page, platform: str, datas: List[Dict], **grid_options) -> Dict:
+    """
+    Confere se os recortes da grade são idênticos às renderizações individuais.
+
+    Renderiza o lote em grade e depois cada post isoladamente (captura PNG),
+    comparando os pixels decodificados de cada par.
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        datas (List[Dict]): Dados de cada post do lote
+        **grid_options: Opções repassadas para capture_grid()
+
+    Returns:
+        Dict: {'checked': int, 'mismatches': List[int], 'max_abs_diff': int},
+              com os índices dos posts que diferem
+
+    Exemplo:
+        async def exemplo():
+            report = await verify_grid_batch(page, 'whatsapp', datas)
+            assert not report['mismatches']
+    """
+    slices = await capture_grid(page, platform, datas, **grid_options)
+
+    mismatches = []
+    max_abs_diff = 0
+    for index, (data, (image, box)) in enumerate(zip(datas, slices)):
+        await render_post(page, platform, data)
+        png, single_box = await capture_screenshot(
+            page, platform,
+            clip=grid_options.get('clip'),
+            padding=grid_options.get('padding'),
+            fmt='png'
+        )
+        single = np.asarray(Image.open(io.BytesIO(png)).convert('RGBA'))
+        sliced = np.asarray(image.convert('RGBA'))
+
+        if single.shape != sliced.shape or single_box != box:
+            mismatches.append(index)
+            continue
+
+        diff = int(np.abs(single.astype(np.int16) - sliced.astype(np.int16)).max())
+        max_abs_diff = max(max_abs_diff, diff)
+        if diff:
+            mismatches.append(index)
+
+    return {'checked': len(datas), 'mismatches': mismatches, 'max_abs_diff': max_abs_diff}
@@ -0,0 +1,107 @@
+"""
+Benchmark de captura: latência por imagem e tamanho de saída por formato
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from playwright.async_api import async_playwright
+from .config import VIEWPORT
+from .capture import capture_screenshot
+from .screenshots import (
+    create_twitter_screenshot,
+    create_instagram_screenshot,
+    create_whatsapp_screenshot
+)
+
+
+# Combinações (backend, formato) medidas por padrão
+DEFAULT_CAPTURE_MODES = [
+    ('playwright', 'png'),
+    ('cdp', 'png'),
+    ('cdp', 'jpeg'),
+    ('cdp', 'webp'),
+]
+
+
+async def benchmark_capture(samples: int = 20,
+                            modes: Sequence[Tuple[str, str]] = DEFAULT_CAPTURE_MODES,
+                            quality: Optional[int] = None) -> List[Dict]:
+    """
+    Mede a latência e o tamanho das capturas para cada backend e formato.
+
+    Para cada plataforma, renderiza um post autêntico e captura a mesma
+    página `samples` vezes em cada combinação (backend, formato). Como o
+    DOM não muda entre as capturas, a diferença medida é apenas o custo
+    da captura/codificação.
+
+    Args:
+        samples (int): Quantidade de capturas por plataforma e combinação
+        modes (Sequence[Tuple[str, str]]): Pares (backend, formato) a medir
+        quality (int, optional): Qualidade para jpeg/webp. Se None, usa CAPTURE_QUALITY
+
+    Returns:
+        List[Dict]: Uma linha por (plataforma, backend, formato) com as chaves
+                    'mean_ms', 'p50_ms', 'p95_ms' e 'mean_bytes'
+
+    Exemplo:
+        async def exemplo():
+            results = await benchmark_capture(samples=10)
+            print(results[0])
+            # {'platform': 'twitter', 'backend': 'cdp', 'format': 'png', 'mean_ms': 21.4, ...}
+    """
+    platforms = [
+        ('twitter', create_twitter_screenshot),
+        ('instagram', create_instagram_screenshot),
+        ('whatsapp', create_whatsapp_screenshot),
+    ]
+    results = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page(viewport=VIEWPORT)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for platform_name, create_func in platforms:
+                await create_func(page, str(Path(tmp_dir) / f"{platform_name}.png"))
+
+                for backend, fmt in modes:
+                    latencies = []
+                    sizes = []
+                    for _ in range(samples):
+                        start = time.perf_counter()
+                        data, _ = await capture_screenshot(page, platform_name, backend=backend,
+                                                           fmt=fmt, quality=quality)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        sizes.append(len(data))
+
+                    latencies.sort()
+                    results.append({
+                        'platform': platform_name,
+                        'backend': backend,
+                        'format': fmt,
+                        'mean_ms': statistics.mean(latencies),
+                        'p50_ms': latencies[len(latencies) // 2],
+                        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                        'mean_bytes': statistics.mean(sizes),
+                    })
+
+        await browser.close()
+
+    return results
+
+
+def print_benchmark(results: List[Dict]) -> None:
+    """
+    Imprime os resultados de benchmark_capture() em forma de tabela.
+
+    Args:
+        results (List[Dict]): Linhas retornadas por benchmark_capture()
+    """
+    print(f"{'plataforma':<10} {'backend':<10} {'formato':<7} {'media ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'KB':>8}")
+    for row in results:
+        print(f"{row['platform']:<10} {row['backend']:<10} {row['format']:<7} "
+              f"{row['mean_ms']:>9.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['mean_bytes'] / 1024:>8.1f}")
@@ -0,0 +1,370 @@
+"""
+Funções de captura de screenshots (recorte pelo contêiner e backend CDP)
+"""
+
+import base64
+import math
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from playwright.async_api import Page, CDPSession
+from . import config
+from .config import VIEWPORT, CONTAINER_SELECTORS, FORMAT_EXTENSIONS, LAYOUT_SELECTORS, PLAYWRIGHT_FORMATS
+
+
+# Sessões CDP abertas, uma por página (descartadas junto com a página)
+_cdp_sessions: "weakref.WeakKeyDictionary[Page, CDPSession]" = weakref.WeakKeyDictionary()
+
+# Caixas (coordenadas do documento) dos elementos visíveis de cada seletor
+MEASURE_LAYOUT_JS = """
+(selectors) => {
+    const layout = {};
+    for (const [name, selector] of Object.entries(selectors)) {
+        layout[name] = [...document.querySelectorAll(selector)]
+            .map(el => el.getBoundingClientRect())
+            .filter(rect => rect.width > 0 && rect.height > 0)
+            .map(rect => [rect.x + window.scrollX, rect.y + window.scrollY, rect.width, rect.height]);
+    }
+    return layout;
+}
+"""
+
+
+def image_extension(fmt: Optional[str] = None) -> str:
+    """
+    Retorna a extensão de arquivo correspondente ao formato de captura.
+
+    Args:
+        fmt (str, optional): Formato ('png', 'jpeg', 'webp').
+                             Se None, usa CAPTURE_FORMAT
+
+    Returns:
+        str: Extensão com ponto (ex: '.png', '.jpg')
+
+    Exemplo:
+        >>> image_extension('jpeg')
+        '.jpg'
+    """
+    return FORMAT_EXTENSIONS[fmt or config.CAPTURE_FORMAT]
+
+
+async def get_clip_box(page: Page, platform: str, padding: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Calcula a caixa de recorte do contêiner principal de um template.
+
+    Esta função localiza o elemento do post/conversa (definido em
+    CONTAINER_SELECTORS), aplica a margem fixa e arredonda a caixa para
+    pixels inteiros, limitando-a ao tamanho do documento. Assim a captura
+    não inclui o fundo vazio abaixo de tweets e legendas curtas.
+
+    Args:
+        page (Page): Página do Playwright com o template já preenchido
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        padding (int, optional): Margem em pixels adicionada em volta do contêiner.
+                                 Se None, usa CLIP_PADDING
+
+    Returns:
+        Optional[Dict[str, int]]: Caixa no formato {'x', 'y', 'width', 'height'}
+                                  ou None se o contêiner não estiver visível
+
+    Exemplo:
+        async def exemplo():
+            box = await get_clip_box(page, 'twitter', padding=8)
+            print(box)  # {'x': 0, 'y': 0, 'width': 608, 'height': 214}
+    """
+    if padding is None:
+        padding = config.CLIP_PADDING
+
+    box = await page.locator(CONTAINER_SELECTORS[platform]).first.bounding_box()
+    if box is None:
+        return None
+
+    doc_width, doc_height = await page.evaluate(
+        "() => [document.documentElement.scrollWidth, document.documentElement.scrollHeight]"
+    )
+
+    return pad_box(box, padding, doc_width, doc_height)
+
+
+def pad_box(rect: Dict[str, float], padding: int, doc_width: int, doc_height: int) -> Dict[str, int]:
+    """
+    Aplica a margem a um retângulo e arredonda para pixels inteiros dentro do documento.
+
+    Args:
+        rect (Dict[str, float]): Retângulo do elemento ({'x', 'y', 'width', 'height'})
+        padding (int): Margem em pixels adicionada em volta do retângulo
+        doc_width (int): Largura do documento (limite à direita)
+        doc_height (int): Altura do documento (limite inferior)
+
+    Returns:
+        Dict[str, int]: Caixa inteira {'x', 'y', 'width', 'height'}
+
+    Exemplo:
+        >>> pad_box({'x': 66.0, 'y': 20.0, 'width': 468.0, 'height': 700.5}, 4, 600, 800)
+        {'x': 62, 'y': 16, 'width': 476, 'height': 709}
+    """
+    x0 = max(0, math.floor(rect['x'] - padding))
+    y0 = max(0, math.floor(rect['y'] - padding))
+    x1 = min(doc_width, math.ceil(rect['x'] + rect['width'] + padding))
+    y1 = min(doc_height, math.ceil(rect['y'] + rect['height'] + padding))
+
+    return {'x': x0, 'y': y0, 'width': x1 - x0, 'height': y1 - y0}
+
+
+async def get_cdp_session(page: Page) -> CDPSession:
+    """
+    Retorna (criando se necessário) a sessão CDP associada à página.
+
+    A sessão é reutilizada entre capturas para evitar o custo de abrir
+    um novo canal com o Chromium a cada screenshot.
+
+    Args:
+        page (Page): Página do Playwright (somente Chromium)
+
+    Returns:
+        CDPSession: Sessão CDP ligada à página
+    """
+    session = _cdp_sessions.get(page)
+    if session is None:
+        session = await page.context.new_cdp_session(page)
+        _cdp_sessions[page] = session
+    return session
+
+
+async def _capture_cdp(page: Page, box: Optional[Dict[str, int]], fmt: str,
+                       quality: int, optimize_for_speed: bool, scroll_y: Optional[int] = None) -> bytes:
+    """
+    Captura via Page.captureScreenshot e devolve os bytes decodificados.
+
+    O clip do CDP fica em coordenadas do documento, rolado ou não.
+    """
+    params = {
+        'format': fmt,
+        'fromSurface': True,
+        'optimizeForSpeed': optimize_for_speed,
+    }
+    if fmt != 'png':
+        params['quality'] = quality
+    if box is not None:
+        params['clip'] = {**box, 'scale': 1}
+        # Sem rolagem, recortes abaixo da dobra precisam capturar além do viewport
+        viewport = page.viewport_size or VIEWPORT
+        params['captureBeyondViewport'] = scroll_y is None and box['y'] + box['height'] > viewport['height']
+
+    session = await get_cdp_session(page)
+    result = await session.send('Page.captureScreenshot', params)
+    return base64.b64decode(result['data'])
+
+
+async def _capture_playwright(page: Page, box: Optional[Dict[str, int]], fmt: str, quality: int,
+                              scroll_y: Optional[int] = None) -> bytes:
+    """
+    Captura via page.screenshot() e devolve os bytes.
+
+    Sem full_page, o clip do Playwright é relativo ao viewport.
+    """
+    if fmt not in PLAYWRIGHT_FORMATS:
+        raise ValueError(f"O backend 'playwright' não captura em {fmt}: use --backend cdp")
+    kwargs = {'type': fmt}
+    if fmt != 'png':
+        kwargs['quality'] = quality
+    if box is not None and scroll_y is not None:
+        kwargs['clip'] = {**box, 'y': box['y'] - scroll_y}
+    elif box is not None:
+        # full_page permite recortes que ultrapassam a altura do viewport
+        kwargs.update(clip=box, full_page=True)
+    return await page.screenshot(**kwargs)
+
+
+async def capture_region(page: Page, box: Optional[Dict[str, int]],
+                         backend: Optional[str] = None,
+                         fmt: Optional[str] = None,
+                         quality: Optional[int] = None,
+                         optimize_for_speed: Optional[bool] = None,
+                         scroll_y: Optional[int] = None) -> bytes:
+    """
+    Captura uma região do documento (ou o viewport inteiro) com o backend configurado.
+
+    A caixa está em coordenadas do documento. Sem `scroll_y`, a página não
+    foi rolada e a caixa pode ficar abaixo da dobra (o browser renderiza
+    além do viewport). Com `scroll_y`, a janela já foi rolada até a caixa,
+    como nos blocos de uma conversa longa, e a captura fica dentro do
+    viewport. Parâmetros None usam os valores de config.py.
+
+    Args:
+        page (Page): Página do Playwright já renderizada
+        box (Dict[str, int], optional): Região {'x', 'y', 'width', 'height'}.
+                                        Se None, captura o viewport
+        backend (str, optional): 'cdp' ou 'playwright'
+        fmt (str, optional): 'png', 'jpeg' ou 'webp'
+        quality (int, optional): Qualidade para jpeg/webp (0-100)
+        optimize_for_speed (bool, optional): Codificação rápida (somente CDP)
+        scroll_y (int, optional): window.scrollY atual, se a caixa está no viewport rolado
+
+    Returns:
+        bytes: Imagem codificada
+
+    Raises:
+        ValueError: Se o backend for desconhecido ou não suportar o formato
+    """
+    backend = backend or config.CAPTURE_BACKEND
+    fmt = fmt or config.CAPTURE_FORMAT
+    quality = config.CAPTURE_QUALITY if quality is None else quality
+    if optimize_for_speed is None:
+        optimize_for_speed = config.CAPTURE_OPTIMIZE_FOR_SPEED
+
+    if backend == 'cdp':
+        return await _capture_cdp(page, box, fmt, quality, optimize_for_speed, scroll_y)
+    if backend == 'playwright':
+        return await _capture_playwright(page, box, fmt, quality, scroll_y)
+    raise ValueError(f"Backend de captura desconhecido: {backend}")
+
+
+async def capture_screenshot(page: Page, platform: str,
+                             clip: Optional[bool] = None,
+                             padding: Optional[int] = None,
+                             backend: Optional[str] = None,
+                             fmt: Optional[str] = None,
+                             quality: Optional[int] = None,
+                             optimize_for_speed: Optional[bool] = None) -> Tuple[bytes, Dict[str, int]]:
+    """
+    Captura a página e devolve os bytes da imagem codificada.
+
+    Com recorte ativo, a imagem cobre apenas a caixa do post/conversa
+    (mais a margem). O backend 'cdp' chama Page.captureScreenshot
+    diretamente, permitindo PNG/JPEG/WebP, qualidade e a flag de
+    codificação otimizada para velocidade; o backend 'playwright' usa
+    page.screenshot(). Parâmetros None usam os valores de config.py.
+
+    Args:
+        page (Page): Página do Playwright com o template já preenchido
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        clip (bool, optional): Se True, recorta a captura no contêiner
+        padding (int, optional): Margem em pixels em volta do contêiner
+        backend (str, optional): 'cdp' ou 'playwright'
+        fmt (str, optional): 'png', 'jpeg' ou 'webp'
+        quality (int, optional): Qualidade para jpeg/webp (0-100)
+        optimize_for_speed (bool, optional): Codificação rápida (somente CDP)
+
+    Returns:
+        Tuple[bytes, Dict[str, int]]: Bytes da imagem e caixa efetivamente
+                                      capturada ({'x', 'y', 'width', 'height'})
+
+    Exemplo:
+        async def exemplo():
+            data, box = await capture_screenshot(page, 'twitter', fmt='webp', quality=80)
+            print(len(data), box['height'])  # 18342 214
+    """
+    clip = config.CLIP_TO_CONTAINER if clip is None else clip
+
+    box = await get_clip_box(page, platform, padding) if clip else None
+    data = await capture_region(page, box, backend, fmt, quality, optimize_for_speed)
+
+    if box is None:
+        viewport = page.viewport_size or VIEWPORT
+        box = {'x': 0, 'y': 0, 'width': viewport['width'], 'height': viewport['height']}
+
+    return data, box
+
+
+async def capture_to_file(page: Page, platform: str, filename: str, **options) -> Dict[str, int]:
+    """
+    Captura a página e grava a imagem no caminho indicado.
+
+    Args:
+        page (Page): Página do Playwright com o template já preenchido
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        filename (str): Caminho onde salvar o screenshot
+        **options: Mesmas opções de capture_screenshot() (clip, fmt, quality...)
+
+    Returns:
+        Dict[str, int]: Caixa efetivamente capturada ({'x', 'y', 'width', 'height'}),
+                        registrada depois no labels.csv
+
+    Exemplo:
+        async def exemplo():
+            box = await capture_to_file(page, 'instagram', 'insta_001.png')
+            print(box['width'], box['height'])  # 470 742
+    """
+    data, box = await capture_screenshot(page, platform, **options)
+    Path(filename).write_bytes(data)
+    return box
+
+
+def clip_label_fields(box: Dict[str, int]) -> Dict[str, int]:
+    """
+    Converte a caixa de recorte nas colunas correspondentes do labels.csv.
+
+    Args:
+        box (Dict[str, int]): Caixa retornada por capture_to_file()
+
+    Returns:
+        Dict[str, int]: Colunas 'clip_x', 'clip_y', 'clip_width' e 'clip_height'
+
+    Exemplo:
+        >>> clip_label_fields({'x': 66, 'y': 20, 'width': 468, 'height': 700})
+        {'clip_x': 66, 'clip_y': 20, 'clip_width': 468, 'clip_height': 700}
+    """
+    return {
+        'clip_x': box['x'],
+        'clip_y': box['y'],
+        'clip_width': box['width'],
+        'clip_height': box['height'],
+    }
+
+
+async def measure_layout(page: Page, platform: str, box: Optional[Dict[str, int]]) -> Dict[str, List[List[int]]]:
+    """
+    Mede as caixas dos elementos de LAYOUT_SELECTORS relativas à imagem capturada.
+
+    As caixas são arredondadas para fora (pixels inteiros que cobrem o
+    elemento) e deslocadas pela origem do recorte, de modo que apontam
+    diretamente para os pixels do arquivo salvo. Elementos ocultos (por
+    exemplo o selo de verificado de uma conta não verificada) ficam com
+    lista vazia.
+
+    Args:
+        page (Page): Página com o template preenchido (depois da captura)
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        box (Dict[str, int], optional): Caixa retornada por capture_to_file()
+                                        (None = página inteira)
+
+    Returns:
+        Dict[str, List[List[int]]]: {nome: [[x, y, largura, altura], ...]}
+
+    Exemplo:
+        async def exemplo():
+            box = await capture_to_file(page, 'twitter', 'tweet.png')
+            layout = await measure_layout(page, 'twitter', box)
+            print(layout['likeCount'])  # [[249, 100, 29, 18]]
+    """
+    rects = await page.evaluate(MEASURE_LAYOUT_JS, LAYOUT_SELECTORS[platform])
+    return offset_layout(rects, box)
+
+
+def offset_layout(rects: Dict[str, List[List[float]]], box: Optional[Dict[str, int]]) -> Dict[str, List[List[int]]]:
+    """
+    Arredonda para fora as caixas medidas na página e as desloca pela origem do recorte.
+
+    Args:
+        rects (Dict[str, List[List[float]]]): {nome: [[x, y, largura, altura], ...]} em
+                                              coordenadas da página
+        box (Dict[str, int], optional): Caixa de recorte (None = página inteira)
+
+    Returns:
+        Dict[str, List[List[int]]]: {nome: [[x, y, largura, altura], ...]} em pixels da imagem
+
+    Exemplo:
+        >>> offset_layout({'likeCount': [[260.4, 118.2, 28.1, 17.5]]}, {'x': 11, 'y': 18})
+        {'likeCount': [[249, 100, 29, 18]]}
+    """
+    origin_x, origin_y = (box['x'], box['y']) if box else (0, 0)
+
+    layout = {}
+    for name, items in rects.items():
+        layout[name] = []
+        for x, y, width, height in items:
+            left, top = math.floor(x) - origin_x, math.floor(y) - origin_y
+            right, bottom = math.ceil(x + width) - origin_x, math.ceil(y + height) - origin_y
+            layout[name].append([left, top, right - left, bottom - top])
+    return layout
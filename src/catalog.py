@@ -0,0 +1,395 @@
+"""
+Catálogo SQLite do dataset, com índices para consultas rápidas de subconjuntos
+"""
+
+import csv
+import hashlib
+import json
+import sqlite3
+import time
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+from .config import (
+    DATASET_DIR,
+    LABELS_PATH,
+    CATALOG_PATH,
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    TEMPLATES_DIR,
+    TEMPLATE_FILES
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    class TEXT NOT NULL,
+    manipulation_type TEXT NOT NULL,
+    original_filename TEXT NOT NULL,
+    social_network TEXT NOT NULL,
+    parent_id INTEGER REFERENCES images(id),
+    sha256 TEXT,
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER,
+    clip_x INTEGER,
+    clip_y INTEGER,
+    clip_width INTEGER,
+    clip_height INTEGER,
+    spec TEXT,
+    template_hash TEXT,
+    spec_hash TEXT,
+    layout TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_images_network_type ON images(social_network, manipulation_type);
+CREATE INDEX IF NOT EXISTS idx_images_type ON images(manipulation_type);
+CREATE INDEX IF NOT EXISTS idx_images_original ON images(original_filename);
+CREATE INDEX IF NOT EXISTS idx_images_parent ON images(parent_id);
+"""
+
+# Colunas gravadas a partir de cada registro (as demais são calculadas)
+RECORD_COLUMNS = [
+    'filename', 'path', 'class', 'manipulation_type', 'original_filename',
+    'social_network', 'sha256', 'width', 'height', 'bytes',
+    'clip_x', 'clip_y', 'clip_width', 'clip_height', 'spec',
+    'template_hash', 'spec_hash', 'layout', 'updated_at',
+]
+
+# Colunas que só a renderização conhece: registros sem essas chaves (por exemplo,
+# importados de um labels.csv) mantêm o valor já catalogado em vez de apagá-lo
+RENDER_COLUMNS = ('spec', 'template_hash', 'spec_hash', 'layout')
+
+
+@lru_cache(maxsize=None)
+def _upsert_sql(keep: Tuple[str, ...] = ()) -> str:
+    """
+    INSERT ... ON CONFLICT que atualiza todas as colunas, menos as de `keep`.
+    """
+    updates = [f"{column} = excluded.{column}" for column in RECORD_COLUMNS
+               if column != 'filename' and column not in keep]
+    return f"""
+INSERT INTO images ({', '.join(RECORD_COLUMNS)})
+VALUES ({', '.join(':' + column for column in RECORD_COLUMNS)})
+ON CONFLICT(filename) DO UPDATE SET
+    {', '.join(updates)}
+"""
+
+
+# Liga cada manipulado ao seu autêntico (o pai pode ter sido inserido depois do filho)
+LINK_PARENTS_SQL = """
+UPDATE images
+SET parent_id = (SELECT parent.id FROM images AS parent
+                 WHERE parent.filename = images.original_filename)
+WHERE class = 'manipulado' AND parent_id IS NULL
+"""
+
+
+def open_catalog(path: Path = CATALOG_PATH) -> sqlite3.Connection:
+    """
+    Abre (criando se necessário) o catálogo SQLite do dataset.
+
+    Args:
+        path (Path): Caminho do arquivo do catálogo
+
+    Returns:
+        sqlite3.Connection: Conexão com row_factory = sqlite3.Row
+
+    Exemplo:
+        >>> conn = open_catalog()
+        >>> len(query_images(conn, social_network='twitter'))
+        80
+    """
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def template_hash(platform: str) -> str:
+    """
+    Checksum SHA-256 do conteúdo do template de uma plataforma.
+
+    Args:
+        platform (str): Nome da plataforma
+
+    Returns:
+        str: Hash hexadecimal do arquivo em TEMPLATES_DIR
+    """
+    return hashlib.sha256((TEMPLATES_DIR / TEMPLATE_FILES[platform]).read_bytes()).hexdigest()
+
+
+def spec_hash(spec: Dict) -> str:
+    """
+    Checksum SHA-256 dos dados (spec) de um post, independente da ordem das chaves.
+
+    Args:
+        spec (Dict): Dados usados na renderização
+
+    Returns:
+        str: Hash hexadecimal do JSON canônico do spec
+    """
+    canonical = json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def describe_image(path: Path) -> Dict:
+    """
+    Calcula checksum, dimensões e tamanho em bytes de uma imagem.
+
+    Args:
+        path (Path): Caminho da imagem
+
+    Returns:
+        Dict: {'sha256', 'width', 'height', 'bytes'}
+    """
+    data = Path(path).read_bytes()
+    with Image.open(path) as image:
+        width, height = image.size
+
+    return {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'width': width,
+        'height': height,
+        'bytes': len(data),
+    }
+
+
+def job_record(job: Dict, row: Dict) -> Dict:
+    """
+    Monta o registro do catálogo de um job renderizado.
+
+    O registro guarda também o hash do template e do spec que produziram
+    a imagem, usados pelo rebuild incremental, e as caixas dos elementos
+    medidas na renderização ('layout'), usadas pelas manipulações em pixels.
+    Se o job já trouxer o hash do template lido antes da renderização
+    ('template_hash'), ele é usado.
+
+    Args:
+        job (Dict): Job retornado por plan_jobs()
+        row (Dict): Linha do labels.csv retornada por render_job()
+
+    Returns:
+        Dict: Registro com as colunas do labels.csv, 'path', 'spec' (dados do post),
+              'template_hash', 'spec_hash' e 'layout'
+    """
+    return {
+        **row,
+        'path': job['path'],
+        'spec': job['data'],
+        'template_hash': job.get('template_hash') or template_hash(job['platform']),
+        'spec_hash': spec_hash(job['data']),
+        'layout': job.get('layout'),
+    }
+
+
+def upsert_images(conn: sqlite3.Connection, records: Iterable[Dict]) -> int:
+    """
+    Insere ou atualiza imagens no catálogo, incrementalmente.
+
+    Para cada registro, lê o arquivo da imagem para calcular checksum e
+    dimensões, grava os dados (spec) em JSON e liga os manipulados aos
+    respectivos autênticos (parent_id). Colunas de RENDER_COLUMNS ausentes
+    do registro (não None: ausentes) preservam o valor já catalogado.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        records (Iterable[Dict]): Registros com as colunas do labels.csv e 'path'
+                                  (opcionalmente 'spec', 'clip_*', 'template_hash',
+                                  'spec_hash' e 'layout')
+
+    Returns:
+        int: Quantidade de registros gravados
+
+    Exemplo:
+        >>> rows = [job_record(job, row) for job, row in zip(jobs, rows)]
+        >>> upsert_images(conn, rows)
+        4
+    """
+    now = time.time()
+    groups = defaultdict(list)
+
+    for record in records:
+        path = Path(record['path'])
+        entry = {column: record.get(column) for column in RECORD_COLUMNS}
+        entry.update(describe_image(path))
+        entry['path'] = _catalog_path(path)
+        entry['spec'] = json.dumps(record['spec'], ensure_ascii=False) if record.get('spec') is not None else None
+        entry['layout'] = json.dumps(record['layout']) if record.get('layout') is not None else None
+        entry['updated_at'] = now
+        groups[tuple(column for column in RENDER_COLUMNS if column not in record)].append(entry)
+
+    with conn:
+        for keep, params in groups.items():
+            conn.executemany(_upsert_sql(keep), params)
+        conn.execute(LINK_PARENTS_SQL)
+
+    return sum(len(params) for params in groups.values())
+
+
+def label_path(label: Dict, authentic_dir: Path = AUTHENTIC_DIR,
+               manipulated_dir: Path = MANIPULATED_DIR) -> Path:
+    """
+    Caminho da imagem de uma linha do labels.csv: autenticos/ ou manipulados/
+    de acordo com a classe.
+
+    Args:
+        label (Dict): Linha do labels.csv (usa 'class' e 'filename')
+        authentic_dir (Path): Pasta dos autênticos
+        manipulated_dir (Path): Pasta dos manipulados
+
+    Returns:
+        Path: Caminho da imagem
+
+    Exemplo:
+        >>> label_path({'class': 'manipulado', 'filename': 'twitter_000_manip_1.png'})
+        PosixPath('.../dataset/manipulados/twitter_000_manip_1.png')
+    """
+    folder = authentic_dir if label['class'] == 'autentico' else manipulated_dir
+    return folder / label['filename']
+
+
+def import_labels(conn: sqlite3.Connection, labels_path: Path = LABELS_PATH) -> int:
+    """
+    Popula o catálogo a partir de um labels.csv existente.
+
+    O arquivo é lido em streaming; as imagens são procuradas em
+    autenticos/ ou manipulados/ de acordo com a classe.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        labels_path (Path): Caminho do labels.csv
+
+    Returns:
+        int: Quantidade de imagens catalogadas
+    """
+    def records():
+        with open(labels_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield {**row, 'path': label_path(row)}
+
+    total = 0
+    batch = []
+    for record in records():
+        batch.append(record)
+        if len(batch) == 1000:
+            total += upsert_images(conn, batch)
+            batch = []
+    if batch:
+        total += upsert_images(conn, batch)
+    return total
+
+
+def refresh_images(conn: sqlite3.Connection, paths: Iterable[Path]) -> int:
+    """
+    Atualiza checksum, dimensões e tamanho de imagens já catalogadas cujo arquivo foi regravado.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        paths (Iterable[Path]): Arquivos regravados (identificados pelo nome)
+
+    Returns:
+        int: Quantidade de imagens atualizadas no catálogo
+    """
+    now = time.time()
+    params = [{**describe_image(Path(path)), 'filename': Path(path).name, 'updated_at': now} for path in paths]
+    with conn:
+        cursor = conn.executemany(
+            "UPDATE images SET sha256 = :sha256, width = :width, height = :height, bytes = :bytes, "
+            "updated_at = :updated_at WHERE filename = :filename",
+            params
+        )
+    return cursor.rowcount
+
+
+def query_images(conn: sqlite3.Connection,
+                 social_network: Optional[str] = None,
+                 manipulation_type: Optional[str] = None,
+                 original_filename: Optional[str] = None,
+                 image_class: Optional[str] = None,
+                 limit: Optional[int] = None) -> List[Dict]:
+    """
+    Seleciona um subconjunto do dataset usando os índices do catálogo.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        social_network (str, optional): Filtra por rede social
+        manipulation_type (str, optional): Filtra por tipo de manipulação
+        original_filename (str, optional): Filtra pelo autêntico de origem
+        image_class (str, optional): 'autentico' ou 'manipulado'
+        limit (int, optional): Máximo de linhas retornadas
+
+    Returns:
+        List[Dict]: Registros do catálogo (com 'spec' e 'layout' já decodificados)
+
+    Exemplo:
+        >>> rows = query_images(conn, social_network='instagram', manipulation_type='caption_change')
+        >>> rows[0]['filename']
+        'instagram_000_manip_2.png'
+    """
+    filters = {
+        'social_network': social_network,
+        'manipulation_type': manipulation_type,
+        'original_filename': original_filename,
+        'class': image_class,
+    }
+    where = [f"{column} = ?" for column, value in filters.items() if value is not None]
+    args = [value for value in filters.values() if value is not None]
+
+    sql = "SELECT * FROM images"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        args.append(limit)
+
+    return [_row_to_dict(row) for row in conn.execute(sql, args)]
+
+
+def get_manipulations(conn: sqlite3.Connection, original_filename: str) -> List[Dict]:
+    """
+    Retorna as versões manipuladas de um post autêntico (filhos no catálogo).
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        original_filename (str): Nome do arquivo autêntico
+
+    Returns:
+        List[Dict]: Registros dos manipulados ligados ao autêntico
+    """
+    sql = """
+        SELECT child.* FROM images AS child
+        JOIN images AS parent ON child.parent_id = parent.id
+        WHERE parent.filename = ?
+        ORDER BY child.id
+    """
+    return [_row_to_dict(row) for row in conn.execute(sql, (original_filename,))]
+
+
+def _catalog_path(path: Path) -> str:
+    """
+    Caminho gravado no catálogo: relativo a DATASET_DIR quando possível.
+    """
+    try:
+        return path.resolve().relative_to(DATASET_DIR.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict:
+    """
+    Converte uma linha do SQLite em dicionário, decodificando spec e layout (JSON).
+    """
+    record = dict(row)
+    for column in ('spec', 'layout'):
+        if record.get(column):
+            record[column] = json.loads(record[column])
+    return record
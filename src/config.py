@@ -23,6 +23,17 @@ TEMPLATES_DIR = PROJECT_ROOT / "templates"  # Templates na raiz
 DATASET_DIR = SRC_DIR / "dataset"  # Dataset dentro de src/
 AUTHENTIC_DIR = DATASET_DIR / "autenticos"
 MANIPULATED_DIR = DATASET_DIR / "manipulados"
+LABELS_PATH = DATASET_DIR / "labels.csv"
+CATALOG_PATH = DATASET_DIR / "catalog.sqlite"  # Catálogo indexado do dataset
+DELTA_DIR = DATASET_DIR / "manipulados_delta"  # Manipulados armazenados como diferença do autêntico
+FORENSICS_DIR = DATASET_DIR / "forensics"  # Mapas forenses (ELA, ruído, bordas) de cada imagem
+INDEX_DIR = DATASET_DIR / "nn_index"  # Índice de vizinhos mais próximos (embeddings)
+DETECTOR_PATH = DATASET_DIR / "detector.npz"  # Modelo de detecção treinado a partir do labels.csv
+FEATURES_CACHE_PATH = DATASET_DIR / "features_cache.npz"  # Características das imagens (por caminho, mtime e tamanho)
+AUDIT_REPORT_PATH = DATASET_DIR / "audit.json"  # Relatório da auditoria de integridade
+AUDIT_REPAIRS_PATH = DATASET_DIR / "audit_repairs.csv"  # Correções sugeridas pela auditoria
+ASSETS_DIR = DATASET_DIR / "assets"  # Pool de imagens procedurais (posts e avatares)
+LONG_THREADS_DIR = DATASET_DIR / "conversas_longas"  # Blocos (e imagens costuradas) das conversas longas
 
 # Criar diretórios se não existirem
 AUTHENTIC_DIR.mkdir(parents=True, exist_ok=True)
@@ -32,6 +43,189 @@ MANIPULATED_DIR.mkdir(parents=True, exist_ok=True)
 POSTS_PER_PLATFORM = 20
 MANIPULATIONS_PER_POST = 3
 
+# Captura
+VIEWPORT = {'width': 600, 'height': 800}
+
+# Recorta cada captura para o contêiner do post/conversa em vez do viewport inteiro
+CLIP_TO_CONTAINER = True
+CLIP_PADDING = 0  # Margem fixa (px) ao redor do contêiner
+
+# Backend de captura: 'cdp' chama Page.captureScreenshot direto numa sessão CDP
+# (retorna os bytes da imagem); 'playwright' usa page.screenshot()
+CAPTURE_BACKEND = 'cdp'
+CAPTURE_FORMAT = 'png'  # 'png', 'jpeg' ou 'webp'
+CAPTURE_QUALITY = 90  # Qualidade para jpeg/webp (0-100)
+CAPTURE_OPTIMIZE_FOR_SPEED = True  # Codificação otimizada para velocidade (somente CDP)
+PLAYWRIGHT_FORMATS = ['png', 'jpeg']  # page.screenshot() não gera webp (só o backend 'cdp')
+
+# Extensão dos arquivos para cada formato de captura
+FORMAT_EXTENSIONS = {
+    'png': '.png',
+    'jpeg': '.jpg',
+    'webp': '.webp',
+}
+
+# Arquivo de template de cada plataforma (em TEMPLATES_DIR)
+TEMPLATE_FILES = {
+    'twitter': 'twitter.html',
+    'instagram': 'instagram.html',
+    'whatsapp': 'whatsapp.html',
+}
+
+# Seletor do contêiner principal de cada template
+CONTAINER_SELECTORS = {
+    'twitter': '.tweet-container',
+    'instagram': '.post-container',
+    'whatsapp': '.whatsapp-container',
+}
+
+# Tipos de manipulação aplicados a cada post autêntico, por plataforma
+MANIPULATION_TYPES = {
+    'twitter': ['metrics_change', 'text_change', 'verification_change'],
+    'instagram': ['metrics_change', 'caption_change', 'verification_change'],
+    'whatsapp': ['time_change', 'message_change', 'contact_change'],
+}
+
+# Manipulações em pixels (--pixel-forgeries): editam o PNG autêntico em vez de re-renderizar
+PIXEL_MANIPULATION_TYPES = {
+    'twitter': ['pixel_metrics_change', 'pixel_verification_change'],
+    'instagram': ['pixel_metrics_change', 'pixel_verification_change'],
+    'whatsapp': ['pixel_time_change', 'pixel_contact_change'],
+}
+
+# Elementos cujas caixas são medidas na renderização (catálogo, coluna 'layout')
+# e usadas como alvo das manipulações em pixels
+LAYOUT_SELECTORS = {
+    'twitter': {
+        'displayName': '#displayName',
+        'verifiedBadge': '#verifiedBadge',
+        'timestamp': '#timestamp',
+        'retweetCount': '#retweetCount',
+        'quoteCount': '#quoteCount',
+        'likeCount': '#likeCount',
+        'viewCount': '#viewCount',
+        'retweetActionCount': '#retweetActionCount',
+        'likeActionCount': '#likeActionCount',
+        'viewActionCount': '#viewActionCount',
+    },
+    'instagram': {
+        'username': '#username',
+        'verifiedBadge': '#verifiedBadge',
+        'likeCount': '#likeCount',
+    },
+    'whatsapp': {
+        'contactName': '#contactName',
+        'messageTimes': '.message-time',
+    },
+}
+
+# Fontes tentadas ao redesenhar texto (fallback: fonte padrão do Pillow)
+FORGERY_FONTS = ['DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf']
+FORGERY_BOLD_FONTS = ['DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf', 'Arial Bold.ttf']
+
+# Renderização em grade: K posts do mesmo template numa única página,
+# capturados de uma vez e recortados com Pillow (1 = desativado)
+GRID_BATCH_SIZE = 1
+GRID_COLUMNS = 4
+
+# Conversas longas do WhatsApp (python main.py --long-threads)
+LONG_THREAD_COUNT = 5  # Conversas geradas
+LONG_THREAD_MESSAGES = 300  # Mensagens por conversa
+THREAD_CHUNK_SIZE = 40  # Mensagens inseridas no DOM por chamada
+
+# Variantes de tema/escala/largura capturadas de cada post sem navegar de novo
+# (python main.py --variants). O primeiro valor de cada lista é o visual base,
+# gravado com o nome de arquivo normal; 'dark' é o tema original dos templates
+VARIANT_THEMES = ['dark', 'light']
+VARIANT_SCALES = ['normal', 'large']  # Classes scale-* dos templates: small, large, xlarge
+VARIANT_WIDTHS = [VIEWPORT['width'], 390]  # Largura do viewport (390 = celular)
+
+# Armazenamento delta: tamanho (px) dos blocos usados para detectar as regiões alteradas
+DELTA_TILE = 16
+
+# Otimização sem perdas dos PNGs (python main.py --optimize-png): combinações testadas por imagem
+PNG_OPTIMIZE_FILTERS = ['none', 'sub', 'up', 'average', 'paeth', 'adaptive']
+PNG_OPTIMIZE_STRATEGIES = ['default', 'filtered']
+
+# Mapas forenses
+ELA_JPEG_QUALITY = 90  # Qualidade do JPEG re-salvo na error-level analysis
+FORENSICS_STACK_SIZE = 8  # Imagens processadas juntas por tarefa
+FORENSICS_BUCKET = 64  # Pilhas preenchidas até altura/largura múltipla deste valor (px)
+FORENSICS_DTYPE = 'uint8'  # 'uint8' (quantizado) ou 'float16'
+
+# Cache de imagens decodificadas em memória compartilhada (loaders com vários processos)
+IMAGE_CACHE_BUDGET_MB = 1024
+
+# Auditoria de integridade (python main.py --audit): arquivos conferidos por tarefa do pool
+AUDIT_CHUNK_SIZE = 32
+
+# Loader de pares/trios (autêntico, manipulado) para detectores siameses
+PAIR_PREFETCH = 32  # Amostras decodificadas antecipadamente
+PAIR_WORKERS = 4  # Threads de decodificação
+
+# Índice de vizinhos mais próximos (rastreio da origem de uma imagem suspeita)
+EMBED_SIZE = 16  # Lado da miniatura RGB da imagem inteira (16x16x3 = 768 dimensões)
+EMBED_BAND = (112, 14)  # Faixa do cabeçalho em alta resolução, colunas x linhas (112x14x3 = 4704 dimensões)
+EMBED_BAND_HEIGHT = 0.12  # Altura da faixa do cabeçalho, em fração da largura da imagem
+EMBED_BAND_WEIGHT = 0.85  # Peso da faixa no cosseno (a miniatura fica com o restante)
+INDEX_BLOCK_SIZE = 65536  # Linhas do índice por bloco na busca exata
+INDEX_PROBES = 8  # Listas do quantizador grosso visitadas por consulta
+TRACE_EXACT_SCORE = 0.9999  # Cosseno a partir do qual o vizinho mais próximo é a própria imagem
+
+# Geração adaptativa (python main.py --adaptive): rodadas guiadas pelo erro de um classificador base
+ADAPTIVE_ROUNDS = 3
+ADAPTIVE_BUDGET = 300  # Imagens renderizadas no total, somando todas as rodadas
+ADAPTIVE_MANIPULATIONS_PER_POST = 2
+ADAPTIVE_MIN_WEIGHT = 0.05  # Peso mínimo de cada fatia (plataforma, tipo) no replanejamento
+ADAPTIVE_SUBTLE_FACTOR = (0.02, 0.15)  # |fator - 1| das alterações de métricas sutis
+ADAPTIVE_CV_FOLDS = 5
+
+# Validação cruzada dos modelos base (python main.py --evaluate)
+EVAL_FOLDS = 5  # Folds externos (estimativa reportada)
+EVAL_INNER_FOLDS = 4  # Folds internos, dentro do treino de cada fold externo (escolha dos hiperparâmetros)
+EVAL_MODEL_GRIDS = {
+    'knn': {'n_neighbors': [1, 3, 5, 9], 'weights': ['uniform', 'distance']},
+    'svm': {'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf']},
+    'tree': {'max_depth': [4, 8, 16, None], 'min_samples_leaf': [1, 5]},
+}
+
+# Serviço de detecção (python main.py --serve)
+SCORING_HOST = '127.0.0.1'
+SCORING_PORT = 8765
+SCORING_MAX_BATCH = 32  # Imagens por chamada de inferência
+SCORING_MAX_WAIT_MS = 5  # Espera máxima para completar um micro-lote
+SCORING_CACHE_SIZE = 4096  # Vetores de características mantidos em cache (por conteúdo)
+SCORING_STATS_WINDOW = 10000  # Requisições recentes usadas nos percentis de latência
+
+# Pool de imagens procedurais (python main.py --build-assets)
+ASSET_POOL_SIZES = {'post': 256, 'avatar': 256}  # Imagens distintas de cada tipo (posts além disso repetem, com aviso)
+ASSET_IMAGE_SIZES = {'post': 640, 'avatar': 128}  # Lado em pixels (2x o tamanho exibido)
+ASSET_JPEG_QUALITY = 88
+AVATAR_PHOTO_RATE = 0.85  # Fração de perfis com foto (o restante usa cor + iniciais)
+
+# Geração intercalada: labels.csv parcial publicado a cada N imagens (0 = só no final)
+LABEL_SNAPSHOT_EVERY = 50
+
+# Concorrência: páginas renderizando ao mesmo tempo
+CONCURRENCY = 1
+
+# Autotune da concorrência (python main.py --autotune)
+AUTOTUNE_MAX_CONCURRENCY = 16
+AUTOTUNE_WINDOW = 24  # Imagens por janela de medição
+AUTOTUNE_MIN_GAIN = 0.05  # Ganho mínimo de imagens/s para continuar subindo
+AUTOTUNE_MAX_LOOP_LAG_MS = 250  # Atraso máximo aceitável do event loop
+AUTOTUNE_MIN_FREE_MEMORY_MB = 512  # Memória livre mínima do host
+AUTOTUNE_STATE_PATH = PROJECT_ROOT / ".autotune.json"  # Concorrência escolhida por host/template
+
+# Planejamento (python main.py --dry-run): calibração com renderizações de amostra no host
+PLANNER_SAMPLE_POSTS = 2  # Posts (autêntico + manipulados) por plataforma em cada modo de captura
+PLANNER_CONCURRENCY_LEVELS = [1, 2, 4, 8]  # Níveis medidos na curva vazão x concorrência
+PLANNER_FORMATS = ['png', 'jpeg', 'webp']  # Formatos comparados nas sugestões (sem webp no backend 'playwright')
+PLANNER_CALIBRATION_PATH = PROJECT_ROOT / ".planner.json"  # Última calibração por host e configuração
+
+# Modo watch (python main.py --watch): intervalo de verificação de templates/
+WATCH_INTERVAL = 0.5  # segundos
+
 # Textos realistas para tweets
 REAL_TWEETS = [
     "Acabei de assistir esse filme e não consigo parar de pensar nele. Simplesmente incrível!",
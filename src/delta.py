@@ -0,0 +1,320 @@
+"""
+Armazenamento delta dos manipulados: apenas os retângulos alterados + referência ao autêntico
+"""
+
+import csv
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+from PIL import Image
+from .config import (
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    LABELS_PATH,
+    DELTA_DIR,
+    DELTA_TILE
+)
+
+
+DELTA_SUFFIX = ".delta.npz"
+
+
+def load_array(path: Path) -> np.ndarray:
+    """
+    Decodifica uma imagem como array RGB uint8 (altura, largura, 3).
+
+    Args:
+        path (Path): Caminho da imagem
+
+    Returns:
+        np.ndarray: Pixels da imagem
+    """
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+@lru_cache(maxsize=64)
+def _cached_original(path: str) -> np.ndarray:
+    """
+    Autênticos decodificados recentemente (reaproveitados entre os 3 manipulados de cada post).
+    """
+    array = load_array(Path(path))
+    array.setflags(write=False)
+    return array
+
+
+def _align(base: np.ndarray, shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ajusta o autêntico ao tamanho do manipulado, alinhando pelo canto superior esquerdo.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Base no tamanho `shape` e máscara (H, W)
+                                       dos pixels que existem no autêntico
+    """
+    if base.shape == tuple(shape):
+        return base, np.ones(shape[:2], dtype=bool)
+
+    aligned = np.zeros(shape, dtype=np.uint8)
+    covered = np.zeros(shape[:2], dtype=bool)
+    h = min(base.shape[0], shape[0])
+    w = min(base.shape[1], shape[1])
+    aligned[:h, :w] = base[:h, :w]
+    covered[:h, :w] = True
+    return aligned, covered
+
+
+def changed_rectangles(original: np.ndarray, manipulated: np.ndarray, tile: int = DELTA_TILE) -> np.ndarray:
+    """
+    Encontra os retângulos que diferem entre o autêntico e o manipulado.
+
+    A comparação é feita em blocos de `tile` x `tile` pixels: blocos com
+    qualquer pixel diferente são marcados, agrupados em trechos contínuos
+    por linha de blocos e trechos iguais em linhas consecutivas são
+    fundidos num só retângulo. Tudo é feito com operações vetorizadas
+    do NumPy sobre a máscara de diferenças.
+
+    Args:
+        original (np.ndarray): Autêntico (H, W, 3), já alinhado ao manipulado
+        manipulated (np.ndarray): Manipulado (H, W, 3)
+        tile (int): Tamanho do bloco em pixels
+
+    Returns:
+        np.ndarray: Retângulos int32 (N, 4) no formato [y0, x0, y1, x1]
+
+    Exemplo:
+        >>> boxes = changed_rectangles(original, manipulated)
+        >>> boxes
+        array([[ 96,  80, 160, 496]], dtype=int32)
+    """
+    height, width = manipulated.shape[:2]
+    diff = (original != manipulated).any(axis=-1)
+
+    rows = -(-height // tile)
+    cols = -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:height, :width] = diff
+    tiles = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+    # Trechos contínuos de blocos alterados em cada linha de blocos
+    edges = np.diff(np.pad(tiles.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+
+    # Funde trechos com o mesmo intervalo de colunas em linhas consecutivas
+    boxes = []
+    open_runs = {}
+    for row, start, end in zip(run_rows, run_starts, run_ends):
+        key = (start, end)
+        current = open_runs.get(key)
+        if current is not None and current[2] == row:
+            current[2] = row + 1
+        else:
+            current = [row, start, row + 1, end]
+            boxes.append(current)
+            open_runs[key] = current
+
+    result = np.array(boxes, dtype=np.int32).reshape(-1, 4) * tile
+    result[:, 2] = np.minimum(result[:, 2], height)
+    result[:, 3] = np.minimum(result[:, 3], width)
+    return result
+
+
+def encode_delta(original: np.ndarray, manipulated: np.ndarray, tile: int = DELTA_TILE) -> Dict:
+    """
+    Codifica o manipulado como retângulos alterados em relação ao autêntico.
+
+    Se o manipulado tiver outro tamanho (o recorte muda quando o texto
+    quebra em mais linhas), o autêntico é alinhado pelo canto superior
+    esquerdo e a área sem correspondência entra inteira no delta.
+
+    Args:
+        original (np.ndarray): Autêntico (H, W, 3)
+        manipulated (np.ndarray): Manipulado (H', W', 3)
+        tile (int): Tamanho do bloco em pixels
+
+    Returns:
+        Dict: {'shape', 'boxes', 'pixels'} (pixels = retângulos concatenados e achatados)
+    """
+    base, covered = _align(original, manipulated.shape)
+    if not covered.all():
+        base = base.copy()
+        base[~covered] = ~manipulated[~covered]  # força diferença fora da área comum
+
+    boxes = changed_rectangles(base, manipulated, tile)
+    patches = [manipulated[y0:y1, x0:x1].reshape(-1) for y0, x0, y1, x1 in boxes]
+    pixels = np.concatenate(patches) if patches else np.zeros(0, dtype=np.uint8)
+
+    return {
+        'shape': np.array(manipulated.shape, dtype=np.int32),
+        'boxes': boxes,
+        'pixels': pixels,
+    }
+
+
+def apply_delta(original: np.ndarray, delta: Dict) -> np.ndarray:
+    """
+    Reconstrói o manipulado a partir do autêntico e do delta.
+
+    Args:
+        original (np.ndarray): Autêntico (H, W, 3)
+        delta (Dict): Retorno de encode_delta() ou load_delta()
+
+    Returns:
+        np.ndarray: Manipulado reconstruído (novo array, gravável)
+    """
+    shape = tuple(int(v) for v in delta['shape'])
+    base, _ = _align(original, shape)
+    image = base.copy()
+
+    offset = 0
+    pixels = delta['pixels']
+    for y0, x0, y1, x1 in delta['boxes']:
+        size = (y1 - y0) * (x1 - x0) * shape[2]
+        image[y0:y1, x0:x1] = pixels[offset:offset + size].reshape(y1 - y0, x1 - x0, shape[2])
+        offset += size
+    return image
+
+
+def delta_path(filename: str, delta_dir: Path = DELTA_DIR) -> Path:
+    """
+    Caminho do arquivo delta de um manipulado (ex: 'twitter_000_manip_1.delta.npz').
+    """
+    return delta_dir / (Path(filename).stem + DELTA_SUFFIX)
+
+
+def save_delta(path: Path, original_filename: str, delta: Dict) -> None:
+    """
+    Grava o delta comprimido (.npz) com a referência ao autêntico.
+
+    Args:
+        path (Path): Caminho de saída
+        original_filename (str): Nome do autêntico de origem
+        delta (Dict): Retorno de encode_delta()
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, original_filename=np.array(original_filename), **delta)
+
+
+def load_delta(path: Path) -> Dict:
+    """
+    Lê um arquivo delta.
+
+    Args:
+        path (Path): Caminho do .delta.npz
+
+    Returns:
+        Dict: {'original_filename', 'shape', 'boxes', 'pixels'}
+    """
+    with np.load(path) as f:
+        return {
+            'original_filename': str(f['original_filename']),
+            'shape': f['shape'],
+            'boxes': f['boxes'],
+            'pixels': f['pixels'],
+        }
+
+
+def reconstruct_image(path: Path, authentic_dir: Path = AUTHENTIC_DIR) -> np.ndarray:
+    """
+    Reconstrói o array completo de um manipulado armazenado como delta.
+
+    O autêntico decodificado fica em cache, então os manipulados de um
+    mesmo post são reconstruídos apenas copiando os retângulos alterados.
+
+    Args:
+        path (Path): Caminho do .delta.npz
+        authentic_dir (Path): Pasta dos autênticos
+
+    Returns:
+        np.ndarray: Pixels RGB (H, W, 3) do manipulado
+
+    Exemplo:
+        >>> image = reconstruct_image(DELTA_DIR / 'twitter_000_manip_1.delta.npz')
+        >>> image.shape
+        (800, 600, 3)
+    """
+    delta = load_delta(path)
+    original = _cached_original(str(authentic_dir / delta['original_filename']))
+    return apply_delta(original, delta)
+
+
+def _manipulated_rows(labels_path: Path) -> Iterator[Dict]:
+    """
+    Percorre as linhas de manipulados do labels.csv em streaming.
+    """
+    with open(labels_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['class'] == 'manipulado':
+                yield row
+
+
+def pack_manipulated(labels_path: Path = LABELS_PATH,
+                     manipulated_dir: Path = MANIPULATED_DIR,
+                     authentic_dir: Path = AUTHENTIC_DIR,
+                     delta_dir: Path = DELTA_DIR,
+                     tile: int = DELTA_TILE) -> Dict:
+    """
+    Converte todos os manipulados do dataset para o formato delta.
+
+    Cada delta é conferido na hora (a reconstrução tem que ser idêntica
+    ao PNG original) antes de ser contabilizado.
+
+    Args:
+        labels_path (Path): labels.csv do dataset
+        manipulated_dir (Path): Pasta dos PNGs manipulados
+        authentic_dir (Path): Pasta dos autênticos
+        delta_dir (Path): Pasta de saída dos deltas
+        tile (int): Tamanho do bloco em pixels
+
+    Returns:
+        Dict: {'images', 'png_bytes', 'delta_bytes'}
+
+    Raises:
+        ValueError: Se algum delta não reconstruir exatamente o manipulado
+    """
+    stats = {'images': 0, 'png_bytes': 0, 'delta_bytes': 0}
+
+    for row in _manipulated_rows(labels_path):
+        png_path = manipulated_dir / row['filename']
+        manipulated = load_array(png_path)
+        original = _cached_original(str(authentic_dir / row['original_filename']))
+
+        delta = encode_delta(original, manipulated, tile)
+        if not np.array_equal(apply_delta(original, delta), manipulated):
+            raise ValueError(f"Delta inconsistente para {row['filename']}")
+
+        out_path = delta_path(row['filename'], delta_dir)
+        save_delta(out_path, row['original_filename'], delta)
+
+        stats['images'] += 1
+        stats['png_bytes'] += png_path.stat().st_size
+        stats['delta_bytes'] += out_path.stat().st_size
+
+    return stats
+
+
+def export_pngs(out_dir: Path, delta_dir: Path = DELTA_DIR,
+                authentic_dir: Path = AUTHENTIC_DIR,
+                extension: Optional[str] = '.png') -> int:
+    """
+    Re-materializa os manipulados armazenados como delta em arquivos de imagem comuns.
+
+    Args:
+        out_dir (Path): Pasta de saída
+        delta_dir (Path): Pasta dos deltas
+        authentic_dir (Path): Pasta dos autênticos
+        extension (str): Extensão (formato) das imagens exportadas
+
+    Returns:
+        int: Quantidade de imagens exportadas
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for path in sorted(delta_dir.glob(f"*{DELTA_SUFFIX}")):
+        image = reconstruct_image(path, authentic_dir)
+        name = path.name[:-len(DELTA_SUFFIX)] + extension
+        Image.fromarray(image).save(out_dir / name)
+        total += 1
+    return total
@@ -0,0 +1,291 @@
+"""
+Validação cruzada aninhada e agrupada dos modelos base (KNN, SVM, árvore de decisão) em paralelo
+"""
+
+import csv
+import itertools
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sklearn.model_selection import GroupKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+from .config import LABELS_PATH, EVAL_FOLDS, EVAL_INNER_FOLDS, EVAL_MODEL_GRIDS
+from .features import dataset_features, load_feature_cache, save_feature_cache
+from .catalog import label_path
+from .pipeline import post_group
+
+
+# Matriz e alvo compartilhados por cada processo do pool (enviados uma vez, no initializer)
+_features: Optional[np.ndarray] = None
+_target: Optional[np.ndarray] = None
+
+
+def make_model(name: str, params: Dict):
+    """
+    Instancia um modelo base com os hiperparâmetros de uma combinação da grade.
+
+    KNN e SVM dependem de distâncias, então recebem as características
+    padronizadas; a árvore usa os valores brutos.
+
+    Args:
+        name (str): 'knn', 'svm' ou 'tree'
+        params (Dict): Hiperparâmetros do estimador
+
+    Returns:
+        Estimador do scikit-learn
+    """
+    if name == 'knn':
+        return make_pipeline(StandardScaler(), KNeighborsClassifier(**params))
+    if name == 'svm':
+        return make_pipeline(StandardScaler(), SVC(class_weight='balanced', **params))
+    if name == 'tree':
+        return DecisionTreeClassifier(class_weight='balanced', random_state=0, **params)
+    raise ValueError(f"Modelo desconhecido: {name}")
+
+
+def param_grid(grid: Dict[str, List]) -> List[Dict]:
+    """
+    Todas as combinações de uma grade {parâmetro: [valores]}.
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _init_worker(features: np.ndarray, target: np.ndarray) -> None:
+    global _features, _target
+    _features, _target = features, target
+
+
+def _fold_task(args: Tuple[str, Dict, np.ndarray, np.ndarray]) -> Dict:
+    """
+    Tarefa do pool: treina uma combinação num fold e prediz o fold de teste.
+    """
+    name, params, train, test = args
+    start = time.time()
+    model = make_model(name, params).fit(_features[train], _target[train])
+    fitted = time.time()
+    predicted = model.predict(_features[test])
+    end = time.time()
+    return {'test': test, 'predicted': predicted, 'start': start, 'end': end,
+            'fit_seconds': fitted - start, 'predict_seconds': end - fitted}
+
+
+def binary_metrics(truth: np.ndarray, predicted: np.ndarray) -> Dict:
+    """
+    Acurácia, acurácia balanceada, precisão, recall e F1 da classe manipulado (True).
+    """
+    tp = int(np.sum(truth & predicted))
+    fp = int(np.sum(~truth & predicted))
+    fn = int(np.sum(truth & ~predicted))
+    tn = int(np.sum(~truth & ~predicted))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        'count': int(len(truth)),
+        'accuracy': float(np.mean(truth == predicted)) if len(truth) else 0.0,
+        'balanced_accuracy': (recall + (tn / (tn + fp) if tn + fp else 0.0)) / 2,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def _breakdown(labels: Sequence[Dict], truth: np.ndarray, predicted: np.ndarray) -> Dict:
+    """
+    Métricas por plataforma e acerto por manipulation_type ('none' = autênticos reconhecidos).
+    """
+    platforms = defaultdict(list)
+    types = defaultdict(list)
+    for i, label in enumerate(labels):
+        platforms[label['social_network']].append(i)
+        types[label['manipulation_type']].append(i)
+    return {
+        'platforms': {name: binary_metrics(truth[idx], predicted[idx]) for name, idx in sorted(platforms.items())},
+        'types': {name: {'count': len(idx), 'accuracy': float(np.mean(truth[idx] == predicted[idx]))}
+                  for name, idx in sorted(types.items())},
+    }
+
+
+def _group_splits(indices: np.ndarray, groups: np.ndarray, folds: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Folds (treino, teste) agrupados por post sobre um subconjunto das linhas (índices globais).
+    """
+    n_splits = min(folds, len(set(groups[indices])))
+    return [(indices[train], indices[test])
+            for train, test in GroupKFold(n_splits=n_splits).split(indices, groups=groups[indices])]
+
+
+def _run_tasks(executor: ProcessPoolExecutor, tasks: List[Tuple]) -> Dict[Tuple, List[Dict]]:
+    """
+    Roda tarefas (modelo, parâmetros, treino, teste, fold externo) no pool e agrupa por (modelo, parâmetros, fold).
+    """
+    runs = defaultdict(list)
+    results = executor.map(_fold_task, [task[:4] for task in tasks])
+    for (name, params, _, _, outer), result in zip(tasks, results):
+        runs[(name, repr(params), outer)].append(result)
+    return runs
+
+
+def cross_validate_models(features: np.ndarray, labels: Sequence[Dict],
+                          grids: Dict[str, Dict[str, List]] = EVAL_MODEL_GRIDS,
+                          folds: int = EVAL_FOLDS, inner_folds: int = EVAL_INNER_FOLDS,
+                          workers: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Validação cruzada aninhada e agrupada de cada modelo, com busca na grade de hiperparâmetros.
+
+    Os folds agrupam pelo post de origem (original_filename, sem o sufixo
+    de variante), então um autêntico, seus manipulados e variantes nunca
+    ficam em lados diferentes. Em cada fold externo, a combinação com
+    maior acurácia balanceada é escolhida por uma validação cruzada
+    interna só com as linhas de treino (com 3 manipulados por autêntico,
+    o F1 premiaria "tudo é manipulado"); o modelo com essa combinação é
+    retreinado no treino externo e prediz o teste externo, que nunca
+    participou da escolha. As métricas reportadas vêm dessas predições;
+    o score da escolha (interno, otimista) fica separado, em 'selection'.
+    Todas as combinações e folds rodam num único pool de processos; a
+    matriz de características é enviada uma vez por processo.
+
+    Args:
+        features (np.ndarray): Matriz de características (dataset_features())
+        labels (Sequence[Dict]): Linhas do labels.csv, na ordem da matriz
+        grids (Dict[str, Dict[str, List]]): Grade de hiperparâmetros de cada modelo
+        folds (int): Máximo de folds externos
+        inner_folds (int): Máximo de folds internos (escolha dos hiperparâmetros)
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+
+    Returns:
+        Dict[str, Dict]: Por modelo: {'params' (combinação mais escolhida), 'fold_params'
+                         (escolha de cada fold externo), 'selection' (acurácia balanceada
+                         interna média da escolha), 'overall', 'platforms', 'types',
+                         'grid' (acurácia balanceada interna média de cada combinação),
+                         'wall_seconds', 'fit_seconds', 'predict_seconds'}
+
+    Exemplo:
+        >>> report = cross_validate_models(X, labels, workers=8)
+        >>> report['svm']['params'], round(report['svm']['overall']['balanced_accuracy'], 3)
+        ({'C': 1, 'kernel': 'linear'}, 0.492)
+    """
+    target = np.array([label['class'] == 'manipulado' for label in labels])
+    groups = np.array([post_group(label) for label in labels])
+    outer = _group_splits(np.arange(len(labels)), groups, folds)
+
+    combos = [(name, params) for name, grid in grids.items() for params in param_grid(grid)]
+    inner_tasks = [(name, params, train, test, fold)
+                   for fold, (outer_train, _) in enumerate(outer)
+                   for train, test in _group_splits(outer_train, groups, inner_folds)
+                   for name, params in combos]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(features, target)) as executor:
+        inner_runs = _run_tasks(executor, inner_tasks)
+
+        # Escolha por fold externo: acurácia balanceada das predições internas sobre o treino externo
+        scores = {}
+        for name, params in combos:
+            for fold, (outer_train, _) in enumerate(outer):
+                predicted = np.zeros_like(target)
+                for result in inner_runs[(name, repr(params), fold)]:
+                    predicted[result['test']] = result['predicted']
+                scores[(name, repr(params), fold)] = binary_metrics(
+                    target[outer_train], predicted[outer_train])['balanced_accuracy']
+
+        chosen = {}
+        for name in grids:
+            for fold in range(len(outer)):
+                chosen[(name, fold)] = max(param_grid(grids[name]),
+                                           key=lambda params: scores[(name, repr(params), fold)])
+
+        outer_runs = _run_tasks(executor, [(name, chosen[(name, fold)], train, test, fold)
+                                           for name in grids for fold, (train, test) in enumerate(outer)])
+
+    report = {}
+    for name in grids:
+        fold_params = [chosen[(name, fold)] for fold in range(len(outer))]
+        predicted = np.zeros_like(target)
+        for fold, params in enumerate(fold_params):
+            for result in outer_runs[(name, repr(params), fold)]:
+                predicted[result['test']] = result['predicted']
+
+        model_runs = [result for runs in (inner_runs, outer_runs)
+                      for key, results in runs.items() if key[0] == name for result in results]
+        report[name] = {
+            'params': max(fold_params, key=lambda params: fold_params.count(params)),
+            'fold_params': fold_params,
+            'selection': float(np.mean([scores[(name, repr(params), fold)]
+                                        for fold, params in enumerate(fold_params)])),
+            'overall': binary_metrics(target, predicted),
+            **_breakdown(labels, target, predicted),
+            'grid': [{'params': params,
+                      'balanced_accuracy': float(np.mean([scores[(name, repr(params), fold)]
+                                                          for fold in range(len(outer))]))}
+                     for params in param_grid(grids[name])],
+            'wall_seconds': max(r['end'] for r in model_runs) - min(r['start'] for r in model_runs),
+            'fit_seconds': sum(r['fit_seconds'] for r in model_runs),
+            'predict_seconds': sum(r['predict_seconds'] for r in model_runs),
+        }
+    return report
+
+
+def evaluate_baselines(labels_path: Path = LABELS_PATH, workers: Optional[int] = None,
+                       grids: Dict[str, Dict[str, List]] = EVAL_MODEL_GRIDS,
+                       folds: int = EVAL_FOLDS,
+                       inner_folds: int = EVAL_INNER_FOLDS) -> Tuple[Dict[str, Dict], int]:
+    """
+    Carrega (ou calcula) as características do dataset e avalia os modelos base.
+
+    As características ficam no cache em disco de features.py, então só
+    as imagens novas ou alteradas são recalculadas entre execuções.
+
+    Args:
+        labels_path (Path): Caminho do labels.csv
+        workers (int, optional): Processos dos pools de características e de treino
+        grids (Dict[str, Dict[str, List]]): Grade de hiperparâmetros de cada modelo
+        folds (int): Máximo de folds externos
+        inner_folds (int): Máximo de folds internos
+
+    Returns:
+        Tuple[Dict[str, Dict], int]: Relatório de cross_validate_models() e total de imagens
+    """
+    with open(labels_path, newline='', encoding='utf-8') as f:
+        labels = [row for row in csv.DictReader(f) if label_path(row).exists()]
+
+    cache = load_feature_cache()
+    features = dataset_features([label_path(label) for label in labels], workers=workers, cache=cache)
+    save_feature_cache(cache)
+    return cross_validate_models(features, labels, grids=grids, folds=folds, inner_folds=inner_folds,
+                                 workers=workers), len(labels)
+
+
+def print_evaluation(report: Dict[str, Dict]) -> None:
+    """
+    Imprime o resumo por modelo, plataforma e tipo de manipulação.
+
+    'Balanceada' é a estimativa nos folds externos; 'Seleção' é a acurácia
+    balanceada interna da combinação escolhida (otimista, só para comparar).
+    """
+    print(f"  {'Modelo':<6} {'Acurácia':>9} {'Balanceada':>11} {'Seleção':>8} {'Precisão':>9} {'Recall':>7} {'F1':>6} "
+          f"{'Parede':>8} {'Treino':>8} {'Predição':>9}  Parâmetros")
+    for name, entry in report.items():
+        overall = entry['overall']
+        print(f"  {name:<6} {overall['accuracy']:>9.1%} {overall['balanced_accuracy']:>11.1%} {entry['selection']:>8.1%} "
+              f"{overall['precision']:>9.1%} {overall['recall']:>7.1%} "
+              f"{overall['f1']:>6.3f} {entry['wall_seconds']:>7.1f}s {entry['fit_seconds']:>7.1f}s "
+              f"{entry['predict_seconds']:>8.1f}s  {entry['params']}")
+
+    names = list(report)
+    print(f"\n  {'Plataforma':<12}" + ''.join(f"{name + ' F1':>10}" for name in names))
+    for platform_name in next(iter(report.values()))['platforms']:
+        print(f"  {platform_name:<12}" + ''.join(
+            f"{report[name]['platforms'][platform_name]['f1']:>10.3f}" for name in names))
+
+    print(f"\n  {'Tipo':<28}{'Imagens':>8}" + ''.join(f"{name:>8}" for name in names))
+    for manip_type, entry in next(iter(report.values()))['types'].items():
+        print(f"  {manip_type:<28}{entry['count']:>8}" + ''.join(
+            f"{report[name]['types'][manip_type]['accuracy']:>8.1%}" for name in names))
@@ -0,0 +1,146 @@
+"""
+Vetores de características das imagens para o classificador base (embedding + estatísticas forenses)
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from .config import FEATURES_CACHE_PATH
+from .forensics import MAP_NAMES, compute_forensic_maps
+from .similarity import embed_image
+
+
+# Imagens por tarefa do pool
+FEATURES_CHUNK_SIZE = 16
+
+# Versão do vetor de características (caches gravados com outra versão são descartados)
+FEATURES_VERSION = 2
+
+
+def image_features(image: np.ndarray) -> np.ndarray:
+    """
+    Vetor de características de uma imagem, usado pelo classificador base.
+
+    Junta o embedding da imagem (embed_image), estatísticas de cada
+    mapa forense (média, desvio, percentis 90/99 e máximo) e a geometria
+    do recorte: largura, altura e quantidade de cores. Textos trocados
+    mudam a altura do recorte; textos colados por cima trazem cores e
+    resíduos de recompressão que o template não produz.
+
+    Args:
+        image (np.ndarray): Pixels RGB (altura, largura, 3), uint8
+
+    Returns:
+        np.ndarray: Vetor float32 (5472 do embedding + 15 forenses + 3 de geometria)
+
+    Exemplo:
+        >>> image_features(np.asarray(Image.open(AUTHENTIC_DIR / 'twitter_000.png').convert('RGB'))).shape
+        (5490,)
+    """
+    maps = compute_forensic_maps(image[None])
+    stats = []
+    for name in MAP_NAMES:
+        values = maps[name][0]
+        p90, p99 = np.percentile(values, [90, 99])
+        stats += [values.mean(), values.std(), p90, p99, values.max()]
+
+    packed = image.astype(np.uint32)
+    colors = len(np.unique((packed[..., 0] << 16) | (packed[..., 1] << 8) | packed[..., 2]))
+    geometry = [image.shape[1] / 1000, image.shape[0] / 1000, np.log1p(colors)]
+
+    return np.concatenate([embed_image(Image.fromarray(image)), stats, geometry]).astype(np.float32)
+
+
+def _features_task(paths: List[str]) -> List[np.ndarray]:
+    """
+    Tarefa do pool: características de um grupo de imagens.
+    """
+    vectors = []
+    for path in paths:
+        with Image.open(path) as image:
+            vectors.append(image_features(np.asarray(image.convert('RGB'))))
+    return vectors
+
+
+def _cache_key(path: Path) -> Tuple[str, int, int]:
+    stat = os.stat(path)
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def dataset_features(paths: Sequence[Path], workers: Optional[int] = None,
+                     cache: Optional[Dict] = None) -> np.ndarray:
+    """
+    Matriz de características de várias imagens, calculada num pool de processos.
+
+    Com `cache` (um dicionário mantido pelo chamador), imagens que não
+    mudaram desde a última chamada (mesmo mtime e tamanho) não são
+    recalculadas; útil quando o dataset cresce a cada rodada.
+
+    Args:
+        paths (Sequence[Path]): Imagens, na ordem das linhas da matriz
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        cache (Dict, optional): Cache {(caminho, mtime, tamanho): vetor}, atualizado no lugar
+
+    Returns:
+        np.ndarray: Matriz float32 (len(paths), dimensões)
+
+    Exemplo:
+        >>> cache = {}
+        >>> X = dataset_features(paths, workers=4, cache=cache)  # calcula tudo
+        >>> X = dataset_features(paths + new_paths, cache=cache)  # só as novas
+    """
+    cache = {} if cache is None else cache
+    keys = [_cache_key(path) for path in paths]
+    pending = [key for key in dict.fromkeys(keys) if key not in cache]
+
+    if pending:
+        chunks = [pending[i:i + FEATURES_CHUNK_SIZE] for i in range(0, len(pending), FEATURES_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_features_task, [[key[0] for key in chunk] for chunk in chunks])
+            for chunk, vectors in zip(chunks, results):
+                cache.update(zip(chunk, vectors))
+
+    return np.stack([cache[key] for key in keys])
+
+
+def load_feature_cache(path: Path = FEATURES_CACHE_PATH) -> Dict:
+    """
+    Carrega o cache de características gravado por save_feature_cache().
+
+    O cache vem vazio se o arquivo não existe ou foi gravado com outra
+    FEATURES_VERSION (vetores de outro tamanho).
+
+    Returns:
+        Dict: Cache {(caminho, mtime, tamanho): vetor}, no formato de dataset_features()
+    """
+    if not path.exists():
+        return {}
+    with np.load(path) as data:
+        if 'version' not in data.files or int(data['version']) != FEATURES_VERSION:
+            return {}
+        return {
+            (str(name), int(mtime), int(size)): vector
+            for name, mtime, size, vector in zip(data['paths'], data['mtimes'], data['sizes'], data['vectors'])
+        }
+
+
+def save_feature_cache(cache: Dict, path: Path = FEATURES_CACHE_PATH) -> None:
+    """
+    Grava o cache de características em disco, para reaproveitá-lo entre execuções.
+
+    Exemplo:
+        >>> cache = load_feature_cache()
+        >>> X = dataset_features(paths, cache=cache)
+        >>> save_feature_cache(cache)
+    """
+    if not cache:
+        return
+    keys = list(cache)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, version=FEATURES_VERSION, paths=np.array([key[0] for key in keys]),
+             mtimes=np.array([key[1] for key in keys], dtype=np.int64),
+             sizes=np.array([key[2] for key in keys], dtype=np.int64),
+             vectors=np.stack([cache[key] for key in keys]))
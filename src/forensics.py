@@ -0,0 +1,279 @@
+"""
+Mapas forenses vetorizados (ELA, resíduo de ruído e descontinuidades de borda/cor)
+"""
+
+import io
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from .config import (
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    FORENSICS_DIR,
+    ELA_JPEG_QUALITY,
+    FORENSICS_STACK_SIZE,
+    FORENSICS_BUCKET,
+    FORENSICS_DTYPE
+)
+
+
+MAP_NAMES = ('ela', 'noise', 'edges')
+
+# Extensões de imagem consideradas ao varrer o dataset
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.webp')
+
+
+def _jpeg_roundtrip(image: np.ndarray, quality: int) -> np.ndarray:
+    """
+    Re-salva a imagem como JPEG em memória e decodifica de volta.
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format='JPEG', quality=quality)
+    buffer.seek(0)
+    return np.asarray(Image.open(buffer).convert('RGB'))
+
+
+def _shift_sum_3x3(stack: np.ndarray) -> np.ndarray:
+    """
+    Soma da vizinhança 3x3 de cada pixel (bordas replicadas), sobre a pilha inteira.
+    """
+    padded = np.pad(stack, ((0, 0), (1, 1), (1, 1)), mode='edge')
+    height, width = stack.shape[1:3]
+    total = np.zeros_like(stack)
+    for dy in range(3):
+        for dx in range(3):
+            total += padded[:, dy:dy + height, dx:dx + width]
+    return total
+
+
+def compute_forensic_maps(stack: np.ndarray, jpeg_quality: int = ELA_JPEG_QUALITY,
+                          sizes: Optional[Sequence[Tuple[int, int]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Calcula os mapas forenses de uma pilha de imagens do mesmo tamanho.
+
+    A pilha pode ter sido preenchida (ver pad_stack()): com `sizes`, o
+    gradiente é zerado a partir da última linha/coluna real de cada imagem,
+    como nas bordas de uma imagem sem preenchimento, e os mapas recortados
+    em (altura, largura) ficam iguais aos da imagem isolada.
+
+    Todos os mapas são operações de array sobre a pilha (N, H, W, 3):
+    - 'ela': diferença absoluta média entre a imagem e seu JPEG re-salvo
+      (error-level analysis); regiões coladas/re-renderizadas reagem
+      diferente à recompressão
+    - 'noise': resíduo passa-alta da luminância (pixel - média 3x3)
+    - 'edges': magnitude máxima, entre os canais RGB, do gradiente de cor
+      (descontinuidades de borda/cor ao redor dos trechos de texto)
+
+    Apenas a recompressão JPEG do ELA é feita imagem a imagem (Pillow).
+
+    Args:
+        stack (np.ndarray): Imagens RGB uint8 (N, H, W, 3)
+        jpeg_quality (int): Qualidade do JPEG usado no ELA
+        sizes (Sequence[Tuple[int, int]], optional): (altura, largura) reais de cada
+                                                     imagem da pilha preenchida
+
+    Returns:
+        Dict[str, np.ndarray]: Mapas float32 (N, H, W) para 'ela', 'noise' e 'edges'
+
+    Exemplo:
+        >>> maps = compute_forensic_maps(np.stack([load_array(p) for p in paths]))
+        >>> maps['ela'].shape
+        (8, 800, 600)
+    """
+    pixels = stack.astype(np.float32)
+
+    recompressed = np.stack([_jpeg_roundtrip(image, jpeg_quality) for image in stack]).astype(np.float32)
+    ela = np.abs(pixels - recompressed).mean(axis=-1)
+
+    luminance = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    noise = np.abs(luminance - _shift_sum_3x3(luminance) / 9.0)
+
+    grad_y = np.zeros_like(pixels)
+    grad_x = np.zeros_like(pixels)
+    grad_y[:, 1:-1] = (pixels[:, 2:] - pixels[:, :-2]) / 2.0
+    grad_x[:, :, 1:-1] = (pixels[:, :, 2:] - pixels[:, :, :-2]) / 2.0
+    if sizes is not None:
+        for index, (height, width) in enumerate(sizes):
+            grad_y[index, height - 1:] = 0
+            grad_x[index, :, width - 1:] = 0
+    edges = np.sqrt(grad_x ** 2 + grad_y ** 2).max(axis=-1)
+
+    return {'ela': ela, 'noise': noise, 'edges': edges}
+
+
+def quantize_maps(maps: Dict[str, np.ndarray], dtype: str = FORENSICS_DTYPE) -> Dict[str, np.ndarray]:
+    """
+    Converte os mapas para armazenamento compacto (uint8 saturado ou float16).
+
+    Args:
+        maps (Dict[str, np.ndarray]): Mapas float32 de compute_forensic_maps()
+        dtype (str): 'uint8' ou 'float16'
+
+    Returns:
+        Dict[str, np.ndarray]: Mapas no tipo escolhido
+    """
+    if dtype == 'float16':
+        return {name: value.astype(np.float16) for name, value in maps.items()}
+    return {name: np.clip(np.rint(value), 0, 255).astype(np.uint8) for name, value in maps.items()}
+
+
+def maps_path(image_path: Path, forensics_dir: Path = FORENSICS_DIR) -> Path:
+    """
+    Caminho do arquivo de mapas de uma imagem (ex: 'forensics/twitter_000.npz').
+    """
+    return forensics_dir / (Path(image_path).stem + '.npz')
+
+
+def _is_cached(image_path: Path, out_path: Path) -> bool:
+    """
+    Indica se os mapas já existem e foram calculados a partir desta versão da imagem.
+    """
+    if not out_path.exists():
+        return False
+    stat = image_path.stat()
+    with np.load(out_path) as f:
+        return int(f['source_mtime_ns']) == stat.st_mtime_ns and int(f['source_size']) == stat.st_size
+
+
+def bucket_shape(height: int, width: int, bucket: int = FORENSICS_BUCKET) -> Tuple[int, int]:
+    """
+    Tamanho da pilha de uma imagem: altura e largura arredondadas para cima
+    até um múltiplo de `bucket`.
+
+    Exemplo:
+        >>> bucket_shape(700, 600, 64)
+        (704, 640)
+    """
+    return -(-height // bucket) * bucket, -(-width // bucket) * bucket
+
+
+def pad_stack(images: Sequence[np.ndarray], shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Empilha imagens RGB de tamanhos diferentes preenchendo-as até `shape`.
+
+    O preenchimento replica a última linha/coluna (como o próprio JPEG faz
+    nos blocos incompletos), então ruído e ELA não ganham bordas artificiais;
+    só o ELA da última linha/coluna real pode variar levemente, pela
+    interpolação do croma do JPEG que agora enxerga o preenchimento.
+
+    Args:
+        images (Sequence[np.ndarray]): Imagens RGB uint8 (H, W, 3), no máximo do tamanho `shape`
+        shape (Tuple[int, int]): (altura, largura) da pilha
+
+    Returns:
+        np.ndarray: Pilha uint8 (N, altura, largura, 3)
+    """
+    height, width = shape
+    return np.stack([np.pad(image, ((0, height - image.shape[0]), (0, width - image.shape[1]), (0, 0)),
+                            mode='edge') for image in images])
+
+
+def _process_stack(paths: List[str], forensics_dir: str, jpeg_quality: int, dtype: str, bucket: int) -> int:
+    """
+    Tarefa do pool: lê um grupo de imagens, separa-as em pilhas por tamanho
+    arredondado (bucket_shape()) e grava os mapas de cada imagem recortados
+    ao seu tamanho original.
+    """
+    buckets = defaultdict(list)
+    for path in paths:
+        with Image.open(path) as image:
+            pixels = np.asarray(image.convert('RGB'))
+        buckets[bucket_shape(*pixels.shape[:2], bucket)].append((path, pixels))
+
+    for shape, items in buckets.items():
+        sizes = [pixels.shape[:2] for _, pixels in items]
+        stack = pad_stack([pixels for _, pixels in items], shape)
+        maps = quantize_maps(compute_forensic_maps(stack, jpeg_quality, sizes), dtype)
+
+        for index, (path, _) in enumerate(items):
+            height, width = sizes[index]
+            stat = os.stat(path)
+            out_path = maps_path(Path(path), Path(forensics_dir))
+            with open(out_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    source_mtime_ns=np.int64(stat.st_mtime_ns),
+                    source_size=np.int64(stat.st_size),
+                    **{name: maps[name][index, :height, :width] for name in MAP_NAMES}
+                )
+    return len(paths)
+
+
+def dataset_images(dirs: Iterable[Path] = (AUTHENTIC_DIR, MANIPULATED_DIR)) -> List[Path]:
+    """
+    Lista as imagens do dataset (autênticos e manipulados).
+    """
+    return sorted(path for folder in dirs for path in folder.iterdir()
+                  if path.suffix in IMAGE_EXTENSIONS)
+
+
+def build_forensic_maps(image_paths: Optional[Iterable[Path]] = None,
+                        forensics_dir: Path = FORENSICS_DIR,
+                        workers: Optional[int] = None,
+                        stack_size: int = FORENSICS_STACK_SIZE,
+                        bucket: int = FORENSICS_BUCKET,
+                        jpeg_quality: int = ELA_JPEG_QUALITY,
+                        dtype: str = FORENSICS_DTYPE) -> Dict:
+    """
+    Calcula os mapas forenses de todo o dataset num pool de processos.
+
+    As imagens pendentes são divididas em grupos de até `stack_size`, e
+    cada grupo vira uma tarefa do pool. A tarefa lê as imagens e, como o
+    recorte varia por post, preenche-as até a altura/largura arredondada
+    para um múltiplo de `bucket` antes de empilhar; os mapas são
+    recortados de volta ao tamanho de cada imagem.
+    Imagens cujos mapas já estão em cache (mesmo mtime e tamanho do
+    arquivo de origem) são puladas, então apenas imagens novas ou
+    alteradas são processadas.
+
+    Args:
+        image_paths (Iterable[Path], optional): Imagens a processar. Se None, usa
+                                                autenticos/ e manipulados/
+        forensics_dir (Path): Pasta de saída dos mapas
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        stack_size (int): Máximo de imagens por tarefa
+        bucket (int): Arredondamento (px) do tamanho das pilhas
+        jpeg_quality (int): Qualidade do JPEG usado no ELA
+        dtype (str): 'uint8' ou 'float16'
+
+    Returns:
+        Dict: {'total', 'cached', 'processed'}
+
+    Exemplo:
+        >>> build_forensic_maps()
+        {'total': 240, 'cached': 0, 'processed': 240}
+    """
+    forensics_dir.mkdir(parents=True, exist_ok=True)
+    paths = list(image_paths) if image_paths is not None else dataset_images()
+    pending = [path for path in paths if not _is_cached(path, maps_path(path, forensics_dir))]
+
+    stacks = [[str(path) for path in pending[i:i + stack_size]] for i in range(0, len(pending), stack_size)]
+
+    processed = 0
+    if stacks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_process_stack, stack, str(forensics_dir), jpeg_quality, dtype, bucket)
+                       for stack in stacks]
+            for future in futures:
+                processed += future.result()
+
+    return {'total': len(paths), 'cached': len(paths) - len(pending), 'processed': processed}
+
+
+def load_forensic_maps(image_path: Path, forensics_dir: Path = FORENSICS_DIR) -> Dict[str, np.ndarray]:
+    """
+    Lê os mapas forenses de uma imagem do dataset.
+
+    Args:
+        image_path (Path): Caminho (ou nome) da imagem
+        forensics_dir (Path): Pasta dos mapas
+
+    Returns:
+        Dict[str, np.ndarray]: Mapas 'ela', 'noise' e 'edges' (H, W)
+    """
+    with np.load(maps_path(image_path, forensics_dir)) as f:
+        return {name: f[name] for name in MAP_NAMES}
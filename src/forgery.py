@@ -0,0 +1,474 @@
+"""
+Manipulações em pixels: editam o PNG autêntico já capturado em vez de re-renderizar o template
+"""
+
+import random
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from .config import (
+    fake,
+    SEED,
+    DATASET_DIR,
+    MANIPULATED_DIR,
+    PIXEL_MANIPULATION_TYPES,
+    FORGERY_FONTS,
+    FORGERY_BOLD_FONTS
+)
+from .catalog import query_images
+from .rendering import build_payload
+from .manipulations import (
+    manipulate_twitter_data,
+    manipulate_instagram_data,
+    manipulate_whatsapp_data
+)
+
+
+# Manipulação dos dados correspondente a cada plataforma ('pixel_x' usa a mesma regra de 'x')
+DATA_MANIPULATIONS = {
+    'twitter': manipulate_twitter_data,
+    'instagram': manipulate_instagram_data,
+    'whatsapp': manipulate_whatsapp_data,
+}
+
+# Elementos com fonte em negrito nos templates
+BOLD_ELEMENTS = {'displayName', 'username', 'contactName', 'retweetCount', 'quoteCount', 'likeCount', 'viewCount'}
+
+# Selo de verificado: elemento ao lado do qual ele fica e último elemento da mesma linha
+BADGE_ANCHORS = {
+    'twitter': ('displayName', 'timestamp'),
+    'instagram': ('username', 'username'),
+}
+
+# Cor do selo desenhado quando não há um selo real para clonar
+BADGE_COLORS = {
+    'twitter': (29, 155, 240),
+    'instagram': (0, 149, 246),
+}
+
+# Imagens verificadas abertas por plataforma e altura de linha para extrair selos
+DONOR_SAMPLES = 8
+
+Box = Sequence[int]
+
+
+@lru_cache(maxsize=None)
+def load_font(size: int, bold: bool = False) -> ImageFont.FreeTypeFont:
+    """
+    Primeira fonte disponível de FORGERY_FONTS (ou FORGERY_BOLD_FONTS) no tamanho pedido.
+
+    A fonte não é a mesma do browser, o que reproduz o "texto colado numa
+    fonte levemente diferente" típico de edições manuais. Sem nenhuma das
+    fontes instaladas, usa a fonte padrão do Pillow.
+    """
+    for name in (FORGERY_BOLD_FONTS if bold else FORGERY_FONTS):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def resolve_path(path: str) -> Path:
+    """
+    Caminho absoluto de uma imagem do catálogo (gravado relativo a DATASET_DIR).
+    """
+    path = Path(path)
+    return path if path.is_absolute() else DATASET_DIR / path
+
+
+def inside(pixels: np.ndarray, box: Box) -> bool:
+    """
+    Indica se a caixa (x, y, largura, altura) está inteira dentro da imagem.
+    """
+    x, y, width, height = box
+    return x >= 0 and y >= 0 and width > 0 and height > 0 \
+        and x + width <= pixels.shape[1] and y + height <= pixels.shape[0]
+
+
+def background_color(pixels: np.ndarray, box: Box) -> np.ndarray:
+    """
+    Cor de fundo em volta de uma caixa: mediana do anel de 1px ao redor dela.
+
+    Args:
+        pixels (np.ndarray): Imagem RGB (altura, largura, 3)
+        box (Box): Caixa (x, y, largura, altura) do elemento
+
+    Returns:
+        np.ndarray: Cor RGB (uint8)
+    """
+    x, y, width, height = box
+    top, left = max(y - 1, 0), max(x - 1, 0)
+    bottom, right = min(y + height + 1, pixels.shape[0]), min(x + width + 1, pixels.shape[1])
+    region = pixels[top:bottom, left:right]
+
+    mask = np.ones(region.shape[:2], dtype=bool)
+    mask[max(y - top, 0):y + height - top, max(x - left, 0):x + width - left] = False
+    ring = region[mask] if mask.any() else region.reshape(-1, 3)
+    return np.median(ring, axis=0).astype(np.uint8)
+
+
+def text_color(pixels: np.ndarray, box: Box, background: np.ndarray) -> np.ndarray:
+    """
+    Cor do texto de uma caixa: média dos pixels mais distantes do fundo.
+
+    Args:
+        pixels (np.ndarray): Imagem RGB (altura, largura, 3)
+        box (Box): Caixa (x, y, largura, altura) do elemento
+        background (np.ndarray): Cor de fundo (background_color())
+
+    Returns:
+        np.ndarray: Cor RGB (uint8)
+    """
+    x, y, width, height = box
+    region = pixels[y:y + height, x:x + width].reshape(-1, 3).astype(np.int16)
+    distance = np.abs(region - background.astype(np.int16)).sum(axis=1)
+    if not len(distance) or distance.max() == 0:
+        return 255 - background  # caixa vazia: contraste com o fundo
+
+    # Ignora as bordas suavizadas (antialiasing) dos glifos
+    strong = region[distance >= distance.max() * 0.8]
+    return strong.mean(axis=0).round().astype(np.uint8)
+
+
+def paint_over(image: Image.Image, box: Box, color: np.ndarray) -> None:
+    """
+    Pinta uma caixa com uma cor sólida.
+    """
+    x, y, width, height = box
+    if width > 0 and height > 0:
+        ImageDraw.Draw(image).rectangle([x, y, x + width - 1, y + height - 1], fill=tuple(int(c) for c in color))
+
+
+def replace_text(image: Image.Image, pixels: np.ndarray, box: Box, text: str, bold: bool = False) -> None:
+    """
+    Apaga o texto de uma caixa e escreve outro por cima, na cor e altura do original.
+
+    O fundo e a cor do texto são estimados a partir dos pixels originais;
+    o tamanho da fonte vem da altura da caixa, reduzido se o novo texto
+    não couber na largura. Se ainda assim ele for mais largo que a caixa,
+    a área extra também é pintada com o fundo.
+
+    Args:
+        image (Image.Image): Imagem sendo editada
+        pixels (np.ndarray): Pixels originais (antes de qualquer edição)
+        box (Box): Caixa (x, y, largura, altura) do elemento
+        text (str): Novo texto
+        bold (bool): Se True, usa a fonte em negrito
+    """
+    x, y, width, height = box
+    background = background_color(pixels, box)
+    color = text_color(pixels, box, background)
+    draw = ImageDraw.Draw(image)
+
+    # Reduz a fonte (até 60% da altura) enquanto o texto não couber na largura original
+    size = max(6, round(height * 0.75))
+    while True:
+        font = load_font(size, bold)
+        right = draw.textbbox((x, y + height / 2), text, font=font, anchor='lm')[2]
+        if right - x <= width * 1.1 or size <= max(6, round(height * 0.6)):
+            break
+        size -= 1
+
+    paint_over(image, (x, y, max(width, right - x + 1), height), background)
+    draw.text((x, y + height / 2), text, font=font, fill=tuple(int(c) for c in color), anchor='lm')
+
+
+def draw_badge(size: int, color: Tuple[int, int, int], background: np.ndarray) -> np.ndarray:
+    """
+    Desenha um selo de verificado (círculo com ✓) sobre a cor de fundo.
+
+    Returns:
+        np.ndarray: Pixels RGB (size, size, 3)
+    """
+    badge = Image.new('RGB', (size, size), tuple(int(c) for c in background))
+    draw = ImageDraw.Draw(badge)
+    draw.ellipse([0, 0, size - 1, size - 1], fill=color)
+    draw.text((size / 2, size / 2), '✓', font=load_font(max(6, round(size * 0.65)), True), fill='white', anchor='mm')
+    return np.asarray(badge)
+
+
+def extract_badge(pixels: np.ndarray, platform: str, layout: Dict) -> Optional[Dict]:
+    """
+    Recorta o selo de verificado de uma imagem para ser clonado em outras.
+
+    Args:
+        pixels (np.ndarray): Imagem RGB de um post verificado
+        platform (str): 'twitter' ou 'instagram'
+        layout (Dict): Caixas dos elementos (coluna 'layout' do catálogo)
+
+    Returns:
+        Optional[Dict]: {'patch', 'gap', 'offset_y', 'line_height', 'background'}
+                        ou None se a imagem não tiver selo visível
+    """
+    badges, names = layout.get('verifiedBadge'), layout.get(BADGE_ANCHORS[platform][0])
+    if not badges or not names or not inside(pixels, badges[0]):
+        return None
+
+    (x, y, width, height), name = badges[0], names[0]
+    return {
+        'patch': pixels[y:y + height, x:x + width].copy(),
+        'gap': max(x - (name[0] + name[2]), 0),
+        'offset_y': y - name[1],
+        'line_height': name[3],
+        'background': background_color(pixels, badges[0]),
+    }
+
+
+def _line_box(layout: Dict, platform: str, start: int) -> Tuple[int, int, int, int]:
+    """
+    Faixa da linha do selo que começa em `start` e vai até o fim do último elemento da linha.
+    """
+    anchor, end = (layout[name][0] for name in BADGE_ANCHORS[platform])
+    top = min(anchor[1], end[1])
+    bottom = max(anchor[1] + anchor[3], end[1] + end[3])
+    return start, top, end[0] + end[2] - start, bottom - top
+
+
+def _shift(image: Image.Image, pixels: np.ndarray, box: Box, dx: int, background: np.ndarray) -> None:
+    """
+    Move uma faixa horizontalmente em `dx` pixels, pintando com o fundo o que ficou descoberto.
+    """
+    x, y, width, height = box
+    if width <= 0 or height <= 0:
+        return
+    strip = Image.fromarray(pixels[y:y + height, x:x + width])
+    paint_over(image, box, background)
+    image.paste(strip, (x + dx, y))
+
+
+def remove_badge(image: Image.Image, pixels: np.ndarray, platform: str, layout: Dict) -> None:
+    """
+    Apaga o selo de verificado e puxa o resto da linha para fechar o espaço.
+    """
+    badge = layout['verifiedBadge'][0]
+    name = layout[BADGE_ANCHORS[platform][0]][0]
+    background = background_color(pixels, badge)
+    gap = max(badge[0] - (name[0] + name[2]), 0)
+
+    paint_over(image, badge, background)
+    _shift(image, pixels, _line_box(layout, platform, badge[0] + badge[2]), -(badge[2] + gap), background)
+
+
+def add_badge(image: Image.Image, pixels: np.ndarray, platform: str, layout: Dict,
+              donor: Optional[Dict] = None) -> None:
+    """
+    Cola um selo de verificado ao lado do nome, empurrando o resto da linha.
+
+    O selo é clonado de outro post verificado (donor, ver extract_badge());
+    sem donor, um selo é desenhado na cor da plataforma.
+
+    Args:
+        image (Image.Image): Imagem sendo editada
+        pixels (np.ndarray): Pixels originais (antes de qualquer edição)
+        platform (str): 'twitter' ou 'instagram'
+        layout (Dict): Caixas dos elementos (coluna 'layout' do catálogo)
+        donor (Dict, optional): Selo extraído por extract_badge()
+    """
+    name = layout[BADGE_ANCHORS[platform][0]][0]
+    background = background_color(pixels, name)
+
+    if donor is None:
+        size = max(8, round(name[3] * 1.1))
+        donor = {'patch': draw_badge(size, BADGE_COLORS[platform], background),
+                 'gap': 4, 'offset_y': (name[3] - size) // 2}
+
+    patch = donor['patch']
+    start = name[0] + name[2]
+    _shift(image, pixels, _line_box(layout, platform, start), patch.shape[1] + donor['gap'], background)
+    image.paste(Image.fromarray(patch), (start + donor['gap'], name[1] + donor['offset_y']))
+
+
+def pick_donor(donors: Sequence[Dict], pixels: np.ndarray, platform: str, layout: Dict) -> Optional[Dict]:
+    """
+    Escolhe o selo de mesma escala (altura da linha) e fundo mais parecido (tema).
+    """
+    names = layout.get(BADGE_ANCHORS[platform][0])
+    if not donors or not names:
+        return None
+    background = background_color(pixels, names[0]).astype(int)
+    return min(donors, key=lambda donor: (abs(donor['line_height'] - names[0][3]),
+                                          int(np.abs(donor['background'].astype(int) - background).sum())))
+
+
+def forge_image(pixels: np.ndarray, platform: str, spec: Dict, layout: Dict,
+                manipulation_type: str, donors: Sequence[Dict] = ()) -> Tuple[Image.Image, Dict]:
+    """
+    Aplica uma manipulação em pixels a um screenshot autêntico.
+
+    Os dados são manipulados com a mesma regra da re-renderização
+    (manipulate_*_data) e os dois payloads são comparados: cada elemento
+    cujo texto mudou é apagado e reescrito na caixa medida na
+    renderização; uma mudança de verificação remove ou clona o selo.
+
+    Args:
+        pixels (np.ndarray): Pixels RGB do autêntico
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        spec (Dict): Dados do autêntico (coluna 'spec' do catálogo)
+        layout (Dict): Caixas dos elementos (coluna 'layout' do catálogo)
+        manipulation_type (str): Tipo de PIXEL_MANIPULATION_TYPES (ex: 'pixel_metrics_change')
+        donors (Sequence[Dict]): Selos para clonar (extract_badge())
+
+    Returns:
+        Tuple[Image.Image, Dict]: Imagem manipulada e dados correspondentes
+
+    Exemplo:
+        >>> record = query_images(conn, image_class='autentico', limit=1)[0]
+        >>> image, data = forge_image(pixels, 'twitter', record['spec'], record['layout'],
+        ...                           'pixel_metrics_change')
+        >>> image.save('twitter_000_pixel_1.png')
+    """
+    data = DATA_MANIPULATIONS[platform](spec, manipulation_type.removeprefix('pixel_'))
+    before, after = build_payload(platform, spec), build_payload(platform, data)
+    image = Image.fromarray(pixels.copy())
+
+    for name, boxes in layout.items():
+        if after['text'].get(name, before['text'].get(name)) == before['text'].get(name):
+            continue
+        for box in boxes:
+            if inside(pixels, box):
+                replace_text(image, pixels, box, after['text'][name], name in BOLD_ELEMENTS)
+
+    if after['display'].get('verifiedBadge') != before['display'].get('verifiedBadge'):
+        if layout.get('verifiedBadge'):
+            remove_badge(image, pixels, platform, layout)
+        elif layout.get(BADGE_ANCHORS[platform][0]):
+            add_badge(image, pixels, platform, layout, pick_donor(donors, pixels, platform, layout))
+
+    if before['messages'] is not None:
+        for box, old, new in zip(layout.get('messageTimes', []), before['messages'], after['messages']):
+            if old[1] != new[1] and inside(pixels, box):
+                replace_text(image, pixels, box, new[1])
+
+    return image, data
+
+
+def _forge_task(record: Dict, manipulation_types: Sequence[str], donors: List[Dict], out_dir: str) -> List[Dict]:
+    """
+    Tarefa do pool: gera e grava as manipulações em pixels de um autêntico.
+    """
+    source = resolve_path(record['path'])
+    with Image.open(source) as image:
+        pixels = np.asarray(image.convert('RGB'))
+
+    rows = []
+    for index, manipulation_type in enumerate(manipulation_types, 1):
+        # Seed por imagem e tipo: o resultado não depende do worker nem da ordem das tarefas
+        seed = f"{SEED}:{record['filename']}:{manipulation_type}"
+        random.seed(seed)
+        fake.seed_instance(seed)
+
+        image, data = forge_image(pixels, record['social_network'], record['spec'], record['layout'],
+                                  manipulation_type, donors)
+        out_path = Path(out_dir) / f"{source.stem}_pixel_{index}{source.suffix}"
+        image.save(out_path)
+
+        rows.append({
+            'filename': out_path.name,
+            'class': 'manipulado',
+            'manipulation_type': manipulation_type,
+            'original_filename': record['filename'],
+            'social_network': record['social_network'],
+            'clip_x': record['clip_x'],
+            'clip_y': record['clip_y'],
+            'clip_width': record['clip_width'],
+            'clip_height': record['clip_height'],
+            'path': out_path,
+            'spec': data,
+            # As caixas do autêntico não valem para os textos reescritos (larguras diferentes)
+            'layout': None,
+        })
+    return rows
+
+
+def collect_donors(records: Sequence[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Extrai selos de verificado de alguns autênticos, por plataforma.
+
+    Para cada plataforma e altura de linha (escala) são abertas até
+    DONOR_SAMPLES imagens verificadas, guardando um selo por cor de fundo
+    (tema).
+
+    Args:
+        records (Sequence[Dict]): Autênticos do catálogo (com 'layout')
+
+    Returns:
+        Dict[str, List[Dict]]: {plataforma: [selo de extract_badge(), ...]}
+    """
+    donors = defaultdict(list)
+    sampled = defaultdict(int)
+    seen = set()
+
+    for record in records:
+        platform, layout = record['social_network'], record['layout']
+        names = layout.get(BADGE_ANCHORS.get(platform, ('',))[0])
+        if platform not in BADGE_ANCHORS or not layout.get('verifiedBadge') or not names:
+            continue
+        key = (platform, names[0][3])
+        if sampled[key] >= DONOR_SAMPLES:
+            continue
+        sampled[key] += 1
+
+        with Image.open(resolve_path(record['path'])) as image:
+            donor = extract_badge(np.asarray(image.convert('RGB')), platform, layout)
+        if donor is None or key + (tuple(donor['background']),) in seen:
+            continue
+        seen.add(key + (tuple(donor['background']),))
+        donors[platform].append(donor)
+
+    return dict(donors)
+
+
+def forge_dataset(conn: sqlite3.Connection,
+                  platforms: Optional[Sequence[str]] = None,
+                  workers: Optional[int] = None,
+                  out_dir: Path = MANIPULATED_DIR) -> Tuple[List[Dict], Dict]:
+    """
+    Gera as manipulações em pixels de todos os autênticos do catálogo num pool de processos.
+
+    Cada autêntico com spec e layout no catálogo vira uma tarefa que
+    grava '<autêntico>_pixel_<n>' para cada tipo de
+    PIXEL_MANIPULATION_TYPES da plataforma. Autênticos sem layout (por
+    exemplo, importados de um labels.csv) são pulados. Os manipulados vão para o catálogo com o spec alterado e sem
+    layout: as caixas medidas no autêntico não correspondem aos pixels
+    reescritos.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        platforms (Sequence[str], optional): Plataformas a processar. Se None, todas
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        out_dir (Path): Pasta de saída
+
+    Returns:
+        Tuple[List[Dict], Dict]: Registros para o catálogo (colunas do labels.csv, 'path',
+                                 'spec' e 'layout' = None) e {'sources', 'skipped', 'forged'}
+
+    Exemplo:
+        >>> records, stats = forge_dataset(open_catalog(), workers=4)
+        >>> stats
+        {'sources': 60, 'skipped': 0, 'forged': 120}
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sources = [record for record in query_images(conn, image_class='autentico')
+               if platforms is None or record['social_network'] in platforms]
+    ready = [record for record in sources
+             if record.get('spec') and record.get('layout') and record['social_network'] in PIXEL_MANIPULATION_TYPES]
+    donors = collect_donors(ready)
+
+    records = []
+    if ready:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_forge_task, record, PIXEL_MANIPULATION_TYPES[record['social_network']],
+                                donors.get(record['social_network'], []), str(out_dir))
+                for record in ready
+            ]
+            for future in futures:
+                records += future.result()
+
+    return records, {'sources': len(sources), 'skipped': len(sources) - len(ready), 'forged': len(records)}
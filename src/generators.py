@@ -3,14 +3,17 @@ Funções geradoras de dados fictícios para redes sociais
 """
 
 import random
+import warnings
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from .config import (
     fake,
     REAL_TWEETS,
     REAL_CAPTIONS,
     REAL_CONVERSATIONS,
-    AVATAR_COLORS
+    AVATAR_COLORS,
+    ASSET_POOL_SIZES,
+    AVATAR_PHOTO_RATE
 )
 
 
@@ -33,6 +36,57 @@ def generate_avatar_color() -> str:
     return random.choice(AVATAR_COLORS)
 
 
+# IDs ainda não usados de cada pool, numa ordem sorteada (sem reposição)
+_asset_queues: Dict[str, List[int]] = {}
+_asset_rounds: Dict[str, int] = {}
+
+
+def generate_asset_id(kind: str) -> int:
+    """
+    Entrega uma imagem do pool de assets procedurais (ver assets.py), sem repetir.
+
+    Os IDs saem de uma permutação do pool sorteada com o random global
+    (reprodutível pela SEED), então cada post recebe uma imagem distinta
+    até o pool de ASSET_POOL_SIZES[kind] imagens acabar. Daí em diante
+    uma nova permutação é sorteada e as imagens voltam a se repetir, com
+    um aviso: para datasets maiores, aumente ASSET_POOL_SIZES.
+
+    Args:
+        kind (str): 'post' ou 'avatar'
+
+    Returns:
+        int: ID do asset, usado pelos templates para carregar a imagem
+
+    Exemplo:
+        >>> generate_asset_id('post')
+        137
+    """
+    queue = _asset_queues.setdefault(kind, [])
+    if not queue:
+        rounds = _asset_rounds.get(kind, 0)
+        if rounds:
+            warnings.warn(f"Pool de {ASSET_POOL_SIZES[kind]} assets '{kind}' esgotado: as imagens "
+                          f"voltam a se repetir (aumente ASSET_POOL_SIZES)", stacklevel=2)
+        _asset_rounds[kind] = rounds + 1
+        queue.extend(random.sample(range(ASSET_POOL_SIZES[kind]), ASSET_POOL_SIZES[kind]))
+    return queue.pop()
+
+
+def generate_avatar_image():
+    """
+    Sorteia a foto de perfil: um asset do pool ou None (avatar de cor com iniciais).
+
+    Returns:
+        int | None: ID do asset de avatar (em AVATAR_PHOTO_RATE dos casos), ou None
+                    nos demais (1 - AVATAR_PHOTO_RATE)
+
+    Exemplo:
+        >>> generate_avatar_image()
+        42
+    """
+    return generate_asset_id('avatar') if random.random() < AVATAR_PHOTO_RATE else None
+
+
 def get_initials(name: str) -> str:
     """
     Extrai as iniciais de um nome completo para usar em avatares.
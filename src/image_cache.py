@@ -0,0 +1,325 @@
+"""
+Cache de imagens decodificadas em memória compartilhada para loaders com vários processos
+"""
+
+import csv
+import hashlib
+import os
+import time
+from multiprocessing import Manager, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from .config import (
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    LABELS_PATH,
+    IMAGE_CACHE_BUDGET_MB
+)
+from .catalog import label_path
+
+
+class SharedImageCache:
+    """
+    Pool de imagens decodificadas (RGB uint8) em memória compartilhada.
+
+    Cada imagem é decodificada uma única vez, por qualquer processo, e
+    gravada num segmento de memória compartilhada; os demais processos
+    leem o mesmo segmento sem cópia (np.ndarray somente leitura). O índice
+    (segmento, formato, último uso), os contadores e o lock ficam num
+    Manager do multiprocessing, então o objeto pode ser passado para os
+    workers (pickle) e todos enxergam o mesmo estado.
+
+    Quando o total de bytes passaria do orçamento, as imagens usadas há
+    mais tempo (LRU) são removidas. Arrays já entregues continuam válidos
+    no processo que os recebeu mesmo depois da remoção. Os nomes dos
+    segmentos removidos vão para uma lista compartilhada; cada processo
+    guarda até onde já a leu e fecha só os segmentos que saíram desde então.
+
+    Os workers devem ser processos filhos de quem criou o cache, que é o
+    responsável por chamar close() (remove todos os segmentos).
+
+    Exemplo:
+        with SharedImageCache(budget_mb=1024) as cache:
+            image = cache.get(AUTHENTIC_DIR / 'twitter_000.png')  # miss: decodifica
+            image = cache.get(AUTHENTIC_DIR / 'twitter_000.png')  # hit: sem cópia
+            print(cache.stats())
+            # {'hits': 1, 'misses': 1, 'evictions': 0, 'images': 1, 'bytes': 1440000}
+    """
+
+    def __init__(self, budget_mb: float = IMAGE_CACHE_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        # Um único resource tracker, herdado pelos workers: assim um segmento criado
+        # por um worker não é removido quando esse worker termina
+        resource_tracker.ensure_running()
+        self._manager = Manager()
+        self._index = self._manager.dict()
+        self._stats = self._manager.dict(hits=0, misses=0, evictions=0, bytes=0, tick=0)
+        self._evicted = self._manager.list()
+        self._lock = self._manager.Lock()
+        self._prefix = f"imgcache_{os.getpid()}_"
+        self._handles: Dict[str, SharedMemory] = {}
+        self._evicted_seen = 0
+        self._stale: List[SharedMemory] = []
+        self._owner = True
+
+    def __getstate__(self) -> Dict:
+        # O Manager e os segmentos abertos ficam no processo de origem
+        return {
+            'budget_bytes': self.budget_bytes,
+            '_index': self._index,
+            '_stats': self._stats,
+            '_evicted': self._evicted,
+            '_lock': self._lock,
+            '_prefix': self._prefix,
+        }
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._manager = None
+        self._handles = {}
+        self._evicted_seen = 0
+        self._stale = []
+        self._owner = False
+
+    def __enter__(self) -> 'SharedImageCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _touch(self) -> int:
+        """
+        Próximo valor do relógio de uso (chamar com o lock).
+        """
+        tick = self._stats['tick'] + 1
+        self._stats['tick'] = tick
+        return tick
+
+    def _view(self, key: str, entry: Tuple) -> np.ndarray:
+        """
+        Abre (ou reaproveita) o segmento de uma entrada e devolve o array sem cópia.
+        """
+        name, shape, _, _ = entry
+        shm = self._handles.get(key)
+        if shm is None or shm.name != name:
+            shm = SharedMemory(name=name)
+            self._handles[key] = shm
+        # frombuffer segura o buffer: close() falha (BufferError) enquanto houver arrays vivos
+        array = np.frombuffer(shm.buf, dtype=np.uint8, count=int(np.prod(shape))).reshape(shape)
+        array.setflags(write=False)
+        return array
+
+    def _prune_handles(self) -> None:
+        """
+        Fecha os segmentos abertos neste processo que foram removidos desde a
+        última chamada (uma única leitura da lista compartilhada de removidos).
+        """
+        evicted = self._evicted[self._evicted_seen:]
+        self._evicted_seen += len(evicted)
+        if evicted:
+            names = set(evicted)
+            for key, shm in list(self._handles.items()):
+                if shm.name in names:
+                    self._stale.append(self._handles.pop(key))
+
+        still_open = []
+        for shm in self._stale:
+            try:
+                shm.close()
+            except BufferError:
+                still_open.append(shm)  # ainda há arrays usando o segmento
+        self._stale = still_open
+
+    def _evict_for(self, nbytes: int) -> int:
+        """
+        Remove entradas LRU até caber `nbytes` no orçamento (chamar com o lock).
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        if self._stats['bytes'] + nbytes <= self.budget_bytes:
+            return 0
+
+        evicted = 0
+        entries = sorted((entry[3], key, entry) for key, entry in self._index.items() if entry is not None)
+        for _, key, (name, _, size, _) in entries:
+            if self._stats['bytes'] + nbytes <= self.budget_bytes:
+                break
+            del self._index[key]
+            self._evicted.append(name)
+            self._stats['bytes'] -= size
+            self._stats['evictions'] += 1
+            evicted += 1
+            try:
+                segment = SharedMemory(name=name)
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        return evicted
+
+    def get(self, path: Path) -> np.ndarray:
+        """
+        Retorna os pixels RGB de uma imagem, decodificando apenas no primeiro acesso.
+
+        Args:
+            path (Path): Caminho da imagem
+
+        Returns:
+            np.ndarray: Array somente leitura (altura, largura, 3) apoiado na memória
+                        compartilhada (ou uma cópia privada, se a imagem sozinha
+                        passar do orçamento)
+        """
+        key = str(Path(path).resolve())
+
+        while True:
+            with self._lock:
+                entry = self._index.get(key, False)
+                if entry:
+                    self._index[key] = entry[:3] + (self._touch(),)
+                    self._stats['hits'] += 1
+                    return self._view(key, entry)
+                if entry is False:
+                    # Marca como em decodificação para que os outros processos esperem
+                    self._index[key] = None
+                    self._stats['misses'] += 1
+                    break
+            time.sleep(0.001)
+
+        # Antes de recriar o segmento desta chave, descarta o que já foi removido
+        self._prune_handles()
+
+        try:
+            with Image.open(path) as image:
+                pixels = np.asarray(image.convert('RGB'))
+        except Exception:
+            with self._lock:
+                self._index.pop(key, None)
+            raise
+
+        if pixels.nbytes > self.budget_bytes:
+            with self._lock:
+                self._index.pop(key, None)
+            pixels.setflags(write=False)
+            return pixels
+
+        name = self._prefix + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        shm = SharedMemory(name=name, create=True, size=pixels.nbytes)
+        np.ndarray(pixels.shape, dtype=np.uint8, buffer=shm.buf)[:] = pixels
+        self._handles[key] = shm
+        entry = (name, pixels.shape, pixels.nbytes)
+
+        with self._lock:
+            evicted = self._evict_for(pixels.nbytes)
+            self._index[key] = entry + (self._touch(),)
+            self._stats['bytes'] += pixels.nbytes
+
+        if evicted:
+            self._prune_handles()
+        return self._view(key, entry + (0,))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Contadores do cache, somados entre todos os processos.
+
+        Returns:
+            Dict[str, int]: {'hits', 'misses', 'evictions', 'images', 'bytes'}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            images = sum(1 for entry in self._index.values() if entry is not None)
+        return {
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'evictions': stats['evictions'],
+            'images': images,
+            'bytes': stats['bytes'],
+        }
+
+    def close(self) -> None:
+        """
+        Libera os segmentos abertos neste processo; no processo de origem,
+        remove todos os segmentos do cache e encerra o Manager.
+        """
+        for shm in [*self._handles.values(), *self._stale]:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+        self._handles = {}
+        self._stale = []
+
+        if not self._owner or self._manager is None:
+            return
+
+        for entry in self._index.values():
+            if entry is None:
+                continue
+            try:
+                segment = SharedMemory(name=entry[0])
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._manager.shutdown()
+        self._manager = None
+
+
+class DatasetImageLoader:
+    """
+    Acesso indexado às imagens do dataset e aos labels, lendo pelo cache compartilhado.
+
+    Os labels vêm do labels.csv; a imagem de cada linha é procurada em
+    autenticos/ ou manipulados/ de acordo com a classe. O objeto pode ser
+    enviado para os workers de um pool: todos compartilham o mesmo cache.
+
+    Exemplo:
+        with SharedImageCache(budget_mb=2048) as cache:
+            loader = DatasetImageLoader(cache)
+            image, label = loader[0]
+            print(image.shape, label['class'])  # (800, 600, 3) autentico
+
+            with ProcessPoolExecutor(4) as pool:
+                sizes = list(pool.map(loader.image_bytes, range(len(loader))))
+            print(cache.stats()['hits'])
+    """
+
+    def __init__(self, cache: Optional[SharedImageCache] = None,
+                 labels_path: Path = LABELS_PATH,
+                 authentic_dir: Path = AUTHENTIC_DIR,
+                 manipulated_dir: Path = MANIPULATED_DIR):
+        self.cache = cache
+        self.authentic_dir = authentic_dir
+        self.manipulated_dir = manipulated_dir
+        with open(labels_path, newline='', encoding='utf-8') as f:
+            self.labels: List[Dict] = list(csv.DictReader(f))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def path(self, index: int) -> Path:
+        """
+        Caminho da imagem de uma linha do labels.csv.
+        """
+        return label_path(self.labels[index], self.authentic_dir, self.manipulated_dir)
+
+    def image(self, index: int) -> np.ndarray:
+        """
+        Pixels RGB de uma linha (pelo cache compartilhado, se houver).
+        """
+        if self.cache is not None:
+            return self.cache.get(self.path(index))
+        with Image.open(self.path(index)) as image:
+            return np.asarray(image.convert('RGB'))
+
+    def image_bytes(self, index: int) -> int:
+        """
+        Tamanho em bytes dos pixels de uma linha (útil para aquecer o cache num pool).
+        """
+        return self.image(index).nbytes
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, Dict]:
+        return self.image(index), self.labels[index]
@@ -3,50 +3,36 @@ Funções para manipulação de screenshots de redes sociais
 """
 
 import random
-from typing import Dict
+from typing import Dict, Optional
 from playwright.async_api import Page
-from .config import fake, TEMPLATES_DIR
+from .config import fake
+from .rendering import render_post, generate_message_times
 from .generators import (
     get_initials,
     generate_username,
     generate_tweet_text,
     generate_instagram_caption,
-    generate_whatsapp_messages,
-    format_number,
-    generate_time
+    generate_whatsapp_messages
 )
 
 
-async def manipulate_twitter(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
+def manipulate_twitter_data(original_data: Dict, manipulation_type: str,
+                            factor: Optional[float] = None) -> Dict:
     """
-    Aplica manipulações específicas em um post autêntico do Twitter.
-
-    Esta função cria versões manipuladas de tweets originais para treinar
-    modelos de detecção de conteúdo falso. As manipulações simulam alterações
-    comuns feitas em screenshots para desinformação ou fraude.
-
-    Tipos de manipulação disponíveis:
-    - 'metrics_change': Altera números de curtidas, retweets e visualizações
-    - 'text_change': Substitui o texto do tweet por outro conteúdo
-    - 'verification_change': Adiciona/remove o selo de verificação
-    - 'username_change': Modifica ligeiramente o username
-    - 'combined': Combina múltiplas alterações simultaneamente
+    Aplica a manipulação aos dados (spec) de um tweet, sem renderizar.
 
     Args:
-        page (Page): Instância da página do Playwright para renderização
-        original_data (Dict): Dados originais do tweet autêntico
-        manipulation_type (str): Tipo de manipulação a ser aplicada
+        original_data (Dict): Dados originais do post autêntico
+        manipulation_type (str): Tipo de manipulação (ver manipulate_twitter)
+        factor (float, optional): Fator aplicado às métricas em 'metrics_change'.
+                                  Se None, sorteia entre 0,5 e 1,5
 
     Returns:
-        Dict: Dados modificados após aplicação da manipulação
-
-    Exemplo:
-        async def exemplo():
-            manipulated = await manipulate_twitter(page, original, 'metrics_change')
-            # Métricas alteradas em ±20-50% dos valores originais
+        Dict: Cópia dos dados com a manipulação aplicada
     """
 
     data = original_data.copy()
+    data.pop('clip', None)
 
     if manipulation_type == "metrics_change":
         """
@@ -62,7 +48,8 @@ async def manipulate_twitter(page: Page, original_data: Dict, manipulation_type:
         - Tweet original: 500 visualizações → Tweet manipulado: 750 visualizações
         """
 
-        factor = random.uniform(0.5, 1.5)
+        if factor is None:
+            factor = random.uniform(0.5, 1.5)
         data['like_count'] = int(data['like_count'] * factor)
         data['retweet_count'] = int(data['retweet_count'] * factor)
         data['view_count'] = int(data['view_count'] * factor)
@@ -88,49 +75,27 @@ async def manipulate_twitter(page: Page, original_data: Dict, manipulation_type:
         data['like_count'] = int(data['like_count'] * factor)
         data['verified'] = not data['verified']
 
-    # Carregar template e aplicar dados manipulados
-    template_path = TEMPLATES_DIR / "twitter.html"
-    await page.goto(f"file:///{template_path.absolute()}")
-
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{data['initials']}';
-        document.getElementById('avatar').style.backgroundColor = '{data['avatar_color']}';
-        document.getElementById('displayName').textContent = '{data['name']}';
-        document.getElementById('username').textContent = '{data['username']}';
-        document.getElementById('timestamp').textContent = '{data['timestamp']}';
-        document.getElementById('tweetText').textContent = '{data['text']}';
-        document.getElementById('retweetCount').textContent = '{format_number(data['retweet_count'])}';
-        document.getElementById('quoteCount').textContent = '{format_number(data['quote_count'])}';
-        document.getElementById('likeCount').textContent = '{format_number(data['like_count'])}';
-        document.getElementById('viewCount').textContent = '{format_number(data['view_count'])}';
-        document.getElementById('replyCount').textContent = '{format_number(data['reply_count'])}';
-        document.getElementById('retweetActionCount').textContent = '{format_number(data['retweet_count'])}';
-        document.getElementById('likeActionCount').textContent = '{format_number(data['like_count'])}';
-        document.getElementById('viewActionCount').textContent = '{format_number(data['view_count'])}';
-        document.getElementById('verifiedBadge').style.display = '{"inline-flex" if data['verified'] else "none"}';
-    """)
-
     return data
 
 
-async def manipulate_instagram(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
+async def manipulate_twitter(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
     """
-    Aplica manipulações específicas em um post autêntico do Instagram.
+    Aplica manipulações específicas em um post autêntico do Twitter.
 
-    Esta função cria versões manipuladas de posts originais do Instagram
-    para dataset de treinamento de detecção de conteúdo manipulado.
-    As alterações simulam modificações típicas em screenshots fraudulentos.
+    Esta função cria versões manipuladas de tweets originais para treinar
+    modelos de detecção de conteúdo falso. As manipulações simulam alterações
+    comuns feitas em screenshots para desinformação ou fraude.
 
     Tipos de manipulação disponíveis:
-    - 'metrics_change': Altera apenas o número de curtidas
-    - 'caption_change': Substitui a legenda por outra diferente
-    - 'verification_change': Adiciona/remove o badge de verificação
-    - 'username_change': Modifica o username do perfil
-    - 'combined': Aplica múltiplas alterações em conjunto
+    - 'metrics_change': Altera números de curtidas, retweets e visualizações
+    - 'text_change': Substitui o texto do tweet por outro conteúdo
+    - 'verification_change': Adiciona/remove o selo de verificação
+    - 'username_change': Modifica ligeiramente o username
+    - 'combined': Combina múltiplas alterações simultaneamente
 
     Args:
         page (Page): Instância da página do Playwright para renderização
-        original_data (Dict): Dados originais do post autêntico
+        original_data (Dict): Dados originais do tweet autêntico
         manipulation_type (str): Tipo de manipulação a ser aplicada
 
     Returns:
@@ -138,14 +103,39 @@ async def manipulate_instagram(page: Page, original_data: Dict, manipulation_typ
 
     Exemplo:
         async def exemplo():
-            manipulated = await manipulate_instagram(page, original, 'caption_change')
-            # Caption foi substituída por uma diferente da lista
+            manipulated = await manipulate_twitter(page, original, 'metrics_change')
+            # Métricas alteradas em ±20-50% dos valores originais
+    """
+
+    data = manipulate_twitter_data(original_data, manipulation_type)
+
+    # Carregar template e aplicar dados manipulados
+    await render_post(page, 'twitter', data)
+
+    return data
+
+
+def manipulate_instagram_data(original_data: Dict, manipulation_type: str,
+                              factor: Optional[float] = None) -> Dict:
+    """
+    Aplica a manipulação aos dados (spec) de um post do Instagram, sem renderizar.
+
+    Args:
+        original_data (Dict): Dados originais do post autêntico
+        manipulation_type (str): Tipo de manipulação (ver manipulate_instagram)
+        factor (float, optional): Fator aplicado às métricas em 'metrics_change'.
+                                  Se None, sorteia entre 0,5 e 1,5
+
+    Returns:
+        Dict: Cópia dos dados com a manipulação aplicada
     """
 
     data = original_data.copy()
+    data.pop('clip', None)
 
     if manipulation_type == "metrics_change":
-        factor = random.uniform(0.5, 1.5)
+        if factor is None:
+            factor = random.uniform(0.5, 1.5)
         data['like_count'] = int(data['like_count'] * factor)
 
     elif manipulation_type == "caption_change":
@@ -186,44 +176,27 @@ async def manipulate_instagram(page: Page, original_data: Dict, manipulation_typ
             new_caption = generate_instagram_caption()
         data['caption'] = new_caption
 
-    # Carregar template e aplicar dados manipulados
-    template_path = TEMPLATES_DIR / "instagram.html"
-    await page.goto(f"file:///{template_path.absolute()}")
-
-    comments_text = f"Ver todos os {data['comment_count']} comentários" if data['comment_count'] > 1 else "Ver comentário"
-
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{data['initials']}';
-        document.getElementById('avatar').style.backgroundColor = '{data['avatar_color']}';
-        document.getElementById('username').textContent = '{data['username']}';
-        document.getElementById('captionUsername').textContent = '{data['username']}';
-        document.getElementById('captionText').textContent = '{data['caption']}';
-        document.getElementById('likeCount').textContent = '{format_number(data['like_count'])}';
-        document.getElementById('viewComments').textContent = '{comments_text}';
-        document.getElementById('timestamp').textContent = '{data['timestamp']}';
-        document.getElementById('verifiedBadge').style.display = '{"inline-flex" if data['verified'] else "none"}';
-    """)
-
     return data
 
 
-async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
+async def manipulate_instagram(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
     """
-    Aplica manipulações específicas em uma conversa autêntica do WhatsApp.
+    Aplica manipulações específicas em um post autêntico do Instagram.
 
-    Esta função cria versões manipuladas de conversas originais do WhatsApp
-    para treinar modelos de detecção de screenshots alterados. As modificações
-    simulam alterações comuns em conversas falsificadas.
+    Esta função cria versões manipuladas de posts originais do Instagram
+    para dataset de treinamento de detecção de conteúdo manipulado.
+    As alterações simulam modificações típicas em screenshots fraudulentos.
 
     Tipos de manipulação disponíveis:
-    - 'message_change': Substitui toda a conversa por mensagens diferentes
-    - 'contact_change': Altera o nome do contato no cabeçalho
-    - 'time_change': Mensagens recebem novos horários na recriação
-    - 'combined': Combina alteração de contato e mensagens
+    - 'metrics_change': Altera apenas o número de curtidas
+    - 'caption_change': Substitui a legenda por outra diferente
+    - 'verification_change': Adiciona/remove o badge de verificação
+    - 'username_change': Modifica o username do perfil
+    - 'combined': Aplica múltiplas alterações em conjunto
 
     Args:
         page (Page): Instância da página do Playwright para renderização
-        original_data (Dict): Dados originais da conversa autêntica
+        original_data (Dict): Dados originais do post autêntico
         manipulation_type (str): Tipo de manipulação a ser aplicada
 
     Returns:
@@ -231,11 +204,32 @@ async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type
 
     Exemplo:
         async def exemplo():
-            manipulated = await manipulate_whatsapp(page, original, 'contact_change')
-            print(manipulated['contact_name'])  # 'Pedro Lima' (nome diferente do original)
+            manipulated = await manipulate_instagram(page, original, 'caption_change')
+            # Caption foi substituída por uma diferente da lista
+    """
+
+    data = manipulate_instagram_data(original_data, manipulation_type)
+
+    # Carregar template e aplicar dados manipulados
+    await render_post(page, 'instagram', data)
+
+    return data
+
+
+def manipulate_whatsapp_data(original_data: Dict, manipulation_type: str) -> Dict:
+    """
+    Aplica a manipulação aos dados (spec) de uma conversa do WhatsApp, sem renderizar.
+
+    Args:
+        original_data (Dict): Dados originais do post autêntico
+        manipulation_type (str): Tipo de manipulação (ver manipulate_whatsapp)
+
+    Returns:
+        Dict: Cópia dos dados com a manipulação aplicada
     """
 
     data = original_data.copy()
+    data.pop('clip', None)
 
     if manipulation_type == "message_change":
         # Garantir que as mensagens sejam diferentes das originais
@@ -243,6 +237,7 @@ async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type
         while new_messages == original_data['messages']:
             new_messages = generate_whatsapp_messages()
         data['messages'] = new_messages
+        data['times'] = generate_message_times(new_messages)
 
     elif manipulation_type == "contact_change":
         # Alterar nome do contato
@@ -250,9 +245,8 @@ async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type
         data['initials'] = get_initials(data['contact_name'])
 
     elif manipulation_type == "time_change":
-        # Os horários são automaticamente regenerados quando as mensagens são recriadas
-        # Cada mensagem receberá um novo horário aleatório via generate_time()
-        pass
+        # Cada mensagem recebe um novo horário aleatório via generate_time()
+        data['times'] = generate_message_times(data['messages'])
 
     elif manipulation_type == "combined":
         # Ideia Descartada
@@ -263,26 +257,42 @@ async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type
         while new_messages == original_data['messages']:
             new_messages = generate_whatsapp_messages()
         data['messages'] = new_messages
+        data['times'] = generate_message_times(new_messages)
+
+    return data
+
+
+async def manipulate_whatsapp(page: Page, original_data: Dict, manipulation_type: str) -> Dict:
+    """
+    Aplica manipulações específicas em uma conversa autêntica do WhatsApp.
+
+    Esta função cria versões manipuladas de conversas originais do WhatsApp
+    para treinar modelos de detecção de screenshots alterados. As modificações
+    simulam alterações comuns em conversas falsificadas.
+
+    Tipos de manipulação disponíveis:
+    - 'message_change': Substitui toda a conversa por mensagens diferentes
+    - 'contact_change': Altera o nome do contato no cabeçalho
+    - 'time_change': Mensagens recebem novos horários
+    - 'combined': Combina alteração de contato e mensagens
+
+    Args:
+        page (Page): Instância da página do Playwright para renderização
+        original_data (Dict): Dados originais da conversa autêntica
+        manipulation_type (str): Tipo de manipulação a ser aplicada
+
+    Returns:
+        Dict: Dados modificados após aplicação da manipulação
+
+    Exemplo:
+        async def exemplo():
+            manipulated = await manipulate_whatsapp(page, original, 'contact_change')
+            print(manipulated['contact_name'])  # 'Pedro Lima' (nome diferente do original)
+    """
+
+    data = manipulate_whatsapp_data(original_data, manipulation_type)
 
     # Carregar template e aplicar dados manipulados
-    template_path = TEMPLATES_DIR / "whatsapp.html"
-    await page.goto(f"file:///{template_path.absolute()}")
-
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{data['initials']}';
-        document.getElementById('avatar').style.backgroundColor = '{data['avatar_color']}';
-        document.getElementById('contactName').textContent = '{data['contact_name']}';
-        document.getElementById('dateBadge').textContent = '{data['date_badge']}';
-    """)
-
-    # Adicionar mensagens
-    for msg_text, msg_type in data['messages']:
-        time = generate_time()
-        escaped_text = msg_text.replace("'", "\\'").replace('"', '\\"')
-        await page.evaluate(f"""
-            const container = document.getElementById('messagesContainer');
-            const msg = createMessage('{escaped_text}', '{time}', '{msg_type}');
-            container.appendChild(msg);
-        """)
+    await render_post(page, 'whatsapp', data)
 
     return data
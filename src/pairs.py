@@ -0,0 +1,220 @@
+"""
+Pares e trios (autêntico, manipulado) indexados para detectores siameses e de diferença
+"""
+
+import csv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from .config import (
+    SEED,
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    LABELS_PATH,
+    DELTA_DIR,
+    PAIR_PREFETCH,
+    PAIR_WORKERS
+)
+from .delta import delta_path, reconstruct_image
+from .image_cache import SharedImageCache
+
+
+class PairIndex:
+    """
+    Índice compacto de grupos pai/filho do labels.csv.
+
+    As linhas são ordenadas uma única vez por original_filename (o
+    autêntico primeiro em cada grupo). Ficam só arrays int32: o pai de
+    cada grupo, os filhos concatenados e os offsets de cada grupo nesse
+    array, mais o grupo de cada filho. Assim o par k é
+    (parents[child_group[k]], children[k]) e os filhos do grupo g são
+    children[child_offsets[g]:child_offsets[g + 1]], sem filtrar o CSV.
+
+    Grupos sem o autêntico no labels.csv ou sem nenhum manipulado ficam
+    de fora.
+
+    Exemplo:
+        >>> index = PairIndex.from_csv()
+        >>> len(index), index.groups
+        (180, 60)
+        >>> parent, child = index.pair(0)
+        >>> index.labels[parent]['filename'], index.labels[child]['filename']
+        ('instagram_000.png', 'instagram_000_manip_1.png')
+    """
+
+    def __init__(self, labels: Sequence[Dict]):
+        self.labels = list(labels)
+        count = len(self.labels)
+
+        codes: Dict[str, int] = {}
+        groups = np.fromiter((codes.setdefault(label['original_filename'], len(codes)) for label in self.labels),
+                             dtype=np.int64, count=count)
+        is_parent = np.fromiter((label['filename'] == label['original_filename'] for label in self.labels),
+                                dtype=bool, count=count)
+
+        # Ordena por grupo, com o autêntico na primeira posição de cada um
+        order = np.lexsort((~is_parent, groups))
+        offsets = np.searchsorted(groups[order], np.arange(len(codes) + 1))
+        first = order[offsets[:-1]]
+        keep = is_parent[first] & (np.diff(offsets) > 1)
+
+        starts, ends = offsets[:-1][keep] + 1, offsets[1:][keep]
+        sizes = ends - starts
+        self.parents = first[keep].astype(np.int32)
+        self.child_offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        positions = np.repeat(starts - self.child_offsets[:-1], sizes) + np.arange(sizes.sum())
+        self.children = order[positions].astype(np.int32)
+        self.child_group = np.repeat(np.arange(len(self.parents)), sizes).astype(np.int32)
+
+    @classmethod
+    def from_csv(cls, labels_path: Path = LABELS_PATH) -> 'PairIndex':
+        """
+        Monta o índice a partir do labels.csv.
+        """
+        with open(labels_path, newline='', encoding='utf-8') as f:
+            return cls(list(csv.DictReader(f)))
+
+    def __len__(self) -> int:
+        return len(self.children)
+
+    @property
+    def groups(self) -> int:
+        return len(self.parents)
+
+    def pair(self, k: int) -> Tuple[int, int]:
+        """
+        Linhas (autêntico, manipulado) do par k.
+        """
+        return int(self.parents[self.child_group[k]]), int(self.children[k])
+
+    def triplet(self, k: int, rng: np.random.Generator) -> Tuple[int, int, int]:
+        """
+        Linhas (autêntico, manipulado, autêntico de outro post) do trio k.
+
+        O negativo é sorteado entre os demais grupos, sem repetição do
+        grupo do par (exige pelo menos dois grupos).
+        """
+        parent, child = self.pair(k)
+        group = int(self.child_group[k])
+        other = (group + int(rng.integers(1, self.groups))) % self.groups
+        return parent, child, int(self.parents[other])
+
+    def children_of(self, group: int) -> np.ndarray:
+        """
+        Linhas dos manipulados de um grupo.
+        """
+        return self.children[self.child_offsets[group]:self.child_offsets[group + 1]]
+
+
+class PairLoader:
+    """
+    Percorre os pares (ou trios) de um PairIndex com embaralhamento e leitura antecipada.
+
+    Cada iteração é uma época: a ordem dos pares é uma permutação sorteada
+    a partir de `seed` e do número da época, e até `prefetch` amostras
+    ficam sendo decodificadas em `workers` threads enquanto o chamador
+    consome as anteriores (a decodificação do PNG libera o GIL).
+
+    As imagens vêm dos PNGs soltos (source='png', opcionalmente por um
+    SharedImageCache) ou do formato delta (source='delta': autênticos em
+    PNG e manipulados reconstruídos a partir do .delta.npz).
+
+    Cada amostra é (autêntico, manipulado, labels) ou, com triplets=True,
+    (autêntico, manipulado, negativo, labels); `labels` traz as linhas do
+    labels.csv de cada imagem.
+
+    Exemplo:
+        loader = PairLoader(source='delta', triplets=True)
+        for epoch in range(3):
+            for anchor, positive, negative, labels in loader:
+                ...
+    """
+
+    def __init__(self, index: Optional[PairIndex] = None, source: str = 'png',
+                 triplets: bool = False, shuffle: bool = True, seed: int = SEED,
+                 prefetch: int = PAIR_PREFETCH, workers: int = PAIR_WORKERS,
+                 cache: Optional[SharedImageCache] = None,
+                 authentic_dir: Path = AUTHENTIC_DIR,
+                 manipulated_dir: Path = MANIPULATED_DIR,
+                 delta_dir: Path = DELTA_DIR):
+        if source not in ('png', 'delta'):
+            raise ValueError(f"Fonte desconhecida: {source}")
+        self.index = index if index is not None else PairIndex.from_csv()
+        if triplets and self.index.groups < 2:
+            raise ValueError("Trios exigem pelo menos dois posts com manipulados")
+        self.source = source
+        self.triplets = triplets
+        self.shuffle = shuffle
+        self.seed = seed
+        self.prefetch = max(1, prefetch)
+        self.workers = workers
+        self.cache = cache
+        self.authentic_dir = authentic_dir
+        self.manipulated_dir = manipulated_dir
+        self.delta_dir = delta_dir
+        self.epoch = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def image(self, row: int) -> np.ndarray:
+        """
+        Pixels RGB de uma linha do labels.csv, da fonte configurada.
+        """
+        label = self.index.labels[row]
+        if label['class'] == 'autentico':
+            path = self.authentic_dir / label['filename']
+        elif self.source == 'delta':
+            return reconstruct_image(delta_path(label['filename'], self.delta_dir), self.authentic_dir)
+        else:
+            path = self.manipulated_dir / label['filename']
+
+        if self.cache is not None:
+            return self.cache.get(path)
+        with Image.open(path) as image:
+            return np.asarray(image.convert('RGB'))
+
+    def _sample(self, rows: Tuple[int, ...]) -> Tuple:
+        images = [self.image(row) for row in rows]
+        return (*images, [self.index.labels[row] for row in rows])
+
+    def __iter__(self) -> Iterator[Tuple]:
+        rng = np.random.default_rng([self.seed, self.epoch])
+        self.epoch += 1
+        order = rng.permutation(len(self.index)) if self.shuffle else np.arange(len(self.index))
+        if self.triplets:
+            rows = (self.index.triplet(k, rng) for k in order)
+        else:
+            rows = (self.index.pair(k) for k in order)
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending: deque = deque()
+        try:
+            for sample_rows in rows:
+                pending.append(executor.submit(self._sample, sample_rows))
+                if len(pending) >= self.prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def batches(self, batch_size: int) -> Iterator[List[Tuple]]:
+        """
+        Agrupa as amostras de uma época em listas de `batch_size` (a última pode ser menor).
+
+        As imagens têm tamanhos diferentes (o recorte segue o conteúdo),
+        então o lote é uma lista; redimensionar ou recortar fica com o
+        código de treino.
+        """
+        batch = []
+        for sample in self:
+            batch.append(sample)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,414 @@
+"""
+Planejamento e execução dos jobs de renderização do dataset
+"""
+
+import asyncio
+import csv
+import os
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from playwright.async_api import Browser, Page
+from .config import (
+    VIEWPORT,
+    CONCURRENCY,
+    POSTS_PER_PLATFORM,
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    MANIPULATION_TYPES,
+    LABELS_PATH,
+    LABEL_SNAPSHOT_EVERY
+)
+from .capture import capture_to_file, clip_label_fields, image_extension, measure_layout
+from .batching import capture_grid, encode_image, measure_grid_layout
+from .rendering import render_post
+from .autotune import ConcurrencyTuner
+from .variants import base_variant, variant_suffix, render_variants
+from .screenshots import (
+    generate_twitter_data,
+    generate_instagram_data,
+    generate_whatsapp_data
+)
+from .manipulations import (
+    manipulate_twitter_data,
+    manipulate_instagram_data,
+    manipulate_whatsapp_data
+)
+
+
+# Plataformas na ordem de geração, com as funções de dados de cada uma
+PLATFORMS = {
+    'twitter': (generate_twitter_data, manipulate_twitter_data),
+    'instagram': (generate_instagram_data, manipulate_instagram_data),
+    'whatsapp': (generate_whatsapp_data, manipulate_whatsapp_data),
+}
+
+
+def make_job(platform_name: str, folder: Path, stem: str, data: Dict, image_class: str,
+             manip_type: str, original_stem: str, variant: Optional[Dict] = None,
+             extension: Optional[str] = None) -> Dict:
+    """
+    Monta o job de renderização de uma imagem.
+
+    Args:
+        platform_name (str): Nome da plataforma
+        folder (Path): Pasta de saída (autenticos/ ou manipulados/)
+        stem (str): Nome do arquivo sem sufixo de variante e extensão
+        data (Dict): Dados (spec) a renderizar
+        image_class (str): 'autentico' ou 'manipulado'
+        manip_type (str): Tipo de manipulação ('none' para autênticos)
+        original_stem (str): Nome (sem extensão) do autêntico de origem
+        variant (Dict, optional): Variante de expand_variants(). Se None, o visual base
+        extension (str, optional): Extensão do arquivo. Se None, a do formato de captura
+
+    Returns:
+        Dict: Job com as chaves 'platform', 'path', 'data', 'variant' e 'label'
+    """
+    variant = variant or base_variant()
+    extension = extension or image_extension()
+    suffix = variant_suffix(variant)
+    path = folder / f"{stem}{suffix}{extension}"
+    return {
+        'platform': platform_name,
+        'path': path,
+        'data': data,
+        'variant': variant,
+        'label': {
+            'filename': path.name,
+            'class': image_class,
+            'manipulation_type': manip_type,
+            'original_filename': f"{original_stem}{suffix}{extension}",
+            'social_network': platform_name,
+            **variant,
+        },
+    }
+
+
+def plan_jobs(platforms: Sequence[str] = tuple(PLATFORMS),
+              posts_per_platform: int = POSTS_PER_PLATFORM,
+              variants: Optional[Sequence[Dict]] = None) -> List[Dict]:
+    """
+    Gera os dados de todos os posts e monta a lista de jobs de renderização.
+
+    Cada job descreve uma imagem: a plataforma, o caminho de saída, os
+    dados (spec) a renderizar e as colunas de label. Como os dados já
+    estão definidos aqui, os jobs podem ser renderizados em qualquer
+    ordem, individualmente ou em grade, com o mesmo resultado.
+
+    Com mais de uma variante (tema/escala/largura), cada imagem gera um
+    job por variante, consecutivos e marcados com o mesmo 'variant_of',
+    para que render_jobs() os capture a partir de um único preenchimento
+    do DOM. A variante base mantém o nome de arquivo normal; o
+    original_filename de um manipulado aponta para o autêntico na mesma
+    variante.
+
+    Args:
+        platforms (Sequence[str]): Plataformas a gerar
+        posts_per_platform (int): Quantidade de posts autênticos por plataforma
+        variants (Sequence[Dict], optional): Variantes de expand_variants(). Se None,
+                                             só o visual base
+
+    Returns:
+        List[Dict]: Jobs com as chaves 'platform', 'path', 'data', 'variant' e 'label'
+                    (e 'variant_of' quando há várias variantes)
+
+    Exemplo:
+        >>> jobs = plan_jobs(['twitter'], posts_per_platform=2)
+        >>> [job['label']['filename'] for job in jobs][:2]
+        ['twitter_000.png', 'twitter_000_manip_1.png']
+    """
+    jobs = []
+    extension = image_extension()
+    variants = list(variants) if variants else [base_variant()]
+    fan_out = len(variants) > 1
+
+    def add_image(platform_name, folder, stem, data, image_class, manip_type, original_stem):
+        for variant in variants:
+            job = make_job(platform_name, folder, stem, data, image_class, manip_type,
+                           original_stem, variant, extension)
+            if fan_out:
+                job['variant_of'] = stem
+            jobs.append(job)
+
+    for platform_name in platforms:
+        generate_func, manipulate_func = PLATFORMS[platform_name]
+
+        for i in range(posts_per_platform):
+            authentic_stem = f"{platform_name}_{i:03d}"
+            original_data = generate_func()
+            add_image(platform_name, AUTHENTIC_DIR, authentic_stem, original_data,
+                      'autentico', 'none', authentic_stem)
+
+            for j, manip_type in enumerate(MANIPULATION_TYPES[platform_name]):
+                add_image(platform_name, MANIPULATED_DIR, f"{authentic_stem}_manip_{j+1}",
+                          manipulate_func(original_data, manip_type),
+                          'manipulado', manip_type, authentic_stem)
+
+    return jobs
+
+
+def post_group(label: Dict) -> str:
+    """
+    Post de origem de uma linha, sem o sufixo de variante: o autêntico, seus
+    manipulados e todas as variantes ficam sempre no mesmo fold.
+    """
+    return Path(label['original_filename']).stem.split('__')[0]
+
+
+def _round_robin(queues: Sequence[deque]) -> Iterator:
+    """
+    Alterna entre as filas, um item de cada por vez, até todas esvaziarem.
+    """
+    queues = [queue for queue in queues if queue]
+    while queues:
+        for queue in queues:
+            yield queue.popleft()
+        queues = [queue for queue in queues if queue]
+
+
+def interleave_jobs(jobs: Sequence[Dict], min_run: int = 1) -> List[Dict]:
+    """
+    Reordena os jobs para que qualquer prefixo da execução seja um dataset balanceado.
+
+    Os jobs são agrupados por post (autêntico, manipulados e variantes,
+    mantidos juntos e na ordem original, com o autêntico primeiro). Os
+    posts se alternam entre as plataformas e, dentro de cada plataforma,
+    entre as combinações de manipulation_type dos posts (relevante
+    quando os posts não têm todos os tipos, como na geração adaptativa).
+    Cada vez de uma plataforma tem pelo menos `min_run` jobs seguidos,
+    para não quebrar os lotes da renderização em grade.
+
+    Args:
+        jobs (Sequence[Dict]): Jobs de plan_jobs() (ou de make_job())
+        min_run (int): Mínimo de jobs consecutivos da mesma plataforma (use o batch_size)
+
+    Returns:
+        List[Dict]: Os mesmos jobs em ordem intercalada
+
+    Exemplo:
+        >>> jobs = interleave_jobs(plan_jobs())
+        >>> [job['label']['filename'] for job in jobs][3:6]
+        ['twitter_000_manip_3.png', 'instagram_000.png', 'instagram_000_manip_1.png']
+    """
+    posts: Dict[tuple, List[Dict]] = {}
+    for job in jobs:
+        posts.setdefault((job['platform'], post_group(job['label'])), []).append(job)
+
+    buckets: Dict[str, Dict[tuple, deque]] = {}
+    for (platform_name, _), post_jobs in posts.items():
+        signature = tuple(sorted({job['label']['manipulation_type'] for job in post_jobs}))
+        buckets.setdefault(platform_name, {}).setdefault(signature, deque()).append(post_jobs)
+
+    streams = {name: _round_robin(list(by_signature.values())) for name, by_signature in buckets.items()}
+    ordered = []
+    while streams:
+        for platform_name in list(streams):
+            run = 0
+            while run < min_run:
+                post_jobs = next(streams[platform_name], None)
+                if post_jobs is None:
+                    del streams[platform_name]
+                    break
+                ordered.extend(post_jobs)
+                run += len(post_jobs)
+    return ordered
+
+
+class LabelSnapshots:
+    """
+    Publica o labels.csv parcial a cada `every` imagens concluídas.
+
+    Só entram no snapshot linhas consistentes: autênticos e manipulados
+    cujo autêntico (original_filename) já foi concluído; um manipulado
+    que termina antes do seu autêntico espera o próximo snapshot. O
+    arquivo é gravado num temporário e trocado de uma vez (os.replace),
+    então quem lê o labels.csv durante a geração nunca vê um arquivo pela
+    metade. Junto com interleave_jobs(), cada snapshot é um dataset
+    estratificado por plataforma e tipo de manipulação.
+
+    Exemplo:
+        snapshots = LabelSnapshots(every=50)
+        await render_jobs(browser, jobs, on_rows=lambda batch, rows: snapshots.add(rows))
+        snapshots.publish()
+    """
+
+    def __init__(self, path: Path = LABELS_PATH, every: int = LABEL_SNAPSHOT_EVERY):
+        self.path = path
+        self.every = every
+        self.rows: List[Dict] = []
+        self.published = 0
+        self._pending = 0
+
+    def add(self, rows: Sequence[Dict]) -> None:
+        """
+        Registra linhas concluídas, publicando um snapshot a cada `every` imagens (0 = nunca).
+        """
+        self.rows.extend(rows)
+        self._pending += len(rows)
+        if self.every and self._pending >= self.every:
+            self.publish()
+
+    def consistent_rows(self) -> List[Dict]:
+        """
+        Linhas concluídas cujo autêntico de origem também já foi concluído.
+        """
+        authentic = {row['filename'] for row in self.rows if row['class'] == 'autentico'}
+        return [row for row in self.rows if row['class'] == 'autentico' or row['original_filename'] in authentic]
+
+    def publish(self) -> int:
+        """
+        Grava o snapshot atual de forma atômica.
+
+        Returns:
+            int: Linhas publicadas
+        """
+        rows = self.consistent_rows()
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, self.path)
+        self.published = len(rows)
+        self._pending = 0
+        return len(rows)
+
+
+async def render_job(page: Page, job: Dict) -> Dict:
+    """
+    Renderiza e captura um único job.
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        job (Dict): Job retornado por plan_jobs()
+
+    Returns:
+        Dict: Linha do labels.csv (label do job + caixa de recorte). As caixas
+              dos elementos medidas na página ficam em job['layout']
+    """
+    await render_post(page, job['platform'], job['data'])
+    box = await capture_to_file(page, job['platform'], str(job['path']))
+    job['layout'] = await measure_layout(page, job['platform'], box)
+    return {**job['label'], **clip_label_fields(box)}
+
+
+async def render_job_batch(page: Page, jobs: List[Dict]) -> List[Dict]:
+    """
+    Renderiza um lote de jobs da mesma plataforma numa única captura em grade.
+
+    Se os jobs forem variantes de uma mesma imagem ('variant_of'), o post
+    é preenchido uma vez e cada variante é capturada em seguida. Como em
+    render_job(), o layout de cada post fica em job['layout'].
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        jobs (List[Dict]): Jobs da mesma plataforma
+
+    Returns:
+        List[Dict]: Linhas do labels.csv, na mesma ordem dos jobs
+    """
+    if jobs[0].get('variant_of') is not None:
+        return await render_variants(page, jobs)
+    if len(jobs) == 1:
+        return [await render_job(page, jobs[0])]
+
+    platform = jobs[0]['platform']
+    slices = await capture_grid(page, platform, [job['data'] for job in jobs])
+    layouts = await measure_grid_layout(page, platform, [box for _, box in slices])
+
+    rows = []
+    for job, (image, box), layout in zip(jobs, slices, layouts):
+        Path(job['path']).write_bytes(encode_image(image))
+        job['layout'] = layout
+        rows.append({**job['label'], **clip_label_fields(box)})
+    return rows
+
+
+async def render_jobs(browser: Browser, jobs: List[Dict],
+                      batch_size: int = 1,
+                      concurrency: int = CONCURRENCY,
+                      tuner: Optional[ConcurrencyTuner] = None,
+                      on_rows: Optional[Callable[[List[Dict], List[Dict]], None]] = None) -> List[Dict]:
+    """
+    Renderiza jobs em várias páginas simultâneas.
+
+    Os jobs são agrupados em lotes de batch_size (mesma plataforma) e
+    distribuídos entre até `concurrency` páginas. Variantes de uma mesma
+    imagem ('variant_of') formam sempre um lote próprio, renderizado uma
+    vez e capturado em cada variante. Com um `tuner`, a
+    quantidade de páginas segue tuner.limit, que é reajustado a cada
+    lote concluído.
+
+    Args:
+        browser (Browser): Browser do Playwright já iniciado
+        jobs (List[Dict]): Jobs retornados por plan_jobs()
+        batch_size (int): Posts por captura em grade (1 = um por captura)
+        concurrency (int): Páginas simultâneas (ignorado se houver tuner)
+        tuner (ConcurrencyTuner, optional): Ajusta a concorrência durante a execução
+        on_rows (Callable, optional): Chamado com (jobs do lote, linhas) a cada lote concluído
+
+    Returns:
+        List[Dict]: Linhas do labels.csv na ordem de conclusão
+
+    Exemplo:
+        async def exemplo():
+            rows = await render_jobs(browser, plan_jobs(['twitter']), concurrency=4)
+    """
+    units = []
+    for job in jobs:
+        group = job.get('variant_of')
+        if units and group is not None and units[-1][0].get('variant_of') == group:
+            units[-1].append(job)
+        elif (units and group is None and units[-1][0].get('variant_of') is None
+              and len(units[-1]) < batch_size and units[-1][0]['platform'] == job['platform']):
+            units[-1].append(job)
+        else:
+            units.append([job])
+
+    idle_pages = []
+    running = {}
+    all_rows = []
+
+    def current_limit() -> int:
+        return tuner.limit if tuner is not None else concurrency
+
+    async def collect(done) -> None:
+        for task in done:
+            page, unit = running.pop(task)
+            rows = task.result()
+            idle_pages.append(page)
+            all_rows.extend(rows)
+            if on_rows is not None:
+                on_rows(unit, rows)
+            if tuner is not None:
+                tuner.record(len(rows))
+
+        # Fecha páginas ociosas que sobraram após uma redução da concorrência
+        while idle_pages and len(idle_pages) + len(running) > current_limit():
+            await idle_pages.pop().close()
+
+    if tuner is not None:
+        tuner.start()
+
+    try:
+        for unit in units:
+            while len(running) >= current_limit():
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                await collect(done)
+
+            page = idle_pages.pop() if idle_pages else await browser.new_page(viewport=VIEWPORT)
+            task = asyncio.ensure_future(render_job_batch(page, unit))
+            running[task] = (page, unit)
+
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            await collect(done)
+    finally:
+        if tuner is not None:
+            tuner.finish()
+        for page in idle_pages:
+            await page.close()
+
+    return all_rows
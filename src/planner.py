@@ -0,0 +1,370 @@
+"""
+Modelo de custo calibrado no host e planejamento (dry run) de execuções de geração
+"""
+
+import asyncio
+import json
+import socket
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from playwright.async_api import async_playwright
+from . import config
+from .config import (
+    VIEWPORT,
+    TEMPLATES_DIR,
+    POSTS_PER_PLATFORM,
+    MANIPULATION_TYPES,
+    AUTOTUNE_MAX_CONCURRENCY,
+    AUTOTUNE_MIN_FREE_MEMORY_MB,
+    PLANNER_SAMPLE_POSTS,
+    PLANNER_CONCURRENCY_LEVELS,
+    PLANNER_FORMATS,
+    PLAYWRIGHT_FORMATS,
+    PLANNER_CALIBRATION_PATH
+)
+from .autotune import available_memory_mb
+from .capture import image_extension
+from .pipeline import PLATFORMS, plan_jobs, render_jobs
+
+
+@contextmanager
+def _capture_settings(fmt: str, clip: bool) -> Iterator[None]:
+    """
+    Troca temporariamente o formato e o recorte usados pela captura.
+    """
+    saved = config.CAPTURE_FORMAT, config.CLIP_TO_CONTAINER
+    config.CAPTURE_FORMAT, config.CLIP_TO_CONTAINER = fmt, clip
+    try:
+        yield
+    finally:
+        config.CAPTURE_FORMAT, config.CLIP_TO_CONTAINER = saved
+
+
+def _sample_jobs(jobs: Sequence[Dict], folder: Path, fmt: str) -> List[Dict]:
+    """
+    Cópias dos jobs gravando numa pasta temporária, com a extensão do formato.
+    """
+    extension = image_extension(fmt)
+    return [{**job, 'path': folder / f"{Path(job['path']).stem}{extension}"} for job in jobs]
+
+
+async def _measure(work: Awaitable, baseline_mb: Optional[float]) -> Tuple[float, Optional[float]]:
+    """
+    Executa `work` medindo o tempo de parede e o pico de memória do host.
+
+    O pico é a queda da memória disponível em relação a `baseline_mb`
+    (medida antes de abrir o browser), amostrada a cada 50 ms; inclui
+    browser, páginas e o próprio processo Python.
+
+    Returns:
+        Tuple[float, Optional[float]]: Segundos e pico em MB (None se não for possível medir)
+    """
+    lowest = baseline_mb
+
+    async def sample() -> None:
+        nonlocal lowest
+        while True:
+            current = available_memory_mb()
+            if current is not None and lowest is not None:
+                lowest = min(lowest, current)
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.ensure_future(sample())
+    start = time.perf_counter()
+    try:
+        await work
+    finally:
+        seconds = time.perf_counter() - start
+        sampler.cancel()
+    return seconds, (baseline_mb - lowest if baseline_mb is not None else None)
+
+
+def backend_formats(formats: Sequence[str] = PLANNER_FORMATS) -> List[str]:
+    """
+    Formatos que o backend de captura configurado consegue gravar (o Playwright não grava webp).
+    """
+    if config.CAPTURE_BACKEND == 'playwright':
+        return [fmt for fmt in formats if fmt in PLAYWRIGHT_FORMATS]
+    return list(formats)
+
+
+def calibration_settings(batch_size: int = 1, variants: Optional[Sequence[Dict]] = None) -> Dict:
+    """
+    Tudo que invalida uma calibração: host, viewport, captura, templates e amostragem.
+    """
+    return {
+        'host': socket.gethostname(),
+        'viewport': dict(VIEWPORT),
+        'backend': config.CAPTURE_BACKEND,
+        'quality': config.CAPTURE_QUALITY,
+        'padding': config.CLIP_PADDING,
+        'batch_size': batch_size,
+        'variants': list(variants) if variants else None,
+        'formats': backend_formats(),
+        'levels': list(PLANNER_CONCURRENCY_LEVELS),
+        'sample_posts': PLANNER_SAMPLE_POSTS,
+        'templates': max((path.stat().st_mtime for path in TEMPLATES_DIR.iterdir()), default=0),
+    }
+
+
+def load_calibration(settings: Dict, path: Path = PLANNER_CALIBRATION_PATH) -> Optional[Dict]:
+    """
+    Lê a última calibração, se ela foi feita com as mesmas configurações.
+    """
+    if not path.exists():
+        return None
+    calibration = json.loads(path.read_text())
+    return calibration if calibration.get('settings') == settings else None
+
+
+def save_calibration(calibration: Dict, path: Path = PLANNER_CALIBRATION_PATH) -> None:
+    """
+    Salva a calibração para os próximos planejamentos neste host.
+    """
+    path.write_text(json.dumps(calibration, indent=2, sort_keys=True))
+
+
+async def calibrate(batch_size: int = 1, variants: Optional[Sequence[Dict]] = None,
+                    samples: int = PLANNER_SAMPLE_POSTS,
+                    formats: Sequence[str] = PLANNER_FORMATS,
+                    levels: Sequence[int] = PLANNER_CONCURRENCY_LEVELS) -> Dict:
+    """
+    Mede o custo de renderização neste host com uma amostra curta por plataforma.
+
+    Para cada plataforma, `samples` posts (autêntico + manipulados) são
+    renderizados numa página em cada modo de captura (formato x recorte),
+    dando segundos e bytes por imagem. Depois, no modo configurado, a
+    vazão e o pico de memória são medidos em cada nível de concorrência
+    (com pelo menos um lote por página). As imagens vão para uma pasta
+    temporária; o dataset não é tocado.
+
+    Args:
+        batch_size (int): Posts por captura em grade, como na geração
+        variants (Sequence[Dict], optional): Variantes de expand_variants(), como na geração
+        samples (int): Posts por plataforma em cada modo de captura
+        formats (Sequence[str]): Formatos medidos (os que o backend não grava são pulados)
+        levels (Sequence[int]): Níveis de concorrência medidos (limitados a AUTOTUNE_MAX_CONCURRENCY)
+
+    Returns:
+        Dict: {'settings', 'startup_seconds', 'platforms': {plataforma: {'modes', 'scaling'}}}
+
+    Exemplo:
+        async def exemplo():
+            calibration = await calibrate()
+            print(calibration['platforms']['twitter']['modes'][0])
+            # {'format': 'png', 'clip': True, 'seconds_per_image': 0.061, 'bytes_per_image': 48213.5}
+    """
+    levels = sorted({1, *(level for level in levels if level <= AUTOTUNE_MAX_CONCURRENCY)})
+    formats = backend_formats(formats)
+    current_mode = config.CAPTURE_FORMAT, config.CLIP_TO_CONTAINER
+    calibration = {'settings': calibration_settings(batch_size, variants), 'platforms': {}}
+    baseline_mb = available_memory_mb()
+
+    async with async_playwright() as p:
+        start = time.perf_counter()
+        browser = await p.chromium.launch(headless=True)
+        calibration['startup_seconds'] = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            folder = Path(tmp_dir)
+            for platform_name in PLATFORMS:
+                jobs = plan_jobs([platform_name], posts_per_platform=max(samples, levels[-1] * batch_size),
+                                 variants=variants)
+                per_post = len(jobs) // max(samples, levels[-1] * batch_size)
+
+                # Aquecimento: cache de templates, fontes e assets fora da medição
+                with _capture_settings(*current_mode):
+                    await render_jobs(browser, _sample_jobs(jobs[:per_post], folder, current_mode[0]),
+                                      batch_size=batch_size)
+
+                modes = []
+                for fmt in formats:
+                    for clip in (True, False):
+                        sample = _sample_jobs(jobs[:samples * per_post], folder, fmt)
+                        with _capture_settings(fmt, clip):
+                            seconds, _ = await _measure(render_jobs(browser, sample, batch_size=batch_size),
+                                                        baseline_mb)
+                        modes.append({
+                            'format': fmt,
+                            'clip': clip,
+                            'seconds_per_image': seconds / len(sample),
+                            'bytes_per_image': sum(job['path'].stat().st_size for job in sample) / len(sample),
+                        })
+
+                scaling = []
+                for level in levels:
+                    sample = _sample_jobs(jobs[:level * batch_size * per_post], folder, current_mode[0])
+                    with _capture_settings(*current_mode):
+                        seconds, memory_mb = await _measure(
+                            render_jobs(browser, sample, batch_size=batch_size, concurrency=level), baseline_mb)
+                    scaling.append({'concurrency': level, 'images_per_second': len(sample) / seconds,
+                                    'memory_mb': memory_mb})
+                    free_mb = available_memory_mb()
+                    if free_mb is not None and free_mb < AUTOTUNE_MIN_FREE_MEMORY_MB:
+                        break
+
+                calibration['platforms'][platform_name] = {'modes': modes, 'scaling': scaling}
+
+        await browser.close()
+
+    return calibration
+
+
+def plan_counts(posts_per_platform: int = POSTS_PER_PLATFORM,
+                variants: Optional[Sequence[Dict]] = None) -> Dict[str, int]:
+    """
+    Imagens por plataforma de uma geração completa, sem gerar os dados.
+    """
+    fan_out = len(variants) if variants else 1
+    return {name: posts_per_platform * (1 + len(MANIPULATION_TYPES[name])) * fan_out for name in PLATFORMS}
+
+
+def _speedup(scaling: List[Dict], concurrency: int) -> float:
+    """
+    Vazão relativa a uma página, interpolada entre os níveis medidos (sem extrapolar).
+    """
+    levels = [entry['concurrency'] for entry in scaling]
+    rates = [entry['images_per_second'] for entry in scaling]
+    return float(np.interp(concurrency, levels, rates)) / rates[0]
+
+
+def memory_model(calibration: Dict) -> Optional[Tuple[float, float]]:
+    """
+    Ajuste linear do pico de memória: base (browser) + custo por página.
+
+    Usa, em cada nível, o maior pico entre as plataformas, já que a
+    geração intercalada mistura os templates.
+
+    Returns:
+        Optional[Tuple[float, float]]: (base_mb, mb_por_pagina), ou None sem medições
+    """
+    peaks: Dict[int, float] = {}
+    for entry in (entry for platform in calibration['platforms'].values() for entry in platform['scaling']):
+        if entry['memory_mb'] is not None:
+            peaks[entry['concurrency']] = max(peaks.get(entry['concurrency'], 0.0), entry['memory_mb'])
+    if not peaks:
+        return None
+    levels, values = np.array(sorted(peaks), dtype=float), np.array([peaks[level] for level in sorted(peaks)])
+    per_page = max(0.0, float(np.polyfit(levels, values, 1)[0])) if len(levels) > 1 else 0.0
+    return max(0.0, float(np.mean(values - per_page * levels))), per_page
+
+
+def predict_run(calibration: Dict, counts: Dict[str, int], fmt: str, clip: bool,
+                concurrency: int) -> Dict:
+    """
+    Prevê tempo, vazão, memória e bytes de uma geração com as configurações dadas.
+
+    O tempo de cada plataforma é imagens x segundos por imagem do modo
+    (formato, recorte) numa página, dividido pelo ganho de vazão medido
+    na concorrência pedida; soma-se a abertura do browser.
+
+    Args:
+        calibration (Dict): Resultado de calibrate()
+        counts (Dict[str, int]): Imagens por plataforma (plan_counts())
+        fmt (str): Formato de captura
+        clip (bool): Recorte no contêiner
+        concurrency (int): Páginas simultâneas
+
+    Returns:
+        Dict: {'format', 'clip', 'concurrency', 'images', 'seconds', 'images_per_second',
+               'peak_memory_mb', 'bytes'}
+
+    Exemplo:
+        >>> predict_run(calibration, plan_counts(1000), 'webp', True, 4)
+        {'format': 'webp', 'clip': True, 'concurrency': 4, 'images': 12000, 'seconds': 311.4, ...}
+    """
+    seconds = calibration['startup_seconds']
+    total_bytes = 0.0
+    for name, images in counts.items():
+        platform = calibration['platforms'][name]
+        mode = next(mode for mode in platform['modes'] if mode['format'] == fmt and mode['clip'] == clip)
+        seconds += images * mode['seconds_per_image'] / _speedup(platform['scaling'], concurrency)
+        total_bytes += images * mode['bytes_per_image']
+
+    images = sum(counts.values())
+    memory = memory_model(calibration)
+    return {
+        'format': fmt,
+        'clip': clip,
+        'concurrency': concurrency,
+        'images': images,
+        'seconds': seconds,
+        'images_per_second': images / seconds if seconds else 0.0,
+        'peak_memory_mb': memory[0] + memory[1] * concurrency if memory else None,
+        'bytes': total_bytes,
+    }
+
+
+def suggest_settings(calibration: Dict, posts_per_platform: int = POSTS_PER_PLATFORM,
+                     variants: Optional[Sequence[Dict]] = None,
+                     time_budget: Optional[float] = None,
+                     disk_budget: Optional[float] = None,
+                     memory_budget: Optional[float] = None) -> Dict:
+    """
+    Ordena as configurações medidas (concorrência, formato, recorte) da mais rápida para a mais lenta.
+
+    Só entram as concorrências medidas na calibração. O limite de memória
+    padrão é a memória disponível agora menos AUTOTUNE_MIN_FREE_MEMORY_MB.
+    Se nenhuma configuração couber nos orçamentos, 'max_posts' diz
+    quantos posts por plataforma cabem no máximo, e 'max_posts_run' com
+    qual configuração.
+
+    Args:
+        calibration (Dict): Resultado de calibrate()
+        posts_per_platform (int): Posts autênticos por plataforma
+        variants (Sequence[Dict], optional): Variantes de expand_variants()
+        time_budget (float, optional): Segundos disponíveis
+        disk_budget (float, optional): Bytes disponíveis
+        memory_budget (float, optional): MB disponíveis para browser e páginas
+
+    Returns:
+        Dict: {'fits' (previsões dentro dos orçamentos, mais rápida primeiro),
+               'candidates' (todas as previsões), 'max_posts', 'max_posts_run'}
+
+    Exemplo:
+        >>> plan = suggest_settings(calibration, 5000, time_budget=3600, disk_budget=2e9)
+        >>> [(entry['format'], entry['clip'], entry['concurrency']) for entry in plan['fits'][:2]]
+        [('jpeg', True, 4), ('webp', True, 4)]
+    """
+    counts = plan_counts(posts_per_platform, variants)
+    if memory_budget is None:
+        free_mb = available_memory_mb()
+        memory_budget = free_mb - AUTOTUNE_MIN_FREE_MEMORY_MB if free_mb is not None else None
+
+    levels = sorted({entry['concurrency'] for platform in calibration['platforms'].values()
+                     for entry in platform['scaling']})
+    modes = {(mode['format'], mode['clip']) for platform in calibration['platforms'].values()
+             for mode in platform['modes']}
+    candidates = sorted((predict_run(calibration, counts, fmt, clip, level)
+                         for fmt, clip in modes for level in levels),
+                        key=lambda entry: (entry['seconds'], entry['bytes']))
+
+    def within(entry: Dict) -> bool:
+        return ((time_budget is None or entry['seconds'] <= time_budget)
+                and (disk_budget is None or entry['bytes'] <= disk_budget)
+                and (memory_budget is None or entry['peak_memory_mb'] is None
+                     or entry['peak_memory_mb'] <= memory_budget))
+
+    fits = [entry for entry in candidates if within(entry)]
+    if fits or (time_budget is None and disk_budget is None):
+        return {'fits': fits, 'candidates': candidates, 'max_posts': None, 'max_posts_run': None}
+
+    # Nada cabe: quantos posts cabem em cada configuração (tempo e bytes são lineares nos posts)
+    def posts_within(entry: Dict) -> int:
+        posts = max(1, posts_per_platform)
+        limits = []
+        if time_budget is not None:
+            per_post = (entry['seconds'] - calibration['startup_seconds']) / posts
+            limits.append((time_budget - calibration['startup_seconds']) / per_post)
+        if disk_budget is not None:
+            limits.append(disk_budget / (entry['bytes'] / posts))
+        return max(0, int(min(limits)))
+
+    feasible = [entry for entry in candidates if memory_budget is None or entry['peak_memory_mb'] is None
+                or entry['peak_memory_mb'] <= memory_budget] or candidates
+    best = max(feasible, key=posts_within)  # empate: a mais rápida
+    return {'fits': fits, 'candidates': candidates, 'max_posts': posts_within(best), 'max_posts_run': best}
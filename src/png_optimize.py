@@ -0,0 +1,334 @@
+"""
+Recodificação sem perdas dos PNGs do dataset (paleta quando possível, busca de filtro e zlib)
+"""
+
+import io
+import os
+import struct
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from .config import (
+    AUTHENTIC_DIR,
+    MANIPULATED_DIR,
+    TEMPLATE_FILES,
+    PNG_OPTIMIZE_FILTERS,
+    PNG_OPTIMIZE_STRATEGIES
+)
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Código de cada filtro no byte inicial das linhas ('adaptive' escolhe um por linha)
+FILTER_TYPES = {'none': 0, 'sub': 1, 'up': 2, 'average': 3, 'paeth': 4}
+
+ZLIB_STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'rle': zlib.Z_RLE,
+}
+
+# Tipos de cor do IHDR
+COLOR_GRAY, COLOR_RGB, COLOR_PALETTE, COLOR_RGBA = 0, 2, 3, 6
+
+# Modos do Pillow lidos sem perda como RGBA de 8 bits
+SUPPORTED_MODES = ('RGB', 'RGBA', 'P', 'L', 'LA')
+
+
+def png_chunk(tag: bytes, data: bytes) -> bytes:
+    """
+    Chunk PNG completo (tamanho, tipo, dados e CRC).
+    """
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def filter_rows(raw: np.ndarray, bpp: int) -> Dict[str, np.ndarray]:
+    """
+    Aplica os cinco filtros do PNG a todas as linhas de uma vez.
+
+    Os filtros dependem só dos bytes originais (vizinho à esquerda, acima
+    e acima à esquerda), então cada um é uma operação vetorizada sobre a
+    imagem inteira.
+
+    Args:
+        raw (np.ndarray): Bytes das linhas (altura, bytes por linha), uint8
+        bpp (int): Bytes por pixel (distância do vizinho à esquerda)
+
+    Returns:
+        Dict[str, np.ndarray]: Linhas filtradas (uint8) por nome de filtro
+    """
+    raw = raw.astype(np.int16)
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up = np.zeros_like(raw)
+    up[1:] = raw[:-1]
+    up_left = np.zeros_like(raw)
+    up_left[1:, bpp:] = raw[:-1, :-bpp]
+
+    estimate = left + up - up_left
+    dist_left, dist_up, dist_corner = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - up_left)
+    paeth = np.where((dist_left <= dist_up) & (dist_left <= dist_corner), left,
+                     np.where(dist_up <= dist_corner, up, up_left))
+
+    filtered = {
+        'none': raw,
+        'sub': raw - left,
+        'up': raw - up,
+        'average': raw - ((left + up) >> 1),
+        'paeth': raw - paeth,
+    }
+    return {name: (rows & 0xFF).astype(np.uint8) for name, rows in filtered.items()}
+
+
+def filtered_stream(raw: np.ndarray, bpp: int, filter_name: str,
+                    filtered: Optional[Dict[str, np.ndarray]] = None) -> bytes:
+    """
+    Dados do IDAT antes da compressão: cada linha precedida do tipo de filtro.
+
+    Com filter_name='adaptive', cada linha usa o filtro de menor soma dos
+    valores absolutos (com sinal), a heurística da libpng.
+
+    Args:
+        raw (np.ndarray): Bytes das linhas (altura, bytes por linha), uint8
+        bpp (int): Bytes por pixel
+        filter_name (str): 'none', 'sub', 'up', 'average', 'paeth' ou 'adaptive'
+        filtered (Dict[str, np.ndarray], optional): Resultado de filter_rows() já calculado
+
+    Returns:
+        bytes: Linhas filtradas prontas para o zlib
+    """
+    filtered = filtered or filter_rows(raw, bpp)
+    if filter_name == 'adaptive':
+        names = list(FILTER_TYPES)
+        stack = np.stack([filtered[name] for name in names])
+        cost = np.where(stack < 128, stack, 256 - stack.astype(np.int16)).sum(axis=2)
+        choice = cost.argmin(axis=0)
+        rows = stack[choice, np.arange(raw.shape[0])]
+        types = np.array([FILTER_TYPES[name] for name in names], dtype=np.uint8)[choice]
+    else:
+        rows = filtered[filter_name]
+        types = np.full(raw.shape[0], FILTER_TYPES[filter_name], dtype=np.uint8)
+    return np.concatenate([types[:, None], rows], axis=1).tobytes()
+
+
+def pack_indices(indices: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Empacota índices de paleta em 1, 2 ou 4 bits por pixel (linhas completadas com zeros).
+
+    Args:
+        indices (np.ndarray): Índices (altura, largura), uint8
+        bits (int): Bits por pixel (1, 2, 4 ou 8)
+
+    Returns:
+        np.ndarray: Bytes das linhas (altura, bytes por linha)
+    """
+    if bits == 8:
+        return indices
+    per_byte = 8 // bits
+    height, width = indices.shape
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    groups = padded.reshape(height, -1, per_byte)
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * bits
+    return (groups << shifts).sum(axis=2, dtype=np.uint16).astype(np.uint8)
+
+
+def image_layouts(pixels: np.ndarray) -> List[Dict]:
+    """
+    Representações PNG sem perda possíveis para uma imagem RGBA.
+
+    Sempre inclui RGB (ou RGBA, se houver transparência); acrescenta tons
+    de cinza quando R = G = B em todos os pixels e paleta (1 a 8 bits,
+    com tRNS para transparência) quando há no máximo 256 cores.
+
+    Args:
+        pixels (np.ndarray): Pixels (altura, largura, 4), uint8
+
+    Returns:
+        List[Dict]: {'color_type', 'bit_depth', 'raw', 'bpp', 'chunks', 'colors'}
+    """
+    opaque = bool((pixels[..., 3] == 255).all())
+    packed = pixels.view(np.uint32).reshape(pixels.shape[:2])
+    colors, inverse = np.unique(packed, return_inverse=True)
+    height = pixels.shape[0]
+
+    channels = 3 if opaque else 4
+    layouts = [{
+        'color_type': COLOR_RGB if opaque else COLOR_RGBA,
+        'bit_depth': 8,
+        'raw': pixels[..., :channels].reshape(height, -1),
+        'bpp': channels,
+        'chunks': [],
+        'colors': len(colors),
+    }]
+
+    if opaque and (pixels[..., 0] == pixels[..., 1]).all() and (pixels[..., 1] == pixels[..., 2]).all():
+        layouts.append({'color_type': COLOR_GRAY, 'bit_depth': 8, 'raw': pixels[..., 0],
+                        'bpp': 1, 'chunks': [], 'colors': len(colors)})
+
+    if len(colors) <= 256:
+        palette = colors.view(np.uint8).reshape(-1, 4)
+        bits = next(bits for bits in (1, 2, 4, 8) if len(colors) <= 1 << bits)
+        indices = inverse.reshape(pixels.shape[:2]).astype(np.uint8)
+        chunks = [(b'PLTE', palette[:, :3].tobytes())]
+        if not opaque:
+            alpha = palette[:, 3]
+            last = np.nonzero(alpha != 255)[0][-1]
+            chunks.append((b'tRNS', alpha[:last + 1].tobytes()))
+        layouts.append({'color_type': COLOR_PALETTE, 'bit_depth': bits, 'raw': pack_indices(indices, bits),
+                        'bpp': 1, 'chunks': chunks, 'colors': len(colors)})
+
+    return layouts
+
+
+def encode_png(layout: Dict, width: int, height: int, filter_name: str, strategy: str,
+               filtered: Optional[Dict[str, np.ndarray]] = None) -> bytes:
+    """
+    Codifica uma representação de image_layouts() com um filtro e uma estratégia do zlib.
+
+    Returns:
+        bytes: Arquivo PNG completo (nível 9 de compressão, sem chunks auxiliares)
+    """
+    stream = filtered_stream(layout['raw'], layout['bpp'], filter_name, filtered)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, ZLIB_STRATEGIES[strategy])
+    idat = compressor.compress(stream) + compressor.flush()
+
+    header = struct.pack('>IIBBBBB', width, height, layout['bit_depth'], layout['color_type'], 0, 0, 0)
+    return (PNG_SIGNATURE + png_chunk(b'IHDR', header)
+            + b''.join(png_chunk(tag, data) for tag, data in layout['chunks'])
+            + png_chunk(b'IDAT', idat) + png_chunk(b'IEND', b''))
+
+
+def decode_rgba(data: bytes) -> np.ndarray:
+    """
+    Decodifica um PNG para pixels RGBA de 8 bits.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return np.asarray(image.convert('RGBA'))
+
+
+def optimize_png(data: bytes,
+                 filters: Sequence[str] = PNG_OPTIMIZE_FILTERS,
+                 strategies: Sequence[str] = PNG_OPTIMIZE_STRATEGIES) -> Tuple[bytes, Dict]:
+    """
+    Recodifica um PNG sem perdas na menor combinação de representação, filtro e zlib.
+
+    Cada representação de image_layouts() (RGB/RGBA, cinza, paleta) é
+    comprimida com todos os filtros e estratégias pedidos. A menor
+    candidata é decodificada e comparada pixel a pixel com a original;
+    só é aceita se for idêntica e menor que o arquivo atual, senão os
+    bytes originais são devolvidos.
+
+    Args:
+        data (bytes): Arquivo PNG original
+        filters (Sequence[str]): Filtros testados (ver FILTER_TYPES e 'adaptive')
+        strategies (Sequence[str]): Estratégias do zlib testadas ('default', 'filtered', 'rle')
+
+    Returns:
+        Tuple[bytes, Dict]: Bytes finais e {'before', 'after', 'colors', 'color_type', 'filter',
+                            'strategy', 'changed'}
+
+    Exemplo:
+        >>> data, info = optimize_png(Path('twitter_000.png').read_bytes())
+        >>> info['before'], info['after'], info['filter']
+        (129565, 52840, 'none')
+    """
+    info = {'before': len(data), 'after': len(data), 'colors': None, 'color_type': None,
+            'filter': None, 'strategy': None, 'changed': False}
+
+    with Image.open(io.BytesIO(data)) as image:
+        if image.format != 'PNG' or image.mode not in SUPPORTED_MODES:
+            return data, info
+        pixels = np.ascontiguousarray(np.asarray(image.convert('RGBA')))
+        width, height = image.size
+
+    best = None
+    for layout in image_layouts(pixels):
+        filtered = filter_rows(layout['raw'], layout['bpp'])
+        for filter_name in filters:
+            for strategy in strategies:
+                candidate = encode_png(layout, width, height, filter_name, strategy, filtered)
+                if best is None or len(candidate) < len(best[0]):
+                    best = (candidate, layout, filter_name, strategy)
+
+    candidate, layout, filter_name, strategy = best
+    info.update(colors=layout['colors'], color_type=layout['color_type'], filter=filter_name, strategy=strategy)
+    if len(candidate) >= len(data) or not np.array_equal(decode_rgba(candidate), pixels):
+        return data, info
+
+    info.update(after=len(candidate), changed=True)
+    return candidate, info
+
+
+def _optimize_file(path: str, filters: Sequence[str], strategies: Sequence[str], dry_run: bool) -> Dict:
+    """
+    Tarefa do pool: otimiza um arquivo e o substitui (escrita atômica) se ficou menor.
+    """
+    data, info = optimize_png(Path(path).read_bytes(), filters, strategies)
+    if info['changed'] and not dry_run:
+        tmp_path = f"{path}.tmp"
+        Path(tmp_path).write_bytes(data)
+        os.replace(tmp_path, path)
+    return {'path': path, **info}
+
+
+def platform_of(path: Path) -> str:
+    """
+    Plataforma de uma imagem pelo prefixo do nome do arquivo ('outros' se não reconhecida).
+    """
+    prefix = Path(path).name.split('_', 1)[0]
+    return prefix if prefix in TEMPLATE_FILES else 'outros'
+
+
+def optimize_dataset(image_paths: Optional[Iterable[Path]] = None,
+                     workers: Optional[int] = None,
+                     filters: Sequence[str] = PNG_OPTIMIZE_FILTERS,
+                     strategies: Sequence[str] = PNG_OPTIMIZE_STRATEGIES,
+                     dry_run: bool = False) -> Tuple[Dict[str, Dict], List[Path]]:
+    """
+    Otimiza os PNGs do dataset num pool de processos e resume a economia por plataforma.
+
+    Args:
+        image_paths (Iterable[Path], optional): PNGs a processar. Se None, usa
+                                                autenticos/ e manipulados/
+        workers (int, optional): Processos do pool. Se None, usa os núcleos disponíveis
+        filters (Sequence[str]): Filtros PNG testados
+        strategies (Sequence[str]): Estratégias do zlib testadas
+        dry_run (bool): Se True, só mede (não regrava os arquivos)
+
+    Returns:
+        Tuple[Dict[str, Dict], List[Path]]: Relatório {plataforma: {'files', 'changed',
+            'palette', 'before', 'after'}} e arquivos regravados
+
+    Exemplo:
+        >>> report, changed = optimize_dataset(workers=8)
+        >>> report['twitter']
+        {'files': 80, 'changed': 80, 'palette': 0, 'before': 10365200, 'after': 4227310}
+    """
+    if image_paths is None:
+        image_paths = sorted(path for folder in (AUTHENTIC_DIR, MANIPULATED_DIR)
+                             for path in folder.iterdir() if path.suffix == '.png')
+    paths = [str(path) for path in image_paths]
+
+    report = defaultdict(lambda: {'files': 0, 'changed': 0, 'palette': 0, 'before': 0, 'after': 0})
+    changed = []
+    if paths:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_optimize_file, paths, [filters] * len(paths),
+                                   [strategies] * len(paths), [dry_run] * len(paths),
+                                   chunksize=max(1, len(paths) // 64))
+            for result in results:
+                entry = report[platform_of(result['path'])]
+                entry['files'] += 1
+                entry['before'] += result['before']
+                entry['after'] += result['after']
+                if result['changed']:
+                    entry['changed'] += 1
+                    entry['palette'] += result['color_type'] == COLOR_PALETTE
+                    changed.append(Path(result['path']))
+
+    return dict(report), changed
@@ -0,0 +1,110 @@
+"""
+Rebuild incremental por dependência de template/spec e modo watch
+"""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+from .config import TEMPLATES_DIR, WATCH_INTERVAL
+from .catalog import template_hash, spec_hash
+
+
+def stale_jobs(conn: sqlite3.Connection, jobs: List[Dict]) -> List[Dict]:
+    """
+    Seleciona os jobs cuja imagem precisa ser renderizada de novo.
+
+    Um job está desatualizado quando o catálogo não tem registro dele,
+    quando o hash do template atual ou o hash do spec planejado diferem
+    dos gravados na última renderização, ou quando o arquivo de imagem
+    não existe mais. Imagens catalogadas sem hashes (ex: importadas de
+    um labels.csv antigo) também são consideradas desatualizadas.
+
+    Os jobs retornados recebem a chave 'template_hash' com o hash lido
+    agora, antes da renderização: se o template mudar durante o rebuild,
+    a próxima verificação ainda detecta a diferença.
+
+    Args:
+        conn (sqlite3.Connection): Conexão retornada por open_catalog()
+        jobs (List[Dict]): Jobs retornados por plan_jobs()
+
+    Returns:
+        List[Dict]: Jobs desatualizados, na ordem original
+
+    Exemplo:
+        >>> jobs = plan_jobs()
+        >>> # depois de editar templates/whatsapp.html
+        >>> {job['platform'] for job in stale_jobs(conn, jobs)}
+        {'whatsapp'}
+    """
+    current = {platform: template_hash(platform) for platform in {job['platform'] for job in jobs}}
+    stored = {
+        row['filename']: (row['template_hash'], row['spec_hash'])
+        for row in conn.execute("SELECT filename, template_hash, spec_hash FROM images")
+    }
+
+    stale = []
+    for job in jobs:
+        expected = (current[job['platform']], spec_hash(job['data']))
+        if stored.get(job['label']['filename']) != expected or not Path(job['path']).exists():
+            stale.append({**job, 'template_hash': expected[0]})
+    return stale
+
+
+def template_mtimes(templates_dir: Path = TEMPLATES_DIR) -> Dict[str, int]:
+    """
+    Retorna o mtime (ns) de cada arquivo em templates/.
+
+    Args:
+        templates_dir (Path): Pasta dos templates
+
+    Returns:
+        Dict[str, int]: Caminho relativo -> st_mtime_ns
+    """
+    return {
+        path.relative_to(templates_dir).as_posix(): path.stat().st_mtime_ns
+        for path in templates_dir.rglob('*') if path.is_file()
+    }
+
+
+async def watch_templates(on_change: Callable[[List[str]], Awaitable[None]],
+                          templates_dir: Path = TEMPLATES_DIR,
+                          interval: float = WATCH_INTERVAL) -> None:
+    """
+    Observa templates/ e chama on_change a cada alteração (até ser cancelado).
+
+    A pasta é verificada por polling de mtime a cada `interval` segundos.
+    Depois de detectar uma mudança, espera a pasta ficar estável por um
+    intervalo (editores costumam gravar o arquivo em várias etapas) e
+    só então chama on_change com os arquivos alterados.
+
+    Args:
+        on_change (Callable): Corrotina chamada com a lista de arquivos alterados
+        templates_dir (Path): Pasta dos templates
+        interval (float): Intervalo de verificação em segundos
+
+    Exemplo:
+        async def on_change(changed):
+            print("Alterados:", changed)
+
+        await watch_templates(on_change)
+    """
+    snapshot = template_mtimes(templates_dir)
+
+    while True:
+        await asyncio.sleep(interval)
+        current = template_mtimes(templates_dir)
+        if current == snapshot:
+            continue
+
+        while True:
+            await asyncio.sleep(interval)
+            settled = template_mtimes(templates_dir)
+            if settled == current:
+                break
+            current = settled
+
+        changed = sorted(name for name in current.keys() | snapshot.keys()
+                         if current.get(name) != snapshot.get(name))
+        snapshot = current
+        await on_change(changed)
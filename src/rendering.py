@@ -0,0 +1,178 @@
+"""
+Renderização dos templates a partir dos dados (spec) de um post
+"""
+
+from typing import Dict, List
+from playwright.async_api import Page
+from .config import TEMPLATES_DIR, TEMPLATE_FILES
+from .generators import format_number, generate_time
+from .assets import asset_url
+
+
+# Função JS que preenche um post dentro de `root` (document ou um clone do contêiner).
+# Usa [id="..."] em vez de getElementById para funcionar também em clones.
+APPLY_PAYLOAD_JS = """
+function applyPayload(root, payload) {
+    const el = (id) => root.querySelector(`[id="${id}"]`);
+    for (const [id, value] of Object.entries(payload.text)) {
+        el(id).textContent = value;
+    }
+    for (const [id, color] of Object.entries(payload.background)) {
+        el(id).style.backgroundColor = color;
+    }
+    for (const [id, display] of Object.entries(payload.display)) {
+        el(id).style.display = display;
+    }
+    for (const [id, url] of Object.entries(payload.images)) {
+        el(id).style.background = `center / cover no-repeat url("${url}")`;
+    }
+    if (payload.messages) {
+        const fragment = document.createDocumentFragment();
+        for (const [text, time, type] of payload.messages) {
+            fragment.appendChild(createMessage(text, time, type));
+        }
+        el('messagesContainer').appendChild(fragment);
+    }
+}
+
+// Espera as imagens do pool de assets estarem carregadas antes da captura
+function loadImages(payloads) {
+    const urls = new Set(payloads.flatMap((payload) => Object.values(payload.images)));
+    return Promise.all([...urls].map((url) => {
+        const image = new Image();
+        image.src = url;
+        return image.decode().catch(() => null);
+    }));
+}
+"""
+
+
+def template_url(platform: str) -> str:
+    """
+    Retorna a URL file:// do template de uma plataforma.
+
+    Args:
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+
+    Returns:
+        str: URL do arquivo HTML do template
+    """
+    template_path = TEMPLATES_DIR / TEMPLATE_FILES[platform]
+    return f"file:///{template_path.absolute()}"
+
+
+def build_payload(platform: str, data: Dict) -> Dict:
+    """
+    Converte os dados de um post nos valores a aplicar em cada elemento do template.
+
+    Esta função concentra o mapeamento dado → elemento HTML usado tanto
+    pelos posts autênticos quanto pelos manipulados, e tanto na
+    renderização individual quanto na renderização em grade. Os valores
+    são passados ao browser como argumento (sem interpolar strings no JS).
+
+    Args:
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        data (Dict): Dados do post (retornados por generate_*_data ou manipulate_*_data)
+
+    Returns:
+        Dict: Payload com as chaves 'text', 'background', 'display', 'images' e 'messages'
+
+    Exemplo:
+        >>> payload = build_payload('twitter', data)
+        >>> payload['text']['likeCount']
+        '5.4K'
+    """
+    payload = {
+        'text': {'avatar': data['initials']},
+        'background': {'avatar': data['avatar_color']},
+        'display': {},
+        'images': {},
+        'messages': None,
+    }
+    # Dados gerados antes do pool de assets não têm as chaves de imagem
+    if data.get('avatar_image') is not None:
+        payload['text']['avatar'] = ''
+        payload['images']['avatar'] = asset_url('avatar', data['avatar_image'])
+
+    if platform == 'twitter':
+        payload['text'].update({
+            'displayName': data['name'],
+            'username': data['username'],
+            'timestamp': data['timestamp'],
+            'tweetText': data['text'],
+            'retweetCount': format_number(data['retweet_count']),
+            'quoteCount': format_number(data['quote_count']),
+            'likeCount': format_number(data['like_count']),
+            'viewCount': format_number(data['view_count']),
+            'replyCount': format_number(data['reply_count']),
+            'retweetActionCount': format_number(data['retweet_count']),
+            'likeActionCount': format_number(data['like_count']),
+            'viewActionCount': format_number(data['view_count']),
+        })
+        payload['display']['verifiedBadge'] = 'inline-flex' if data['verified'] else 'none'
+
+    elif platform == 'instagram':
+        comment_count = data['comment_count']
+        comments_text = f"Ver todos os {comment_count} comentários" if comment_count > 1 else "Ver comentário"
+        payload['text'].update({
+            'username': data['username'],
+            'captionUsername': data['username'],
+            'captionText': data['caption'],
+            'likeCount': format_number(data['like_count']),
+            'viewComments': comments_text,
+            'timestamp': data['timestamp'],
+        })
+        payload['display']['verifiedBadge'] = 'inline-flex' if data['verified'] else 'none'
+        if data.get('post_image') is not None:
+            payload['text']['postImage'] = ''
+            payload['images']['postImage'] = asset_url('post', data['post_image'])
+
+    elif platform == 'whatsapp':
+        payload['text'].update({
+            'contactName': data['contact_name'],
+            'dateBadge': data['date_badge'],
+        })
+        payload['messages'] = [
+            [text, time, msg_type]
+            for (text, msg_type), time in zip(data['messages'], data['times'])
+        ]
+
+    else:
+        raise ValueError(f"Plataforma desconhecida: {platform}")
+
+    return payload
+
+
+def generate_message_times(messages: List) -> List[str]:
+    """
+    Gera um horário (HH:MM) para cada mensagem de uma conversa.
+
+    Args:
+        messages (List): Mensagens da conversa (texto, tipo)
+
+    Returns:
+        List[str]: Horários na mesma ordem das mensagens
+    """
+    return [generate_time() for _ in messages]
+
+
+async def render_post(page: Page, platform: str, data: Dict) -> None:
+    """
+    Carrega o template da plataforma e preenche com os dados do post.
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        platform (str): Nome da plataforma ('twitter', 'instagram', 'whatsapp')
+        data (Dict): Dados do post a renderizar
+
+    Exemplo:
+        async def exemplo():
+            data = generate_twitter_data()
+            await render_post(page, 'twitter', data)
+            await page.screenshot(path='tweet.png')
+    """
+    await page.goto(template_url(platform))
+    await page.evaluate(
+        f"async (payload) => {{ {APPLY_PAYLOAD_JS} applyPayload(document, payload); await loadImages([payload]); }}",
+        build_payload(platform, data)
+    )
@@ -0,0 +1,480 @@
+"""
+Serviço local de detecção: modelo treinado a partir do labels.csv, cache de características e micro-lotes
+"""
+
+import asyncio
+import base64
+import csv
+import hashlib
+import io
+import json
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GroupKFold, cross_val_predict
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from .config import (
+    LABELS_PATH,
+    DETECTOR_PATH,
+    SCORING_HOST,
+    SCORING_PORT,
+    SCORING_MAX_BATCH,
+    SCORING_MAX_WAIT_MS,
+    SCORING_CACHE_SIZE,
+    SCORING_STATS_WINDOW,
+    ADAPTIVE_CV_FOLDS
+)
+from .features import image_features, dataset_features
+from .catalog import label_path
+from .pipeline import post_group
+
+
+class Detector:
+    """
+    Classificador softmax sobre as características de features.py, só com NumPy na inferência.
+
+    As classes são os valores de manipulation_type do labels.csv ('none'
+    = autêntico). O score de manipulado é 1 - P('none') e o tipo provável
+    é a classe de manipulação mais provável.
+
+    Exemplo:
+        detector = Detector.load()
+        print(detector.score(X[:2]))
+        # [{'authentic': 0.91, 'manipulated': 0.09, 'label': 'autentico',
+        #   'manipulation_type': 'metrics_change', 'type_score': 0.04}, ...]
+    """
+
+    def __init__(self, classes: Sequence[str], mean: np.ndarray, scale: np.ndarray,
+                 coef: np.ndarray, intercept: np.ndarray):
+        self.classes = [str(name) for name in classes]
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.coef = np.asarray(coef, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self._authentic = self.classes.index('none')
+
+    def save(self, path: Path = DETECTOR_PATH) -> Path:
+        """
+        Grava o modelo em um .npz (sem dependência do scikit-learn para carregar).
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, classes=np.array(self.classes), mean=self.mean, scale=self.scale,
+                 coef=self.coef, intercept=self.intercept)
+        return path
+
+    @classmethod
+    def load(cls, path: Path = DETECTOR_PATH) -> 'Detector':
+        """
+        Carrega um modelo gravado por save().
+        """
+        with np.load(path) as data:
+            return cls(data['classes'], data['mean'], data['scale'], data['coef'], data['intercept'])
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Probabilidades de cada classe para um lote de vetores (uma única multiplicação de matrizes).
+
+        Args:
+            features (np.ndarray): Vetores (N, dimensões)
+
+        Returns:
+            np.ndarray: Probabilidades (N, classes)
+        """
+        logits = ((features - self.mean) / self.scale) @ self.coef.T + self.intercept
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def score(self, features: np.ndarray) -> List[Dict]:
+        """
+        Scores autêntico/manipulado e tipo de manipulação provável de um lote.
+
+        Args:
+            features (np.ndarray): Vetores (N, dimensões)
+
+        Returns:
+            List[Dict]: {'authentic', 'manipulated', 'label', 'manipulation_type', 'type_score'}
+        """
+        probs = self.predict_proba(features)
+        manipulated = 1.0 - probs[:, self._authentic]
+        types = probs.copy()
+        types[:, self._authentic] = -1.0
+        best = types.argmax(axis=1)
+
+        return [
+            {
+                'authentic': round(float(1.0 - score), 4),
+                'manipulated': round(float(score), 4),
+                'label': 'manipulado' if score >= 0.5 else 'autentico',
+                'manipulation_type': self.classes[index],
+                'type_score': round(float(probs[row, index]), 4),
+            }
+            for row, (score, index) in enumerate(zip(manipulated, best))
+        ]
+
+
+def train_detector(labels_path: Path = LABELS_PATH, workers: Optional[int] = None,
+                   folds: int = ADAPTIVE_CV_FOLDS) -> Tuple[Detector, Dict]:
+    """
+    Treina o detector sobre as imagens do labels.csv.
+
+    As características são as mesmas do classificador base da geração
+    adaptativa (dataset_features()). A acurácia é estimada por validação
+    cruzada agrupada por post antes do ajuste final em todas as imagens;
+    os parâmetros da regressão logística e da padronização viram um
+    Detector puro NumPy.
+
+    Args:
+        labels_path (Path): Caminho do labels.csv
+        workers (int, optional): Processos do pool de características
+        folds (int): Máximo de folds da validação cruzada
+
+    Returns:
+        Tuple[Detector, Dict]: Modelo e {'images', 'classes', 'binary_accuracy', 'type_accuracy'}
+
+    Exemplo:
+        >>> detector, metrics = train_detector(workers=8)
+        >>> detector.save()
+    """
+    with open(labels_path, newline='', encoding='utf-8') as f:
+        labels = [row for row in csv.DictReader(f) if label_path(row).exists()]
+
+    features = dataset_features([label_path(label) for label in labels], workers=workers)
+    target = np.array([label['manipulation_type'] for label in labels])
+    groups = [post_group(label) for label in labels]
+
+    model = make_pipeline(StandardScaler(), LogisticRegression(max_iter=3000, class_weight='balanced'))
+    cv = GroupKFold(n_splits=min(folds, len(set(groups))))
+    predicted = cross_val_predict(model, features, target, groups=groups, cv=cv)
+    model.fit(features, target)
+
+    scaler, classifier = model[0], model[-1]
+    coef, intercept = classifier.coef_, classifier.intercept_
+    if len(classifier.classes_) == 2:
+        # Modelo binário: uma linha de pesos vira o par de logits (0, z)
+        coef = np.vstack([np.zeros_like(coef), coef])
+        intercept = np.concatenate([[0.0], intercept])
+
+    detector = Detector(classifier.classes_, scaler.mean_, scaler.scale_, coef, intercept)
+    metrics = {
+        'images': len(labels),
+        'classes': len(detector.classes),
+        'binary_accuracy': float(np.mean((predicted == 'none') == (target == 'none'))),
+        'type_accuracy': float(np.mean(predicted == target)),
+    }
+    return detector, metrics
+
+
+def _features_from_bytes(data: bytes) -> np.ndarray:
+    """
+    Tarefa do pool: decodifica uma imagem enviada e calcula suas características.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return image_features(np.asarray(image.convert('RGB')))
+
+
+class MicroBatcher:
+    """
+    Junta requisições simultâneas em uma única chamada de inferência.
+
+    Cada vetor enviado por submit() entra numa fila; o laço run() espera
+    o primeiro, recolhe os que chegarem em até `max_wait_ms` (no máximo
+    `max_batch`) e pontua todos com um único Detector.score().
+    """
+
+    def __init__(self, detector: Detector, max_batch: int = SCORING_MAX_BATCH,
+                 max_wait_ms: float = SCORING_MAX_WAIT_MS):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, features: np.ndarray) -> Dict:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = self.detector.score(np.stack([features for features, _ in batch]))
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class ScoringService:
+    """
+    Serviço HTTP local que pontua screenshots com o detector.
+
+    Rotas:
+    - POST /score: corpo = bytes de uma imagem; responde um resultado
+    - POST /score/batch: corpo = JSON {"images": [base64, ...]}; responde {"results": [...]}
+    - GET /stats: vazão, latências p50/p95/p99, tamanho médio dos micro-lotes e cache
+
+    As características são calculadas num pool de processos e guardadas
+    num cache LRU indexado pelo conteúdo da imagem; a inferência passa
+    pelo MicroBatcher.
+
+    Exemplo:
+        service = ScoringService(Detector.load(), workers=4)
+        asyncio.run(service.serve('127.0.0.1', 8765))
+        # curl --data-binary @print.png http://127.0.0.1:8765/score
+    """
+
+    STATUS = {200: '200 OK', 400: '400 Bad Request', 404: '404 Not Found'}
+
+    def __init__(self, detector: Detector, workers: Optional[int] = None,
+                 max_batch: int = SCORING_MAX_BATCH,
+                 max_wait_ms: float = SCORING_MAX_WAIT_MS,
+                 cache_size: int = SCORING_CACHE_SIZE,
+                 stats_window: int = SCORING_STATS_WINDOW):
+        self.detector = detector
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_coalesced = 0  # esperaram o cálculo já em andamento de outra requisição
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._requests = deque(maxlen=stats_window)  # (início, fim, imagens)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.batcher: Optional[MicroBatcher] = None
+
+    async def features(self, data: bytes) -> np.ndarray:
+        """
+        Características de uma imagem, pelo cache ou calculadas no pool (uma vez por conteúdo).
+        """
+        key = hashlib.sha1(data).hexdigest()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self._cache_hits += 1
+            return self._cache[key]
+
+        # Requisições simultâneas da mesma imagem esperam o mesmo cálculo
+        if key in self._pending:
+            self._cache_coalesced += 1
+        else:
+            self._cache_misses += 1
+            self._pending[key] = asyncio.get_running_loop().run_in_executor(
+                self._executor, _features_from_bytes, data)
+        try:
+            vector = await self._pending[key]
+        finally:
+            self._pending.pop(key, None)
+        self._cache[key] = vector
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return vector
+
+    async def score_images(self, images: Sequence[bytes]) -> List[Dict]:
+        """
+        Pontua imagens codificadas (PNG, JPEG...), na mesma ordem.
+        """
+        vectors = await asyncio.gather(*(self.features(data) for data in images))
+        return list(await asyncio.gather(*(self.batcher.submit(vector) for vector in vectors)))
+
+    def stats(self) -> Dict:
+        """
+        Vazão e latência das requisições recentes.
+
+        Imagens que chegaram enquanto o mesmo conteúdo ainda era calculado
+        contam em 'cache_coalesced', e não como acerto nem como falta.
+
+        Returns:
+            Dict: {'requests', 'images', 'images_per_second', 'latency_ms': {'p50', 'p95', 'p99'},
+                   'mean_batch', 'cache_hit_rate', 'cache_coalesced'}
+        """
+        requests = list(self._requests)
+        latencies = np.array([(end - start) * 1000 for start, end, _ in requests]) if requests else np.zeros(1)
+        images = sum(count for _, _, count in requests)
+        span = max(end for _, end, _ in requests) - min(start for start, _, _ in requests) if requests else 0.0
+        lookups = self._cache_hits + self._cache_misses + self._cache_coalesced
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            'requests': len(requests),
+            'images': images,
+            'images_per_second': round(images / span, 1) if span > 0 else 0.0,
+            'latency_ms': {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2)},
+            'mean_batch': round(self.batcher.items / self.batcher.batches, 2) if self.batcher and self.batcher.batches else 0.0,
+            'cache_hit_rate': round(self._cache_hits / lookups, 3) if lookups else 0.0,
+            'cache_coalesced': self._cache_coalesced,
+        }
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats()
+        if method == 'POST' and path == '/score':
+            start = time.perf_counter()
+            result = (await self.score_images([body]))[0]
+            self._requests.append((start, time.perf_counter(), 1))
+            return 200, result
+        if method == 'POST' and path == '/score/batch':
+            start = time.perf_counter()
+            images = [base64.b64decode(image) for image in json.loads(body)['images']]
+            results = await self.score_images(images)
+            self._requests.append((start, time.perf_counter(), len(images)))
+            return 200, {'results': results}
+        return 404, {'error': f"rota desconhecida: {method} {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Atende as requisições HTTP/1.1 de uma conexão (keep-alive).
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as error:
+                    status, payload = 400, {'error': f"{type(error).__name__}: {error}"}
+
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {self.STATUS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = SCORING_HOST, port: int = SCORING_PORT,
+                    ready: Optional[asyncio.Event] = None) -> None:
+        """
+        Inicia o pool, o laço de micro-lotes e o servidor HTTP (até ser cancelado).
+
+        Args:
+            host (str): Endereço de escuta
+            port (int): Porta de escuta
+            ready (asyncio.Event, optional): Sinalizado quando o servidor aceita conexões
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.batcher = MicroBatcher(self.detector, self.max_batch, self.max_wait_ms)
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self._handle, host, port)
+        try:
+            async with server:
+                if ready is not None:
+                    ready.set()
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+            self._executor.shutdown(cancel_futures=True)
+
+
+async def http_request(host: str, port: int, method: str, path: str, body: bytes = b'') -> Tuple[int, Dict]:
+    """
+    Cliente HTTP mínimo para o serviço (uma requisição por conexão).
+
+    Returns:
+        Tuple[int, Dict]: Código de status e corpo JSON decodificado
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+async def load_test(paths: Sequence[Path], host: str = SCORING_HOST, port: int = SCORING_PORT,
+                    requests: int = 200, concurrency: int = 16) -> Dict:
+    """
+    Dispara requisições simultâneas em /score e mede vazão e latência do lado do cliente.
+
+    Args:
+        paths (Sequence[Path]): Imagens enviadas (em ciclo)
+        host (str): Endereço do serviço
+        port (int): Porta do serviço
+        requests (int): Total de requisições
+        concurrency (int): Requisições em andamento ao mesmo tempo
+
+    Returns:
+        Dict: {'requests', 'seconds', 'images_per_second', 'latency_ms': {'p50', 'p95', 'p99'}}
+
+    Exemplo:
+        stats = asyncio.run(load_test(paths, requests=500, concurrency=32))
+    """
+    images = [Path(path).read_bytes() for path in paths]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            status, _ = await http_request(host, port, 'POST', '/score', images[index % len(images)])
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    seconds = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies or [0.0], [50, 95, 99])
+    return {
+        'requests': len(latencies),
+        'seconds': round(seconds, 2),
+        'images_per_second': round(len(latencies) / seconds, 1),
+        'latency_ms': {'p50': round(float(p50), 2), 'p95': round(float(p95), 2), 'p99': round(float(p99), 2)},
+    }
@@ -5,20 +5,67 @@ Funções para criação de screenshots de redes sociais
 import random
 from typing import Dict
 from playwright.async_api import Page
-from .config import fake, TEMPLATES_DIR
+from .config import fake
+from .capture import capture_to_file
+from .rendering import render_post, generate_message_times
 from .generators import (
     generate_avatar_color,
+    generate_avatar_image,
+    generate_asset_id,
     get_initials,
     generate_username,
     generate_tweet_text,
     generate_instagram_caption,
     generate_whatsapp_messages,
-    format_number,
-    generate_timestamp,
-    generate_time
+    generate_timestamp
 )
 
 
+def generate_twitter_data() -> Dict:
+    """
+    Gera os dados fictícios (spec) de um tweet autêntico, sem renderizar.
+
+    Returns:
+        Dict: Dados do tweet (nome, username, texto, métricas, etc.),
+              prontos para render_post() e para as manipulações
+
+    Exemplo:
+        >>> data = generate_twitter_data()
+        >>> data['like_count']
+        5420
+    """
+    name = fake.name()
+    username = generate_username(name)
+    text = generate_tweet_text()
+    verified = random.random() < 0.3  # 30% de chance de ser verificado
+
+    reply_count = random.randint(5, 500)
+    retweet_count = random.randint(10, 2000)
+    quote_count = random.randint(5, 800)
+    like_count = random.randint(50, 10000)
+    view_count = random.randint(1000, 100000)
+
+    timestamp = generate_timestamp()
+    avatar_color = generate_avatar_color()
+    initials = get_initials(name)
+
+    return {
+        'name': name,
+        'username': username,
+        'text': text,
+        'verified': verified,
+        'reply_count': reply_count,
+        'retweet_count': retweet_count,
+        'quote_count': quote_count,
+        'like_count': like_count,
+        'view_count': view_count,
+        'timestamp': timestamp,
+        'avatar_color': avatar_color,
+        'avatar_image': generate_avatar_image(),
+        'initials': initials,
+    }
+
+
 async def create_twitter_screenshot(page: Page, filename: str) -> Dict:
     """
     Cria um screenshot autêntico de um post do Twitter.
@@ -39,7 +86,8 @@ async def create_twitter_screenshot(page: Page, filename: str) -> Dict:
 
     Returns:
         Dict: Dicionário com todos os dados gerados para o tweet,
-              usado posteriormente para criar versões manipuladas
+              usado posteriormente para criar versões manipuladas.
+              A chave 'clip' guarda a caixa de recorte da captura
 
     Exemplo:
         async def exemplo():
@@ -49,60 +97,54 @@ async def create_twitter_screenshot(page: Page, filename: str) -> Dict:
     """
 
     # Dados fictícios
+    data = generate_twitter_data()
+
+    # Carregar template e preencher dados
+    await render_post(page, 'twitter', data)
+
+    # Screenshot (recortado no contêiner do tweet)
+    data['clip'] = await capture_to_file(page, 'twitter', filename)
+
+    # Retornar dados para manipulação posterior
+    return data
+
+
+def generate_instagram_data() -> Dict:
+    """
+    Gera os dados fictícios (spec) de um post autêntico do Instagram, sem renderizar.
+
+    Returns:
+        Dict: Dados do post (username, caption, curtidas, etc.),
+              prontos para render_post() e para as manipulações
+
+    Exemplo:
+        >>> data = generate_instagram_data()
+        >>> data['username']
+        'maria_santos123'
+    """
     name = fake.name()
-    username = generate_username(name)
-    text = generate_tweet_text()
-    verified = random.random() < 0.3  # 30% de chance de ser verificado
+    username = generate_username(name).replace('@', '')
+    caption = generate_instagram_caption()
+    verified = random.random() < 0.2  # 20% de chance de ser verificado
 
-    reply_count = random.randint(5, 500)
-    retweet_count = random.randint(10, 2000)
-    quote_count = random.randint(5, 800)
-    like_count = random.randint(50, 10000)
-    view_count = random.randint(1000, 100000)
+    like_count = random.randint(50, 50000)
+    comment_count = random.randint(5, 1000)
 
     timestamp = generate_timestamp()
     avatar_color = generate_avatar_color()
     initials = get_initials(name)
 
-    # Carregar template
-    template_path = TEMPLATES_DIR / "twitter.html"
-    await page.goto(f"file:///{template_path.absolute()}")
-
-    # Preencher dados
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{initials}';
-        document.getElementById('avatar').style.backgroundColor = '{avatar_color}';
-        document.getElementById('displayName').textContent = '{name}';
-        document.getElementById('username').textContent = '{username}';
-        document.getElementById('timestamp').textContent = '{timestamp}';
-        document.getElementById('tweetText').textContent = '{text}';
-        document.getElementById('retweetCount').textContent = '{format_number(retweet_count)}';
-        document.getElementById('quoteCount').textContent = '{format_number(quote_count)}';
-        document.getElementById('likeCount').textContent = '{format_number(like_count)}';
-        document.getElementById('viewCount').textContent = '{format_number(view_count)}';
-        document.getElementById('replyCount').textContent = '{format_number(reply_count)}';
-        document.getElementById('retweetActionCount').textContent = '{format_number(retweet_count)}';
-        document.getElementById('likeActionCount').textContent = '{format_number(like_count)}';
-        document.getElementById('viewActionCount').textContent = '{format_number(view_count)}';
-        document.getElementById('verifiedBadge').style.display = '{' inline-flex' if verified else 'none'}';
-    """)
-
-    # Screenshot
-    await page.screenshot(path=filename)
-
-    # Retornar dados para manipulação posterior
     return {
         'name': name,
         'username': username,
-        'text': text,
+        'caption': caption,
         'verified': verified,
-        'reply_count': reply_count,
-        'retweet_count': retweet_count,
-        'quote_count': quote_count,
         'like_count': like_count,
-        'view_count': view_count,
+        'comment_count': comment_count,
         'timestamp': timestamp,
         'avatar_color': avatar_color,
+        'avatar_image': generate_avatar_image(),
+        'post_image': generate_asset_id('post'),
         'initials': initials,
     }
 
@@ -127,7 +169,8 @@ async def create_instagram_screenshot(page: Page, filename: str) -> Dict:
 
     Returns:
         Dict: Dicionário com todos os dados gerados para o post,
-              usado posteriormente para criar versões manipuladas
+              usado posteriormente para criar versões manipuladas.
+              A chave 'clip' guarda a caixa de recorte da captura
 
     Exemplo:
         async def exemplo():
@@ -137,49 +180,47 @@ async def create_instagram_screenshot(page: Page, filename: str) -> Dict:
     """
 
     # Dados fictícios
-    name = fake.name()
-    username = generate_username(name).replace('@', '')
-    caption = generate_instagram_caption()
-    verified = random.random() < 0.2  # 20% de chance de ser verificado
+    data = generate_instagram_data()
 
-    like_count = random.randint(50, 50000)
-    comment_count = random.randint(5, 1000)
+    # Carregar template e preencher dados
+    await render_post(page, 'instagram', data)
 
-    timestamp = generate_timestamp()
-    avatar_color = generate_avatar_color()
-    initials = get_initials(name)
+    # Screenshot (recortado no contêiner do post)
+    data['clip'] = await capture_to_file(page, 'instagram', filename)
+
+    return data
 
-    # Carregar template
-    template_path = TEMPLATES_DIR / "instagram.html"
-    await page.goto(f"file:///{template_path.absolute()}")
 
-    # Preencher dados
-    comments_text = f"Ver todos os {comment_count} comentários" if comment_count > 1 else "Ver comentário"
+def generate_whatsapp_data() -> Dict:
+    """
+    Gera os dados fictícios (spec) de uma conversa autêntica do WhatsApp, sem renderizar.
 
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{initials}';
-        document.getElementById('avatar').style.backgroundColor = '{avatar_color}';
-        document.getElementById('username').textContent = '{username}';
-        document.getElementById('captionUsername').textContent = '{username}';
-        document.getElementById('captionText').textContent = '{caption}';
-        document.getElementById('likeCount').textContent = '{format_number(like_count)}';
-        document.getElementById('viewComments').textContent = '{comments_text}';
-        document.getElementById('timestamp').textContent = '{timestamp}';
-        document.getElementById('verifiedBadge').style.display = '{"inline-flex" if verified else "none"}';
-    """)
+    Os horários de cada mensagem são sorteados aqui e guardados em 'times',
+    para que a mesma conversa possa ser renderizada novamente de forma idêntica.
 
-    # Screenshot
-    await page.screenshot(path=filename)
+    Returns:
+        Dict: Dados da conversa (contato, mensagens, horários, etc.),
+              prontos para render_post() e para as manipulações
+
+    Exemplo:
+        >>> data = generate_whatsapp_data()
+        >>> len(data['messages']) == len(data['times'])
+        True
+    """
+    contact_name = fake.name()
+    messages = generate_whatsapp_messages()
+    date_badge = generate_timestamp(random.randint(0, 3))
+
+    avatar_color = generate_avatar_color()
+    initials = get_initials(contact_name)
 
     return {
-        'name': name,
-        'username': username,
-        'caption': caption,
-        'verified': verified,
-        'like_count': like_count,
-        'comment_count': comment_count,
-        'timestamp': timestamp,
+        'contact_name': contact_name,
+        'messages': messages,
+        'times': generate_message_times(messages),
+        'date_badge': date_badge,
         'avatar_color': avatar_color,
+        'avatar_image': generate_avatar_image(),
         'initials': initials,
     }
 
@@ -205,7 +246,8 @@ async def create_whatsapp_screenshot(page: Page, filename: str) -> Dict:
 
     Returns:
         Dict: Dicionário com todos os dados gerados para a conversa,
-              usado posteriormente para criar versões manipuladas
+              usado posteriormente para criar versões manipuladas.
+              A chave 'clip' guarda a caixa de recorte da captura
 
     Exemplo:
         async def exemplo():
@@ -215,42 +257,12 @@ async def create_whatsapp_screenshot(page: Page, filename: str) -> Dict:
     """
 
     # Dados fictícios
-    contact_name = fake.name()
-    messages = generate_whatsapp_messages()
-    date_badge = generate_timestamp(random.randint(0, 3))
+    data = generate_whatsapp_data()
 
-    avatar_color = generate_avatar_color()
-    initials = get_initials(contact_name)
+    # Carregar template e adicionar contato e mensagens
+    await render_post(page, 'whatsapp', data)
 
-    # Carregar template
-    template_path = TEMPLATES_DIR / "whatsapp.html"
-    await page.goto(f"file:///{template_path.absolute()}")
-
-    # Preencher dados do contato
-    await page.evaluate(f"""
-        document.getElementById('avatar').textContent = '{initials}';
-        document.getElementById('avatar').style.backgroundColor = '{avatar_color}';
-        document.getElementById('contactName').textContent = '{contact_name}';
-        document.getElementById('dateBadge').textContent = '{date_badge}';
-    """)
-
-    # Adicionar mensagens
-    for msg_text, msg_type in messages:
-        time = generate_time()
-        escaped_text = msg_text.replace("'", "\\'").replace('"', '\\"')
-        await page.evaluate(f"""
-            const container = document.getElementById('messagesContainer');
-            const msg = createMessage('{escaped_text}', '{time}', '{msg_type}');
-            container.appendChild(msg);
-        """)
-
-    # Screenshot
-    await page.screenshot(path=filename)
+    # Screenshot (recortado no contêiner da conversa)
+    data['clip'] = await capture_to_file(page, 'whatsapp', filename)
 
-    return {
-        'contact_name': contact_name,
-        'messages': messages,
-        'date_badge': date_badge,
-        'avatar_color': avatar_color,
-        'initials': initials,
-    }
+    return data
@@ -0,0 +1,397 @@
+"""
+Índice de vizinhos mais próximos sobre embeddings das imagens (rastreio de origem)
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from PIL import Image
+from .config import (
+    LABELS_PATH,
+    INDEX_DIR,
+    EMBED_SIZE,
+    EMBED_BAND,
+    EMBED_BAND_HEIGHT,
+    EMBED_BAND_WEIGHT,
+    INDEX_BLOCK_SIZE,
+    INDEX_PROBES,
+    TRACE_EXACT_SCORE,
+    SEED
+)
+from .image_cache import DatasetImageLoader
+
+
+def _unit(pixels: Image.Image) -> np.ndarray:
+    """
+    Pixels como vetor float32 centralizado e com norma 1.
+    """
+    vector = np.asarray(pixels, dtype=np.float32).reshape(-1)
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def _header_band(image: Image.Image, band: Tuple[int, int] = EMBED_BAND,
+                 height: float = EMBED_BAND_HEIGHT) -> np.ndarray:
+    """
+    Faixa do topo da imagem (altura = height x largura) reduzida para band,
+    completada com zeros quando a imagem é mais baixa que a faixa.
+    """
+    cols, rows = band
+    width, image_height = image.size
+    band_height = max(1, round(width * height))
+    crop = image.crop((0, 0, width, min(image_height, band_height)))
+    scaled = crop.resize((cols, max(1, round(rows * crop.height / band_height))), Image.Resampling.BOX)
+
+    pixels = np.zeros((rows, cols, 3), dtype=np.float32)
+    pixels[:scaled.height] = np.asarray(scaled, dtype=np.float32)
+    return _unit(pixels)
+
+
+def embed_image(image: Union[Path, str, Image.Image], size: int = EMBED_SIZE) -> np.ndarray:
+    """
+    Calcula o embedding de uma imagem (miniatura RGB + faixa do cabeçalho).
+
+    A imagem inteira é reduzida para size x size por média de área: trocas
+    de texto, métricas ou selo mudam poucos pixels dessa miniatura, mas
+    posts do mesmo template (e conversas que reaproveitam as mesmas
+    mensagens) também ficam quase iguais nela. Por isso o embedding junta
+    a faixa do topo (nome, @, avatar, horário) em resolução maior
+    (EMBED_BAND), que é o que separa dois posts do mesmo template. Cada
+    parte é centralizada e normalizada; a faixa pesa EMBED_BAND_WEIGHT no
+    cosseno. O vetor final tem norma 1, então o produto interno entre dois
+    embeddings é a similaridade de cosseno.
+
+    Args:
+        image (Path | str | Image.Image): Caminho da imagem ou imagem do Pillow
+        size (int): Lado da miniatura em pixels
+
+    Returns:
+        np.ndarray: Vetor float32 com size * size * 3 + EMBED_BAND[0] * EMBED_BAND[1] * 3
+                    posições e norma 1
+
+    Exemplo:
+        >>> embed_image(AUTHENTIC_DIR / 'twitter_000.png').shape
+        (5472,)
+    """
+    if isinstance(image, Image.Image):
+        image = image.convert('RGB')
+    else:
+        with Image.open(image) as opened:
+            image = opened.convert('RGB')
+
+    thumb = _unit(image.resize((size, size), Image.Resampling.BOX))
+    band = _header_band(image)
+    return np.concatenate([thumb * np.sqrt(1 - EMBED_BAND_WEIGHT), band * np.sqrt(EMBED_BAND_WEIGHT)])
+
+
+def _embed_paths(paths: List[str], size: int) -> np.ndarray:
+    """
+    Tarefa do pool: embeddings de um grupo de imagens.
+    """
+    return np.stack([embed_image(path, size) for path in paths])
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mantém, por linha, os k maiores scores (e ids correspondentes), sem ordenar.
+    """
+    if scores.shape[1] <= k:
+        return scores, ids
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, top, axis=1), np.take_along_axis(ids, top, axis=1)
+
+
+def _sort_rows(scores: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ordena cada linha por score decrescente.
+    """
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class NeighborIndex:
+    """
+    Índice de k vizinhos mais próximos (similaridade de cosseno) sobre embeddings.
+
+    A busca exata multiplica o lote de consultas pela matriz de embeddings
+    em blocos de INDEX_BLOCK_SIZE linhas, mantendo os k melhores de cada
+    consulta entre os blocos: a memória usada é (consultas x bloco), não
+    (consultas x imagens). Opcionalmente, train_quantizer() agrupa os
+    vetores com k-means (quantizador grosso); a busca então compara cada
+    consulta só com os vetores das `probes` listas mais próximas, em vez
+    do índice inteiro.
+
+    O índice é gravado numa pasta (vectors.npy, quantizador e metadados);
+    load() abre os vetores com memory-map, então carregar é instantâneo.
+
+    Exemplo:
+        index = build_index()
+        index.save()
+
+        index = NeighborIndex.load()
+        scores, ids = index.search(np.stack([embed_image(path)]), k=5)
+        print(index.filenames[ids[0]])
+    """
+
+    def __init__(self, vectors: np.ndarray, filenames: Sequence[str],
+                 classes: Sequence[str], originals: Sequence[str]):
+        self.vectors = vectors
+        self.filenames = np.asarray(filenames)
+        self.classes = np.asarray(classes)
+        self.originals = np.asarray(originals)
+        self.centroids: Optional[np.ndarray] = None
+        self.list_ids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def train_quantizer(self, n_lists: Optional[int] = None, iterations: int = 10,
+                        block_size: int = INDEX_BLOCK_SIZE) -> None:
+        """
+        Treina o quantizador grosso (k-means esférico) e monta as listas invertidas.
+
+        Args:
+            n_lists (int, optional): Quantidade de listas. Se None, usa ~sqrt(N)
+            iterations (int): Iterações do k-means
+            block_size (int): Linhas por bloco nas atribuições
+        """
+        rng = np.random.default_rng(SEED)
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(self)))), len(self))
+        centroids = self.vectors[np.sort(rng.choice(len(self), n_lists, replace=False))].astype(np.float32)
+
+        for _ in range(iterations):
+            assign = self._assign(centroids, block_size)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.vectors)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = self.vectors[rng.choice(len(self), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.maximum(norms, 1e-12)
+
+        assign = self._assign(centroids, block_size)
+        self.centroids = centroids
+        self.list_ids = np.argsort(assign, kind='stable').astype(np.int64)
+        self.list_offsets = np.searchsorted(assign[self.list_ids], np.arange(n_lists + 1)).astype(np.int64)
+
+    def _assign(self, centroids: np.ndarray, block_size: int) -> np.ndarray:
+        """
+        Lista (centróide mais próximo) de cada vetor, calculada em blocos.
+        """
+        assign = np.empty(len(self), dtype=np.int64)
+        for start in range(0, len(self), block_size):
+            block = np.asarray(self.vectors[start:start + block_size])
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    def search(self, queries: np.ndarray, k: int = 5,
+               probes: Optional[int] = None,
+               block_size: int = INDEX_BLOCK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca os k vizinhos mais próximos de um lote de consultas.
+
+        Sem quantizador (ou com probes=0) a busca é exata, por produto de
+        matrizes em blocos. Com quantizador, cada consulta é comparada
+        apenas com as listas dos `probes` centróides mais próximos.
+
+        Args:
+            queries (np.ndarray): Embeddings das consultas (Q, D)
+            k (int): Vizinhos por consulta
+            probes (int, optional): Listas visitadas por consulta. Se None, usa
+                                    INDEX_PROBES quando há quantizador
+            block_size (int): Linhas do índice por bloco na busca exata
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scores (Q, k) em ordem decrescente e
+                                           posições (Q, k) no índice (-1 se faltar)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        if probes is None:
+            probes = INDEX_PROBES if self.centroids is not None else 0
+
+        if probes and self.centroids is not None:
+            return self._search_lists(queries, k, probes)
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.full((len(queries), 0), -1, dtype=np.int64)
+        for start in range(0, len(self), block_size):
+            block = np.asarray(self.vectors[start:start + block_size])
+            scores = queries @ block.T
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores, best_ids = _top_k(np.concatenate([best_scores, scores], axis=1),
+                                           np.concatenate([best_ids, ids], axis=1), k)
+        return _sort_rows(best_scores, best_ids)
+
+    def _search_lists(self, queries: np.ndarray, k: int, probes: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca aproximada: só os vetores das listas dos centróides mais próximos.
+        """
+        probes = min(probes, len(self.centroids))
+        nearest_lists = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :probes]
+
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, nearest_lists)):
+            candidates = np.concatenate([self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]]
+                                         for i in lists])
+            scores = np.asarray(self.vectors[candidates]) @ query
+            scores, ids = _sort_rows(*_top_k(scores[None, :], candidates[None, :], k))
+            result_scores[row, :ids.shape[1]] = scores[0]
+            result_ids[row, :ids.shape[1]] = ids[0]
+        return result_scores, result_ids
+
+    def save(self, index_dir: Path = INDEX_DIR) -> Path:
+        """
+        Grava o índice numa pasta (vetores em .npy para abrir com memory-map).
+
+        Args:
+            index_dir (Path): Pasta de destino
+
+        Returns:
+            Path: Pasta gravada
+        """
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "vectors.npy", np.asarray(self.vectors, dtype=np.float32))
+        if self.centroids is not None:
+            np.savez(index_dir / "quantizer.npz", centroids=self.centroids,
+                     list_ids=self.list_ids, list_offsets=self.list_offsets)
+        else:
+            (index_dir / "quantizer.npz").unlink(missing_ok=True)
+        (index_dir / "meta.json").write_text(json.dumps({
+            'filenames': self.filenames.tolist(),
+            'classes': self.classes.tolist(),
+            'originals': self.originals.tolist(),
+        }, ensure_ascii=False))
+        return index_dir
+
+    @classmethod
+    def load(cls, index_dir: Path = INDEX_DIR) -> 'NeighborIndex':
+        """
+        Abre um índice gravado por save() (vetores com memory-map).
+
+        Args:
+            index_dir (Path): Pasta do índice
+
+        Returns:
+            NeighborIndex: Índice pronto para busca
+        """
+        meta = json.loads((index_dir / "meta.json").read_text())
+        index = cls(np.load(index_dir / "vectors.npy", mmap_mode='r'),
+                    meta['filenames'], meta['classes'], meta['originals'])
+
+        quantizer_path = index_dir / "quantizer.npz"
+        if quantizer_path.exists():
+            with np.load(quantizer_path) as f:
+                index.centroids = f['centroids']
+                index.list_ids = f['list_ids']
+                index.list_offsets = f['list_offsets']
+        return index
+
+
+def build_index(labels_path: Path = LABELS_PATH,
+                workers: Optional[int] = None,
+                n_lists: Optional[int] = None,
+                chunk_size: int = 64) -> NeighborIndex:
+    """
+    Calcula os embeddings de todas as imagens do labels.csv e monta o índice.
+
+    Args:
+        labels_path (Path): labels.csv do dataset
+        workers (int, optional): Processos usados nos embeddings. Se None, usa os núcleos
+        n_lists (int, optional): Listas do quantizador grosso (0 = só busca exata,
+                                 None = ~sqrt(N) acima de 10.000 imagens)
+        chunk_size (int): Imagens por tarefa do pool
+
+    Returns:
+        NeighborIndex: Índice com os embeddings, nomes, classes e autênticos de origem
+
+    Exemplo:
+        >>> index = build_index()
+        >>> len(index), index.vectors.shape[1]
+        (240, 5472)
+    """
+    loader = DatasetImageLoader(labels_path=labels_path)
+    paths = [str(loader.path(i)) for i in range(len(loader))]
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        vectors = np.concatenate(list(executor.map(_embed_paths, chunks, [EMBED_SIZE] * len(chunks))))
+
+    index = NeighborIndex(
+        vectors,
+        [label['filename'] for label in loader.labels],
+        [label['class'] for label in loader.labels],
+        [label['original_filename'] for label in loader.labels],
+    )
+    if n_lists is None:
+        n_lists = 0 if len(index) < 10_000 else None
+    if n_lists != 0:
+        index.train_quantizer(n_lists)
+    return index
+
+
+def trace_sources(index: NeighborIndex, images: Sequence[Union[Path, str]], k: int = 10) -> List[Dict]:
+    """
+    Rastreia, para cada imagem suspeita, o post autêntico de origem e as variantes mais próximas.
+
+    Todas as imagens são consultadas num único lote. Se o vizinho mais
+    parecido é a própria imagem (score >= TRACE_EXACT_SCORE), a origem é
+    o autêntico de origem dele, gravado no labels.csv; senão, é o
+    autêntico mais parecido entre os k vizinhos (ou o autêntico de origem
+    do vizinho mais parecido, se nenhum autêntico aparecer). As variantes
+    são os manipulados dessa origem, ordenados pela similaridade com a
+    suspeita.
+
+    Args:
+        index (NeighborIndex): Índice retornado por build_index() ou load()
+        images (Sequence[Path | str]): Imagens suspeitas
+        k (int): Vizinhos considerados por imagem
+
+    Returns:
+        List[Dict]: Por imagem: {'image', 'source', 'source_score', 'variants',
+                    'neighbors'}, com variants/neighbors como listas de
+                    {'filename', 'class', 'score'}
+
+    Exemplo:
+        >>> trace_sources(index, ['suspeito.png'])[0]['source']
+        'twitter_007.png'
+    """
+    queries = np.stack([embed_image(image) for image in images])
+    scores, ids = index.search(queries, k=k)
+
+    results = []
+    for image, row_scores, row_ids in zip(images, scores, ids):
+        neighbors = [
+            {'filename': str(index.filenames[i]), 'class': str(index.classes[i]), 'score': float(score)}
+            for score, i in zip(row_scores, row_ids) if i >= 0
+        ]
+        authentic = [n for n in neighbors if n['class'] == 'autentico']
+        if row_ids[0] >= 0 and row_scores[0] >= TRACE_EXACT_SCORE:
+            # A própria imagem (ou uma cópia idêntica) está no índice: a origem já é conhecida
+            source = str(index.originals[row_ids[0]])
+        elif authentic:
+            source = authentic[0]['filename']
+        else:
+            source = str(index.originals[row_ids[0]])
+
+        # Score de todas as variantes da origem (não só as que entraram no top-k)
+        family = np.nonzero(index.originals == source)[0]
+        family_scores = np.asarray(index.vectors[family]) @ queries[len(results)]
+        order = np.argsort(-family_scores, kind='stable')
+
+        results.append({
+            'image': str(image),
+            'source': source,
+            'source_score': float(family_scores[index.filenames[family] == source].max(initial=-1.0)),
+            'variants': [
+                {'filename': str(index.filenames[family[i]]), 'class': str(index.classes[family[i]]),
+                 'score': float(family_scores[i])}
+                for i in order if index.classes[family[i]] == 'manipulado'
+            ],
+            'neighbors': neighbors,
+        })
+    return results
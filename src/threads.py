@@ -0,0 +1,318 @@
+"""
+Conversas longas do WhatsApp: inserção em lotes, captura em blocos com rolagem e imagem costurada
+"""
+
+import math
+import random
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from playwright.async_api import Page
+from .config import (
+    fake,
+    REAL_CONVERSATIONS,
+    CONTAINER_SELECTORS,
+    VIEWPORT,
+    THREAD_CHUNK_SIZE
+)
+from .generators import (
+    generate_timestamp,
+    generate_avatar_color,
+    generate_avatar_image,
+    get_initials
+)
+from .rendering import render_post, build_payload
+from .capture import get_clip_box, capture_region, clip_label_fields, image_extension
+
+
+# Instala na página as funções usadas pela captura em blocos. As posições são "lógicas"
+# (em relação à conversa inteira); o documento só guarda as mensagens a partir do bloco atual:
+# - threadAppend(chunk): insere um lote de mensagens de uma vez (DocumentFragment)
+# - threadBottom(): base da conversa
+# - threadVisible(y0, y1): índices da primeira e da última mensagem visíveis no trecho
+# - threadCollapse(limit): remove as mensagens que terminam acima de `limit` (a última
+#   sempre fica) e acumula a altura removida, então o documento não cresce com a conversa
+# - threadScroll(y): rola a janela até a posição lógica y; devolve [y no documento, scrollY]
+THREAD_JS = """
+(selector) => {
+    const root = document.querySelector(selector);
+    const container = document.getElementById('messagesContainer');
+    const background = container.closest('.chat-background');
+    let shift = 0;  // altura removida do topo: y lógico = y no documento + shift
+    let next = 0;
+
+    // Fundo listrado com tamanho fixo, deslocado junto com as mensagens: sem emendas entre blocos
+    background.style.backgroundSize = '100% 1048576px';
+
+    const top = (element) => element.getBoundingClientRect().top + window.scrollY + shift;
+    const bottom = (element) => element.getBoundingClientRect().bottom + window.scrollY + shift;
+
+    window.threadBottom = () => bottom(root);
+
+    window.threadAppend = (chunk) => {
+        const fragment = document.createDocumentFragment();
+        for (const [text, time, type] of chunk) {
+            const message = createMessage(text, time, type);
+            message.dataset.index = next++;
+            fragment.appendChild(message);
+        }
+        container.appendChild(fragment);
+        return bottom(root);
+    };
+
+    window.threadVisible = (y0, y1) => {
+        let first = null;
+        let last = null;
+        for (const message of container.querySelectorAll('.message')) {
+            if (bottom(message) <= y0) continue;
+            if (top(message) >= y1) break;
+            if (first === null) first = Number(message.dataset.index);
+            last = Number(message.dataset.index);
+        }
+        return [first, last];
+    };
+
+    window.threadCollapse = (limit) => {
+        const messages = container.querySelectorAll('.message');
+        const removed = [];
+        for (let i = 0; i < messages.length - 1; i++) {
+            if (bottom(messages[i]) > limit) break;
+            removed.push(messages[i]);
+        }
+        if (removed.length) {
+            const kept = removed[removed.length - 1].nextElementSibling;
+            const before = top(kept);
+            removed.forEach((message) => message.remove());
+            shift += before - top(kept);
+            background.style.backgroundPosition = `0 ${-shift}px`;
+        }
+        return container.childElementCount;
+    };
+
+    window.threadScroll = (y) => {
+        window.scrollTo(0, y - shift);
+        return [y - shift, window.scrollY];
+    };
+}
+"""
+
+
+def generate_thread_times(count: int) -> List[str]:
+    """
+    Gera horários crescentes para uma conversa longa (intervalos de 0 a 12 minutos).
+
+    Args:
+        count (int): Quantidade de mensagens
+
+    Returns:
+        List[str]: Horários 'HH:MM' em ordem cronológica (voltam a 00:00 após a meia-noite)
+
+    Exemplo:
+        >>> generate_thread_times(3)
+        ['08:41', '08:44', '08:52']
+    """
+    minute = random.randint(7 * 60, 20 * 60)
+    times = []
+    for _ in range(count):
+        times.append(f"{(minute // 60) % 24:02d}:{minute % 60:02d}")
+        minute += random.randint(0, 12)
+    return times
+
+
+def generate_long_whatsapp_data(num_messages: int) -> Dict:
+    """
+    Gera os dados (spec) de uma conversa longa do WhatsApp, sem renderizar.
+
+    As mensagens são trechos de REAL_CONVERSATIONS sorteados em sequência
+    até somar `num_messages`; os horários são crescentes. O formato é o
+    mesmo de generate_whatsapp_data(), então a conversa também pode ser
+    renderizada por render_post() e manipulada por manipulate_whatsapp_data().
+
+    Args:
+        num_messages (int): Quantidade de mensagens da conversa
+
+    Returns:
+        Dict: Dados da conversa (contato, mensagens, horários, etc.)
+
+    Exemplo:
+        >>> data = generate_long_whatsapp_data(300)
+        >>> len(data['messages']), len(data['times'])
+        (300, 300)
+    """
+    messages = []
+    while len(messages) < num_messages:
+        messages.extend(random.choice(REAL_CONVERSATIONS))
+    messages = messages[:num_messages]
+
+    contact_name = fake.name()
+    return {
+        'contact_name': contact_name,
+        'messages': messages,
+        'times': generate_thread_times(len(messages)),
+        'date_badge': generate_timestamp(random.randint(0, 3)),
+        'avatar_color': generate_avatar_color(),
+        'avatar_image': generate_avatar_image(),
+        'initials': get_initials(contact_name),
+    }
+
+
+async def render_long_thread(page: Page, data: Dict, out_dir: Path, stem: str,
+                             chunk_size: int = THREAD_CHUNK_SIZE,
+                             stitch: bool = False) -> Dict:
+    """
+    Renderiza uma conversa longa e captura em blocos da altura do viewport.
+
+    A conversa é montada aos poucos: as mensagens entram no DOM em lotes
+    de `chunk_size` (uma chamada e um DocumentFragment por lote) apenas
+    até cobrir o próximo bloco. A janela é rolada até o bloco, que é
+    capturado dentro do viewport e gravado em disco na hora; em seguida,
+    as mensagens que ficaram inteiramente acima dele saem do DOM. O
+    documento fica com cerca de um viewport de altura, então o DOM, a
+    memória do browser e a do Python ficam limitados a poucos blocos,
+    qualquer que seja o tamanho da conversa.
+
+    Com stitch=True, os blocos são costurados numa única imagem PNG da
+    conversa inteira, gravada linha a linha (um bloco em memória por vez).
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        data (Dict): Dados da conversa (ex: generate_long_whatsapp_data())
+        out_dir (Path): Pasta de saída dos blocos
+        stem (str): Prefixo dos arquivos (ex: 'whatsapp_long_000')
+        chunk_size (int): Mensagens inseridas no DOM por chamada
+        stitch (bool): Se True, grava também '<stem>_full.png'
+
+    Returns:
+        Dict: {'tiles': linhas por bloco (filename, offset_y = posição na conversa,
+              scroll_y = rolagem da janela na captura, first_message, last_message e
+              clip_* na conversa), 'height': altura total da conversa,
+              'stitched': caminho da imagem costurada ou None}
+
+    Exemplo:
+        async def exemplo():
+            data = generate_long_whatsapp_data(300)
+            result = await render_long_thread(page, data, LONG_THREADS_DIR, 'whatsapp_long_000')
+            print(len(result['tiles']), result['height'])  # 24 18950
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    messages = build_payload('whatsapp', data)['messages']
+
+    # Cabeçalho e data primeiro; as mensagens entram depois, em lotes
+    await render_post(page, 'whatsapp', {**data, 'messages': [], 'times': []})
+    await page.evaluate(THREAD_JS, CONTAINER_SELECTORS['whatsapp'])
+
+    container = await get_clip_box(page, 'whatsapp', padding=0)
+    viewport_height = (page.viewport_size or VIEWPORT)['height']
+    extension = image_extension()
+
+    tiles = []
+    scroll_y = container['y']
+    sent = 0
+    bottom = await page.evaluate("() => window.threadBottom()")
+
+    while True:
+        while sent < len(messages) and bottom < scroll_y + viewport_height:
+            chunk = messages[sent:sent + chunk_size]
+            bottom = await page.evaluate("(chunk) => window.threadAppend(chunk)", chunk)
+            sent += len(chunk)
+
+        height = min(viewport_height, math.ceil(bottom) - scroll_y)
+        box = {'x': container['x'], 'y': scroll_y, 'width': container['width'], 'height': height}
+        first, last = await page.evaluate("([y0, y1]) => window.threadVisible(y0, y1)",
+                                          [scroll_y, scroll_y + height])
+        document_y, window_y = await page.evaluate("(y) => window.threadScroll(y)", scroll_y)
+
+        filename = f"{stem}_tile_{len(tiles):03d}{extension}"
+        data = await capture_region(page, {**box, 'y': round(document_y)}, scroll_y=round(window_y))
+        (out_dir / filename).write_bytes(data)
+        tiles.append({
+            'filename': filename,
+            'offset_y': scroll_y - container['y'],
+            'scroll_y': round(window_y),
+            'first_message': first,
+            'last_message': last,
+            **clip_label_fields(box),
+        })
+
+        scroll_y += height
+        if sent >= len(messages) and scroll_y >= math.ceil(bottom):
+            break
+        await page.evaluate("(limit) => window.threadCollapse(limit)", scroll_y)
+
+    total_height = scroll_y - container['y']
+    stitched = None
+    if stitch:
+        stitched = out_dir / f"{stem}_full.png"
+        stitch_tiles([(out_dir / tile['filename'], tile['offset_y']) for tile in tiles],
+                     container['width'], total_height, stitched)
+
+    return {'tiles': tiles, 'height': total_height, 'stitched': stitched}
+
+
+def _write_png_chunk(f, tag: bytes, data: bytes) -> None:
+    """
+    Grava um chunk PNG (tamanho, tipo, dados e CRC).
+    """
+    f.write(struct.pack('>I', len(data)) + tag + data)
+    f.write(struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def stitch_tiles(tiles: Sequence[Tuple[Path, int]], width: int, height: int, out_path: Path,
+                 compress_level: int = 6) -> Path:
+    """
+    Costura os blocos de uma conversa numa única imagem PNG, em streaming.
+
+    O PNG é escrito diretamente (IHDR, IDAT comprimidos incrementalmente
+    com zlib, IEND): cada bloco é decodificado, suas linhas ainda não
+    escritas são comprimidas e o bloco é descartado. A memória usada é a
+    de um bloco, não a da imagem final, que pode ter dezenas de milhares
+    de pixels de altura.
+
+    Args:
+        tiles (Sequence[Tuple[Path, int]]): (caminho do bloco, deslocamento vertical),
+                                            em ordem crescente de deslocamento
+        width (int): Largura dos blocos
+        height (int): Altura total da imagem costurada
+        out_path (Path): Caminho do PNG de saída
+        compress_level (int): Nível de compressão do zlib (0-9)
+
+    Returns:
+        Path: Caminho do PNG gravado
+
+    Raises:
+        ValueError: Se os blocos não cobrirem a altura inteira sem lacunas
+    """
+    compressor = zlib.compressobj(compress_level)
+    written = 0
+
+    with open(out_path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        _write_png_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+
+        for path, offset in tiles:
+            if offset > written:
+                raise ValueError(f"Lacuna entre os blocos antes de {Path(path).name}")
+            with Image.open(path) as image:
+                rows = np.asarray(image.convert('RGB'))[written - offset:height - offset]
+            if not len(rows):
+                continue
+            if rows.shape[1] != width:
+                raise ValueError(f"Largura inesperada em {Path(path).name}: {rows.shape[1]}")
+
+            # Cada linha do PNG começa com o byte do filtro (0 = nenhum)
+            scanlines = np.zeros((len(rows), 1 + width * 3), dtype=np.uint8)
+            scanlines[:, 1:] = rows.reshape(len(rows), -1)
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                _write_png_chunk(f, b'IDAT', data)
+            written += len(rows)
+
+        _write_png_chunk(f, b'IDAT', compressor.flush())
+        _write_png_chunk(f, b'IEND', b'')
+
+    if written != height:
+        raise ValueError(f"Blocos cobrem {written}px de {height}px")
+    return out_path
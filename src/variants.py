@@ -0,0 +1,127 @@
+"""
+Variantes de tema, escala e largura capturadas a partir de um único preenchimento do DOM
+"""
+
+import itertools
+from typing import Dict, List, Sequence
+from playwright.async_api import Page
+from .config import (
+    VIEWPORT,
+    VARIANT_THEMES,
+    VARIANT_SCALES,
+    VARIANT_WIDTHS
+)
+from .capture import capture_to_file, clip_label_fields, measure_layout
+from .rendering import render_post
+
+
+# Troca as classes theme-* e scale-* do <html> sem tocar no conteúdo do post
+APPLY_VARIANT_JS = """
+([theme, scale]) => {
+    const root = document.documentElement;
+    for (const name of [...root.classList]) {
+        if (name.startsWith('theme-') || name.startsWith('scale-')) {
+            root.classList.remove(name);
+        }
+    }
+    root.classList.add(`theme-${theme}`, `scale-${scale}`);
+}
+"""
+
+
+def expand_variants(themes: Sequence[str] = VARIANT_THEMES,
+                    scales: Sequence[str] = VARIANT_SCALES,
+                    widths: Sequence[int] = VARIANT_WIDTHS) -> List[Dict]:
+    """
+    Combina temas, escalas e larguras em variantes; a primeira é o visual base.
+
+    Args:
+        themes (Sequence[str]): Temas ('dark', 'light')
+        scales (Sequence[str]): Escalas ('normal', 'small', 'large', 'xlarge')
+        widths (Sequence[int]): Larguras do viewport em pixels
+
+    Returns:
+        List[Dict]: Variantes {'theme', 'scale', 'viewport_width'}
+
+    Exemplo:
+        >>> expand_variants(['dark', 'light'], ['normal'], [600])
+        [{'theme': 'dark', 'scale': 'normal', 'viewport_width': 600},
+         {'theme': 'light', 'scale': 'normal', 'viewport_width': 600}]
+    """
+    return [
+        {'theme': theme, 'scale': scale, 'viewport_width': width}
+        for theme, scale, width in itertools.product(themes, scales, widths)
+    ]
+
+
+def base_variant() -> Dict:
+    """
+    Variante do visual original dos templates (tema, escala e largura padrão).
+    """
+    return {'theme': VARIANT_THEMES[0], 'scale': VARIANT_SCALES[0], 'viewport_width': VIEWPORT['width']}
+
+
+def variant_suffix(variant: Dict) -> str:
+    """
+    Sufixo do nome de arquivo de uma variante ('' para o visual base).
+
+    Exemplo:
+        >>> variant_suffix({'theme': 'light', 'scale': 'large', 'viewport_width': 390})
+        '__light_large_390'
+    """
+    if variant == base_variant():
+        return ''
+    return f"__{variant['theme']}_{variant['scale']}_{variant['viewport_width']}"
+
+
+async def apply_variant(page: Page, variant: Dict) -> None:
+    """
+    Aplica uma variante na página já preenchida (classes do <html> e largura do viewport).
+
+    Args:
+        page (Page): Página com o post já renderizado
+        variant (Dict): Variante retornada por expand_variants()
+    """
+    height = (page.viewport_size or VIEWPORT)['height']
+    if (page.viewport_size or VIEWPORT)['width'] != variant['viewport_width']:
+        await page.set_viewport_size({'width': variant['viewport_width'], 'height': height})
+    await page.evaluate(APPLY_VARIANT_JS, [variant['theme'], variant['scale']])
+
+
+async def render_variants(page: Page, jobs: List[Dict]) -> List[Dict]:
+    """
+    Renderiza um post uma vez e captura todas as suas variantes.
+
+    Todos os jobs recebidos descrevem o mesmo post (mesma plataforma e
+    dados), diferindo só em job['variant']. O template é carregado e
+    preenchido uma única vez; para cada variante, apenas as classes de
+    tema/escala e a largura do viewport mudam antes da captura. Ao final
+    o viewport volta ao tamanho padrão, pois a página é reaproveitada.
+
+    Args:
+        page (Page): Página do Playwright usada na renderização
+        jobs (List[Dict]): Jobs de plan_jobs(..., variants=...) de um mesmo post
+
+    Returns:
+        List[Dict]: Linhas do labels.csv (com 'theme', 'scale' e 'viewport_width'),
+                    na mesma ordem dos jobs
+
+    Exemplo:
+        async def exemplo():
+            jobs = plan_jobs(['twitter'], 1, variants=expand_variants())
+            rows = await render_variants(page, jobs[:8])
+    """
+    platform = jobs[0]['platform']
+    await render_post(page, platform, jobs[0]['data'])
+
+    rows = []
+    try:
+        for job in jobs:
+            await apply_variant(page, job['variant'])
+            box = await capture_to_file(page, platform, str(job['path']))
+            job['layout'] = await measure_layout(page, platform, box)
+            rows.append({**job['label'], **clip_label_fields(box)})
+    finally:
+        await page.set_viewport_size(VIEWPORT)
+    return rows
+
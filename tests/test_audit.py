@@ -0,0 +1,113 @@
+"""
+Auditoria de integridade: cada tipo de problema é detectado com a correção sugerida
+"""
+
+import csv
+import numpy as np
+import pytest
+from PIL import Image
+from src.audit import audit_dataset, check_file, save_audit
+from src.catalog import open_catalog, upsert_images
+
+
+FIELDS = ['filename', 'class', 'manipulation_type', 'original_filename', 'social_network']
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    authentic_dir, manipulated_dir = tmp_path / 'autenticos', tmp_path / 'manipulados'
+    authentic_dir.mkdir()
+    manipulated_dir.mkdir()
+
+    rows, records = [], []
+    for i in range(4):
+        original = f"twitter_{i:03d}.png"
+        for filename, image_class, folder in ((original, 'autentico', authentic_dir),
+                                              (f"twitter_{i:03d}_manip_1.png", 'manipulado', manipulated_dir)):
+            pixels = np.full((12, 10, 3), i * 40 + (image_class == 'manipulado'), dtype=np.uint8)
+            Image.fromarray(pixels).save(folder / filename)
+            row = {'filename': filename, 'class': image_class,
+                   'manipulation_type': 'none' if image_class == 'autentico' else 'text_change',
+                   'original_filename': original, 'social_network': 'twitter'}
+            rows.append(row)
+            records.append({**row, 'path': folder / filename, 'spec': {'text': filename}})
+
+    with open(tmp_path / 'labels.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    conn = open_catalog(tmp_path / 'catalog.sqlite')
+    upsert_images(conn, records)
+    conn.close()
+    return tmp_path
+
+
+def _audit(root):
+    return audit_dataset(root / 'labels.csv', root / 'autenticos', root / 'manipulados',
+                         root / 'catalog.sqlite', workers=2, chunk_size=3)
+
+
+def test_clean_dataset_has_no_issues(dataset):
+    report = _audit(dataset)
+
+    assert report['catalog'] and report['rows'] == report['files'] == 8
+    assert report['issues'] == [] and report['repairs'] == {}
+
+
+def test_faults_are_detected_with_repairs(dataset):
+    authentic_dir, manipulated_dir = dataset / 'autenticos', dataset / 'manipulados'
+    (manipulated_dir / 'twitter_000_manip_1.png').unlink()
+    data = (manipulated_dir / 'twitter_001_manip_1.png').read_bytes()
+    (manipulated_dir / 'twitter_001_manip_1.png').write_bytes(data[:len(data) // 2])
+    Image.fromarray(np.zeros((11, 10, 3), dtype=np.uint8)).save(authentic_dir / 'twitter_002.png')
+    Image.fromarray(np.full((12, 10, 3), 200, dtype=np.uint8)).save(authentic_dir / 'twitter_003.png')
+    (authentic_dir / 'stray.png').write_bytes(b'x')
+    with open(dataset / 'labels.csv', 'a', newline='', encoding='utf-8') as f:
+        f.write('twitter_003_manip_1.png,manipulado,text_change,twitter_003.png,twitter\n')
+        f.write('twitter_009_manip_1.png,manipulado,text_change,twitter_009.png,twitter\n')
+    Image.fromarray(np.zeros((12, 10, 3), dtype=np.uint8)).save(manipulated_dir / 'twitter_009_manip_1.png')
+
+    report = _audit(dataset)
+
+    kinds = {(item['kind'], item['filename']): item['repair'] for item in report['issues']}
+    assert kinds == {
+        ('missing_file', 'twitter_000_manip_1.png'): 'rerender',
+        ('corrupt_file', 'twitter_001_manip_1.png'): 'rerender',
+        ('size_mismatch', 'twitter_002.png'): 'rerender',
+        ('checksum_mismatch', 'twitter_003.png'): 'refresh_catalog',
+        ('duplicate_row', 'twitter_003_manip_1.png'): 'drop_row',
+        ('uncatalogued', 'twitter_009_manip_1.png'): 'import_catalog',
+        ('missing_original', 'twitter_009_manip_1.png'): 'drop_row',
+        ('orphan_file', 'stray.png'): 'delete_file',
+    }
+
+
+def test_missing_file_without_spec_is_dropped(dataset):
+    (dataset / 'manipulados' / 'twitter_000_manip_1.png').unlink()
+    (dataset / 'catalog.sqlite').unlink()
+
+    report = _audit(dataset)
+
+    assert not report['catalog']
+    assert report['repairs'] == {'drop_row': ['twitter_000_manip_1.png']}
+
+
+def test_check_file_reports_decode_errors(tmp_path):
+    path = tmp_path / 'broken.png'
+    path.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\x00' * 20)
+
+    result = check_file(str(path))
+
+    assert result['exists'] and result['error'] and result['width'] is None
+    assert check_file(str(tmp_path / 'none.png')) == {'exists': False}
+
+
+def test_save_audit_writes_report_and_repairs(dataset):
+    (dataset / 'autenticos' / 'stray.png').write_bytes(b'x')
+
+    report_path, repairs_path = save_audit(_audit(dataset), dataset / 'audit.json', dataset / 'repairs.csv')
+
+    assert report_path.exists()
+    with open(repairs_path, newline='', encoding='utf-8') as f:
+        assert [(row['repair'], row['filename']) for row in csv.DictReader(f)] == [('delete_file', 'stray.png')]
@@ -0,0 +1,66 @@
+"""
+Catálogo SQLite: upsert incremental e preservação das colunas de renderização
+"""
+
+import numpy as np
+from PIL import Image
+from src.catalog import open_catalog, upsert_images, query_images, get_manipulations
+
+
+def _png(path, color):
+    Image.fromarray(np.full((8, 6, 3), color, dtype=np.uint8)).save(path)
+    return path
+
+
+def _records(tmp_path):
+    authentic = {
+        'filename': 'twitter_000.png', 'class': 'autentico', 'manipulation_type': 'none',
+        'original_filename': 'twitter_000.png', 'social_network': 'twitter',
+        'path': _png(tmp_path / 'twitter_000.png', 10),
+    }
+    manipulated = {
+        'filename': 'twitter_000_manip_1.png', 'class': 'manipulado', 'manipulation_type': 'text_change',
+        'original_filename': 'twitter_000.png', 'social_network': 'twitter',
+        'path': _png(tmp_path / 'twitter_000_manip_1.png', 20),
+    }
+    return authentic, manipulated
+
+
+def test_upsert_links_parent_inserted_after_child(tmp_path):
+    authentic, manipulated = _records(tmp_path)
+    conn = open_catalog(tmp_path / 'catalog.sqlite')
+
+    upsert_images(conn, [manipulated])
+    upsert_images(conn, [authentic])
+
+    children = get_manipulations(conn, 'twitter_000.png')
+    assert [child['filename'] for child in children] == ['twitter_000_manip_1.png']
+    assert children[0]['width'] == 6 and children[0]['height'] == 8
+
+
+def test_upsert_without_render_columns_keeps_them(tmp_path):
+    authentic, _ = _records(tmp_path)
+    conn = open_catalog(tmp_path / 'catalog.sqlite')
+    rendered = {**authentic, 'spec': {'text': 'olá'}, 'template_hash': 't1', 'spec_hash': 's1',
+                'layout': {'name': [[1, 2, 3, 4]]}}
+    upsert_images(conn, [rendered])
+
+    # Como no --build-catalog: só as colunas do labels.csv e o caminho
+    upsert_images(conn, [authentic])
+
+    record = query_images(conn, image_class='autentico')[0]
+    assert record['spec'] == {'text': 'olá'}
+    assert (record['template_hash'], record['spec_hash']) == ('t1', 's1')
+    assert record['layout'] == {'name': [[1, 2, 3, 4]]}
+
+
+def test_upsert_explicit_none_clears_render_column(tmp_path):
+    authentic, _ = _records(tmp_path)
+    conn = open_catalog(tmp_path / 'catalog.sqlite')
+    upsert_images(conn, [{**authentic, 'spec': {'text': 'a'}, 'layout': {'name': [[1, 2, 3, 4]]}}])
+
+    upsert_images(conn, [{**authentic, 'spec': {'text': 'b'}, 'layout': None}])
+
+    record = query_images(conn, image_class='autentico')[0]
+    assert record['spec'] == {'text': 'b'}
+    assert record['layout'] is None
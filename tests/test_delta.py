@@ -0,0 +1,73 @@
+"""
+Armazenamento delta: ida e volta sem perdas, inclusive com mudança de tamanho
+"""
+
+import numpy as np
+from PIL import Image
+from src.delta import (
+    changed_rectangles,
+    encode_delta,
+    apply_delta,
+    save_delta,
+    reconstruct_image,
+    delta_path
+)
+
+
+def _original(height=64, width=48):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_changed_rectangles_cover_only_edited_tiles():
+    original = _original()
+    manipulated = original.copy()
+    manipulated[20:22, 5:30] = 0
+
+    boxes = changed_rectangles(original, manipulated, tile=8)
+
+    assert boxes.tolist() == [[16, 0, 24, 32]]
+
+
+def test_round_trip_same_size():
+    original = _original()
+    manipulated = original.copy()
+    manipulated[10:12, 3:40] = 255
+    manipulated[50, 47] = 1
+
+    delta = encode_delta(original, manipulated, tile=8)
+
+    assert len(delta['pixels']) < manipulated.size
+    assert np.array_equal(apply_delta(original, delta), manipulated)
+
+
+def test_round_trip_unchanged_image_is_empty():
+    original = _original()
+
+    delta = encode_delta(original, original.copy(), tile=8)
+
+    assert len(delta['boxes']) == 0
+    assert np.array_equal(apply_delta(original, delta), original)
+
+
+def test_round_trip_taller_manipulated():
+    # Texto que quebra em mais linhas aumenta o recorte
+    original = _original()
+    manipulated = np.concatenate([original, _original(10)[:, :48]])
+    manipulated[5, 5] = 0
+
+    delta = encode_delta(original, manipulated, tile=8)
+
+    assert np.array_equal(apply_delta(original, delta), manipulated)
+
+
+def test_reconstruct_from_saved_delta(tmp_path):
+    original = _original()
+    Image.fromarray(original).save(tmp_path / 'twitter_000.png')
+    manipulated = original.copy()
+    manipulated[30:40, 10:20] = 7
+
+    path = delta_path('twitter_000_manip_1.png', tmp_path / 'deltas')
+    save_delta(path, 'twitter_000.png', encode_delta(original, manipulated))
+
+    assert np.array_equal(reconstruct_image(path, authentic_dir=tmp_path), manipulated)
@@ -0,0 +1,57 @@
+"""
+Mapas forenses: imagens de tamanhos diferentes empilhadas com preenchimento
+"""
+
+import numpy as np
+from PIL import Image
+from src.forensics import (
+    MAP_NAMES,
+    bucket_shape,
+    build_forensic_maps,
+    compute_forensic_maps,
+    load_forensic_maps,
+    pad_stack,
+    quantize_maps
+)
+
+
+def _image(rng, height, width):
+    # Blocos de cor, como os trechos de um screenshot
+    blocks = rng.integers(0, 256, (height // 4 + 1, width // 4 + 1, 3), dtype=np.uint8)
+    return np.ascontiguousarray(np.repeat(np.repeat(blocks, 4, 0), 4, 1)[:height, :width])
+
+
+def test_padded_stack_matches_single_images():
+    rng = np.random.default_rng(0)
+    images = [_image(rng, 50, 37), _image(rng, 61, 40), _image(rng, 64, 64)]
+    sizes = [image.shape[:2] for image in images]
+
+    maps = compute_forensic_maps(pad_stack(images, bucket_shape(64, 64, 32)), sizes=sizes)
+
+    for index, (image, (height, width)) in enumerate(zip(images, sizes)):
+        alone = compute_forensic_maps(image[None])
+        for name in MAP_NAMES:
+            # Só o ELA da última linha/coluna real sente o croma do preenchimento
+            np.testing.assert_allclose(maps[name][index, :height - 1, :width - 1],
+                                       alone[name][0, :-1, :-1], atol=1e-4)
+            assert np.abs(maps[name][index, :height, :width] - alone[name][0]).max() < 8
+
+
+def test_build_maps_crops_back_to_each_image(tmp_path):
+    rng = np.random.default_rng(1)
+    images = {f"twitter_{i:03d}.png": _image(rng, 40 + 7 * i, 30) for i in range(5)}
+    for filename, pixels in images.items():
+        Image.fromarray(pixels).save(tmp_path / filename)
+    paths = sorted(tmp_path.glob('*.png'))
+
+    stats = build_forensic_maps(paths, tmp_path / 'forensics', workers=1, stack_size=3, bucket=16)
+
+    assert stats == {'total': 5, 'cached': 0, 'processed': 5}
+    for path in paths:
+        expected = quantize_maps(compute_forensic_maps(images[path.name][None]))
+        maps = load_forensic_maps(path, tmp_path / 'forensics')
+        for name in MAP_NAMES:
+            assert maps[name].shape == images[path.name].shape[:2]
+            assert np.abs(maps[name][:-1, :-1].astype(int) - expected[name][0, :-1, :-1]).max() <= 1
+
+    assert build_forensic_maps(paths, tmp_path / 'forensics', workers=1)['cached'] == 5
@@ -0,0 +1,36 @@
+"""
+Geradores de dados: IDs de assets distintos até o pool acabar
+"""
+
+import random
+import pytest
+from src import generators
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    monkeypatch.setattr(generators, 'ASSET_POOL_SIZES', {'post': 8, 'avatar': 8})
+    monkeypatch.setattr(generators, '_asset_queues', {})
+    monkeypatch.setattr(generators, '_asset_rounds', {})
+
+
+def test_asset_ids_are_distinct_until_pool_is_exhausted(small_pool, recwarn):
+    ids = [generators.generate_asset_id('post') for _ in range(8)]
+
+    assert sorted(ids) == list(range(8))
+    assert len(recwarn) == 0
+
+    with pytest.warns(UserWarning, match='esgotado'):
+        assert 0 <= generators.generate_asset_id('post') < 8
+
+
+def test_asset_ids_follow_the_global_seed(small_pool, monkeypatch):
+    monkeypatch.setattr(generators, 'random', random.Random())
+    generators.random.seed('assets')
+    first = [generators.generate_asset_id('avatar') for _ in range(8)]
+
+    monkeypatch.setattr(generators, '_asset_queues', {})
+    monkeypatch.setattr(generators, '_asset_rounds', {})
+    generators.random.seed('assets')
+
+    assert [generators.generate_asset_id('avatar') for _ in range(8)] == first
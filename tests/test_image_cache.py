@@ -0,0 +1,53 @@
+"""
+Cache compartilhado de imagens: LRU no orçamento e segmentos removidos fechados
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from src.image_cache import SharedImageCache
+
+
+def _images(tmp_path, count=4, shape=(32, 32, 3)):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"twitter_{i:03d}.png"
+        Image.fromarray(np.full(shape, i * 50, dtype=np.uint8)).save(path)
+        paths.append(path)
+    return paths
+
+
+def _mean(cache, path):
+    return float(cache.get(path).mean())
+
+
+def test_eviction_closes_only_removed_handles(tmp_path):
+    paths = _images(tmp_path)
+    image_bytes = 32 * 32 * 3
+
+    with SharedImageCache(budget_mb=2 * image_bytes / (1024 * 1024)) as cache:
+        first = cache.get(paths[0])
+        for path in paths[1:]:
+            cache.get(path)
+        cache.get(paths[3])
+
+        assert cache.stats() == {'hits': 1, 'misses': 4, 'evictions': 2, 'images': 2, 'bytes': 2 * image_bytes}
+        # O segmento de paths[0] continua aberto enquanto `first` existir
+        assert len(cache._handles) == 2 and len(cache._stale) == 1
+        assert np.all(first == 0)
+
+        del first
+        cache.get(paths[0])
+        assert not cache._stale and len(cache._handles) == 2
+
+
+def test_workers_share_decoded_images(tmp_path):
+    paths = _images(tmp_path) * 3
+
+    with SharedImageCache() as cache:
+        with ProcessPoolExecutor(2) as pool:
+            means = list(pool.map(_mean, [cache] * len(paths), paths))
+
+        assert means == [i * 50.0 for i in range(4)] * 3
+        stats = cache.stats()
+        assert stats['misses'] == 4 and stats['hits'] == 8 and stats['images'] == 4
@@ -0,0 +1,100 @@
+"""
+Pares e trios: índice pai/filho e loader sobre PNGs ou deltas
+"""
+
+import random
+import numpy as np
+from PIL import Image
+from src.delta import delta_path, encode_delta, save_delta
+from src.pairs import PairIndex, PairLoader
+
+
+def _labels(posts=5, manipulations=3, shuffle=True):
+    labels = []
+    for i in range(posts):
+        original = f"twitter_{i:03d}.png"
+        labels.append({'filename': original, 'class': 'autentico', 'original_filename': original})
+        for j in range(1, manipulations + 1):
+            labels.append({'filename': f"twitter_{i:03d}_manip_{j}.png", 'class': 'manipulado',
+                           'original_filename': original})
+    if shuffle:
+        random.Random(0).shuffle(labels)
+    return labels
+
+
+def test_pairs_match_naive_parent_lookup():
+    labels = _labels()
+    index = PairIndex(labels)
+
+    rows = {label['filename']: i for i, label in enumerate(labels)}
+    expected = {(rows[label['original_filename']], i) for i, label in enumerate(labels)
+                if label['class'] == 'manipulado'}
+    assert len(index) == 15 and index.groups == 5
+    assert {index.pair(k) for k in range(len(index))} == expected
+
+
+def test_groups_without_parent_or_children_are_skipped():
+    labels = _labels(posts=2, shuffle=False)
+    labels.append({'filename': 'twitter_009.png', 'class': 'autentico', 'original_filename': 'twitter_009.png'})
+    labels.append({'filename': 'twitter_008_manip_1.png', 'class': 'manipulado',
+                   'original_filename': 'twitter_008.png'})
+
+    index = PairIndex(labels)
+
+    assert index.groups == 2 and len(index) == 6
+    assert [labels[row]['filename'] for row in index.children_of(1)] == [
+        'twitter_001_manip_1.png', 'twitter_001_manip_2.png', 'twitter_001_manip_3.png']
+
+
+def test_triplet_negative_is_another_authentic():
+    labels = _labels()
+    index = PairIndex(labels)
+    rng = np.random.default_rng(0)
+
+    for k in range(len(index)):
+        parent, child, negative = index.triplet(k, rng)
+        assert (parent, child) == index.pair(k)
+        assert labels[negative]['class'] == 'autentico' and negative != parent
+
+
+def test_loader_delta_source_matches_png(tmp_path):
+    labels = _labels(posts=2, manipulations=2)
+    authentic_dir, manipulated_dir, delta_dir = tmp_path / 'a', tmp_path / 'm', tmp_path / 'd'
+    authentic_dir.mkdir()
+    manipulated_dir.mkdir()
+    rng = np.random.default_rng(0)
+    originals = {}
+    for label in sorted(labels, key=lambda label: label['class']):
+        if label['class'] == 'autentico':
+            pixels = originals[label['filename']] = rng.integers(0, 256, (24, 16, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(authentic_dir / label['filename'])
+        else:
+            original = originals[label['original_filename']]
+            pixels = original.copy()
+            pixels[4:8] = rng.integers(0, 256, (4, 16, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(manipulated_dir / label['filename'])
+            save_delta(delta_path(label['filename'], delta_dir), label['original_filename'],
+                       encode_delta(original, pixels))
+
+    index = PairIndex(labels)
+    dirs = {'authentic_dir': authentic_dir, 'manipulated_dir': manipulated_dir, 'delta_dir': delta_dir}
+    from_png = list(PairLoader(index=index, shuffle=False, **dirs))
+    from_delta = list(PairLoader(index=index, source='delta', shuffle=False, **dirs))
+
+    assert len(from_png) == len(from_delta) == 4
+    for (a1, m1, rows1), (a2, m2, rows2) in zip(from_png, from_delta):
+        assert rows1 == rows2 and rows1[1]['original_filename'] == rows1[0]['filename']
+        assert np.array_equal(a1, a2) and np.array_equal(m1, m2)
+
+
+def test_loader_epochs_reshuffle_deterministically():
+    index = PairIndex(_labels())
+
+    def orders():
+        loader = PairLoader(index=index, seed=7)
+        loader.image = lambda row: row
+        return [tuple(sample[1] for sample in loader) for _ in range(2)]
+
+    first, second = orders()
+    assert first != second and sorted(first) == sorted(second)
+    assert orders() == [first, second]
@@ -0,0 +1,88 @@
+"""
+Geração intercalada: prefixos balanceados e snapshots consistentes do labels.csv
+"""
+
+import csv
+from collections import Counter
+from itertools import groupby
+from src.pipeline import interleave_jobs, make_job, post_group, LabelSnapshots
+
+
+PLATFORM_NAMES = ('twitter', 'instagram', 'whatsapp')
+TYPES = ('a_change', 'b_change', 'c_change')
+
+
+def _post(tmp_path, platform_name, index, manip_types=TYPES):
+    stem = f"{platform_name}_{index:03d}"
+    jobs = [make_job(platform_name, tmp_path, stem, {}, 'autentico', 'none', stem, extension='.png')]
+    for j, manip_type in enumerate(manip_types, 1):
+        jobs.append(make_job(platform_name, tmp_path, f"{stem}_manip_{j}", {}, 'manipulado', manip_type,
+                             stem, extension='.png'))
+    return jobs
+
+
+def _plan(tmp_path, posts=4):
+    # Na ordem de plan_jobs(): uma plataforma inteira depois da outra
+    return [job for name in PLATFORM_NAMES for i in range(posts) for job in _post(tmp_path, name, i)]
+
+
+def _posts_in_order(jobs):
+    return [key for key, _ in groupby(jobs, key=lambda job: (job['platform'], post_group(job['label'])))]
+
+
+def test_interleave_keeps_jobs_and_posts_together(tmp_path):
+    jobs = _plan(tmp_path)
+
+    ordered = interleave_jobs(jobs)
+
+    assert sorted(id(job) for job in ordered) == sorted(id(job) for job in jobs)
+    posts = _posts_in_order(ordered)
+    assert len(posts) == len(set(posts)) == 12
+    assert [ordered[i]['label']['class'] for i in range(0, len(ordered), 4)] == ['autentico'] * 12
+
+
+def test_interleave_prefixes_are_balanced_across_platforms(tmp_path):
+    ordered = interleave_jobs(_plan(tmp_path))
+
+    counts = Counter()
+    for platform_name, _ in _posts_in_order(ordered):
+        counts[platform_name] += 1
+        assert max(counts.values()) - min(counts[name] for name in PLATFORM_NAMES) <= 1
+
+
+def test_interleave_alternates_manipulation_signatures(tmp_path):
+    # Como na geração adaptativa: cada post tem só alguns tipos
+    jobs = [job for i in range(6)
+            for job in _post(tmp_path, 'twitter', i, (TYPES[0],) if i < 3 else (TYPES[1],))]
+
+    ordered = interleave_jobs(jobs)
+
+    manipulated = [job['label']['manipulation_type'] for job in ordered if job['label']['class'] == 'manipulado']
+    assert manipulated == [TYPES[0], TYPES[1]] * 3
+
+
+def test_interleave_min_run_keeps_platform_batches(tmp_path):
+    ordered = interleave_jobs(_plan(tmp_path), min_run=8)
+
+    runs = [len(list(group)) for _, group in groupby(job['platform'] for job in ordered)]
+    assert runs == [8] * 6
+
+
+def test_snapshot_publishes_only_consistent_rows(tmp_path):
+    path = tmp_path / 'labels.csv'
+    snapshots = LabelSnapshots(path=path, every=2)
+    authentic, manipulated = [job['label'] for job in _post(tmp_path, 'twitter', 0, TYPES[:1])]
+
+    snapshots.add([manipulated])
+    assert not path.exists()
+    snapshots.add([_post(tmp_path, 'instagram', 0, ())[0]['label']])
+
+    with open(path, newline='', encoding='utf-8') as f:
+        assert [row['filename'] for row in csv.DictReader(f)] == ['instagram_000.png']
+
+    snapshots.add([authentic])
+    assert snapshots.publish() == 3
+    with open(path, newline='', encoding='utf-8') as f:
+        assert {row['filename'] for row in csv.DictReader(f)} == {
+            'twitter_000_manip_1.png', 'instagram_000.png', 'twitter_000.png'}
+    assert not (tmp_path / 'labels.csv.tmp').exists()
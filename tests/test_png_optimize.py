@@ -0,0 +1,79 @@
+"""
+Otimização dos PNGs: a saída decodifica para os mesmos pixels e nunca cresce
+"""
+
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from src.png_optimize import (
+    COLOR_PALETTE,
+    FILTER_TYPES,
+    decode_rgba,
+    optimize_png,
+    pack_indices
+)
+
+
+def _encode(pixels, mode=None):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, mode).save(buffer, format='PNG', compress_level=0)
+    return buffer.getvalue()
+
+
+def _screenshot(height=40, width=30, colors=5):
+    # Poucas cores em faixas, como o fundo e os textos de um screenshot
+    palette = np.random.default_rng(0).integers(0, 256, (colors, 3), dtype=np.uint8)
+    rows = np.arange(height) * colors // height
+    return np.ascontiguousarray(np.broadcast_to(palette[rows][:, None], (height, width, 3)))
+
+
+@pytest.mark.parametrize('filter_name', [*FILTER_TYPES, 'adaptive'])
+def test_optimize_is_lossless_for_each_filter(filter_name):
+    pixels = _screenshot()
+    data = _encode(pixels)
+
+    optimized, info = optimize_png(data, filters=[filter_name], strategies=['default'])
+
+    assert info['changed'] and info['filter'] == filter_name
+    assert len(optimized) == info['after'] < info['before'] == len(data)
+    assert np.array_equal(decode_rgba(optimized), decode_rgba(data))
+
+
+def test_few_colors_become_palette():
+    data = _encode(_screenshot(colors=3))
+
+    optimized, info = optimize_png(data)
+
+    assert info['color_type'] == COLOR_PALETTE and info['colors'] == 3
+    assert np.array_equal(decode_rgba(optimized), decode_rgba(data))
+
+
+def test_transparency_is_preserved():
+    rgba = np.dstack([_screenshot(), np.full((40, 30), 255, dtype=np.uint8)])
+    rgba[:10, :, 3] = 0
+    data = _encode(rgba, 'RGBA')
+
+    optimized, _ = optimize_png(data)
+
+    assert np.array_equal(decode_rgba(optimized), rgba)
+
+
+def test_noise_is_returned_unchanged():
+    # Ruído não comprime melhor que o original já comprimido no máximo
+    noise = np.random.default_rng(1).integers(0, 256, (32, 32, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(noise).save(buffer, format='PNG', optimize=True)
+    data = buffer.getvalue()
+
+    optimized, info = optimize_png(data, filters=['none'], strategies=['default'])
+
+    assert optimized == data and not info['changed']
+
+
+def test_pack_indices_msb_first():
+    indices = np.array([[1, 0, 1, 1, 0, 0, 0, 1, 1]], dtype=np.uint8)
+
+    packed = pack_indices(indices, 1)
+
+    assert packed.tolist() == [[0b10110001, 0b10000000]]
@@ -0,0 +1,31 @@
+"""
+Serviço de pontuação: cache de características por conteúdo
+"""
+
+import asyncio
+import time
+import numpy as np
+from src import scoring
+from src.scoring import ScoringService
+
+
+def _slow_features(data):
+    time.sleep(0.05)
+    return np.frombuffer(data, dtype=np.uint8).astype(np.float32)
+
+
+def test_concurrent_requests_are_coalesced_not_missed(monkeypatch):
+    monkeypatch.setattr(scoring, '_features_from_bytes', _slow_features)
+    service = ScoringService(detector=None)
+
+    async def run():
+        first = await asyncio.gather(*(service.features(b'abc') for _ in range(3)))
+        again = await service.features(b'abc')
+        return first, again
+
+    first, again = asyncio.run(run())
+
+    assert all(np.array_equal(vector, again) for vector in first)
+    assert (service._cache_hits, service._cache_misses, service._cache_coalesced) == (1, 1, 2)
+    stats = service.stats()
+    assert stats['cache_coalesced'] == 2 and stats['cache_hit_rate'] == 0.25